@@ -2,6 +2,9 @@ from app.agents.base import BaseAgent
 import json
 from app.config import settings
 from app.core.prompts import Prompts
+from app.core.context_packer import ContextPacker
+from app.core.grounding import GroundingScorer
+from app.core.resilience import LLMUnavailableError
 
 class AuditorAgent(BaseAgent):
     def __init__(self):
@@ -11,16 +14,31 @@ class AuditorAgent(BaseAgent):
         )
 
     async def verify(self, question: str, answer: str, context_chunks: list[str]) -> dict:
-        formatted_context = "\n---\n".join(context_chunks)
+        # Cheap pre-check: answers whose every sentence matches the context skip the LLM call
+        report = await GroundingScorer().score(answer, context_chunks)
+        if report.grounded:
+            return {"is_valid": True, "reason": "Every statement matches the source context.", "correction": None, "method": "similarity"}
+
+        # Only the flagged sentences need the model; rank context sentences against them
+        claims = report.unsupported if report.checked else [answer]
+        packed = await ContextPacker().pack(f"{question} {' '.join(claims)}", context_chunks, site="auditor")
+        formatted_context = packed.as_text()
         
         from datetime import datetime
         now_str = datetime.now().strftime("%A, %B %d, %Y")
-        prompt = Prompts.AUDITOR_VERIFY_TEMPLATE.format(
-            context=formatted_context,
-            question=question,
-            answer=answer,
-            current_time=now_str
-        )
+        if report.checked and len(claims) < len(report.sentences):
+            prompt = Prompts.AUDITOR_CLAIMS_TEMPLATE.format(
+                question=question,
+                answer=answer,
+                claims="\n".join(f"- {c}" for c in claims),
+                current_time=now_str
+            )
+        else:
+            prompt = Prompts.AUDITOR_VERIFY_TEMPLATE.format(
+                question=question,
+                answer=answer,
+                current_time=now_str
+            )
         
         from pydantic import BaseModel
         from typing import Optional
@@ -43,21 +61,32 @@ class AuditorAgent(BaseAgent):
         from app.core.llm import NeuroVaultLLM
         
         try:
-            # We construct messages manually since we are bypassing BaseAgent.generate loop for this specific atomic check
-            messages = [
-                {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": prompt}
-            ]
+            # We bypass BaseAgent.generate for this atomic check, but keep its cache-friendly layout
+            messages = self.build_messages(prompt, context=formatted_context)
             
             response = await NeuroVaultLLM.chat(
                 model=self.model,
                 messages=messages,
-                format=AuditorResponse.model_json_schema()
+                format=AuditorResponse.model_json_schema(),
+                call_site=self.call_site
             )
             
             content = response['message']['content']
-            return json.loads(content)
+            return {**json.loads(content), "method": "llm", "checked_sentences": claims}
             
+        except LLMUnavailableError as e:
+            # Don't hold the answer hostage to a slow verifier, but don't claim it was checked either
+            print(f"Auditor skipped: {e}")
+            return self.skipped("Verification skipped: model unavailable.")
         except Exception as e:
             print(f"Auditor verification failed: {e}")
-            return {"is_valid": True, "reason": "Verification failed, assuming valid.", "correction": None}
+            return self.skipped("Verification failed.")
+
+    @staticmethod
+    def skipped(reason: str) -> dict:
+        return {"is_valid": None, "reason": reason, "correction": None, "skipped": True}
+
+    @staticmethod
+    def event(verification: dict) -> dict:
+        """Client payload for a verdict; one shape for the chat and voice streams."""
+        return {"verified": verification.get("is_valid"), "correction": verification.get("correction"), "reason": verification.get("reason"), "skipped": verification.get("skipped", False), "method": verification.get("method"), "type": "verification"}
@@ -5,20 +5,29 @@ class BaseAgent:
     def __init__(self, model: str, system_prompt: str = ""):
         self.model = model
         self.system_prompt = system_prompt
+        # Telemetry label, e.g. MessengerAgent -> "messenger"
+        self.call_site = type(self).__name__.replace("Agent", "").lower() or "agent"
 
-    async def generate(self, user_prompt: str, context: Optional[str] = None) -> str:
-        messages = []
-        if self.system_prompt:
-            messages.append({'role': 'system', 'content': self.system_prompt})
-        
-        full_prompt = user_prompt
+    def build_messages(self, user_prompt: str, context: Optional[str] = None) -> List[Dict[str, Any]]:
+        """
+        Prefix-cache friendly layout: stable system prompt, then stable context, then the volatile prompt.
+        Keeping the context ahead of the question lets the model server reuse its KV cache across turns.
+        """
+        system = self.system_prompt
         if context:
-            full_prompt += f"\n\nContext:\n{context}"
-            
-        messages.append({'role': 'user', 'content': full_prompt})
+            system = f"{system}\n\nContext:\n{context}" if system else f"Context:\n{context}"
+
+        messages = []
+        if system:
+            messages.append({'role': 'system', 'content': system})
+        messages.append({'role': 'user', 'content': user_prompt})
+        return messages
+
+    async def generate(self, user_prompt: str, context: Optional[str] = None) -> str:
+        messages = self.build_messages(user_prompt, context)
 
         try:
-            response = await NeuroVaultLLM.chat(model=self.model, messages=messages)
+            response = await NeuroVaultLLM.chat(model=self.model, messages=messages, call_site=self.call_site)
             return response['message']['content']
         except Exception as e:
             print(f"Agent {self.model} failed: {e}")
@@ -26,18 +35,10 @@ class BaseAgent:
 
     async def generate_stream(self, user_prompt: str, context: Optional[str] = None):
         """Yields tokens as they are generated using NeuroVaultLLM."""
-        messages = []
-        if self.system_prompt:
-            messages.append({'role': 'system', 'content': self.system_prompt})
-        
-        full_prompt = user_prompt
-        if context:
-            full_prompt += f"\n\nContext:\n{context}"
-            
-        messages.append({'role': 'user', 'content': full_prompt})
+        messages = self.build_messages(user_prompt, context)
 
         try:
-            async for chunk in await NeuroVaultLLM.chat(model=self.model, messages=messages, stream=True):
+            async for chunk in await NeuroVaultLLM.chat(model=self.model, messages=messages, stream=True, call_site=self.call_site):
                 content = chunk['message']['content']
                 if content:
                     yield content
@@ -1,6 +1,7 @@
 from app.agents.base import BaseAgent
 from app.config import settings
 from app.core.prompts import Prompts
+from app.core.context_packer import ContextPacker
 
 class MessengerAgent(BaseAgent):
     def __init__(self):
@@ -10,15 +11,17 @@ class MessengerAgent(BaseAgent):
         )
 
     async def answer_with_rag(self, query: str, context_chunks: list[str]) -> str:
-        # 1. Format context
-        formatted_context = "\n---\n".join(context_chunks)
+        # 1. Fit context into the prompt budget
+        packed = await ContextPacker().pack(query, context_chunks, site="messenger")
+        formatted_context = packed.as_text()
         
         # 2. Generate answer
         prompt = Prompts.MESSENGER_RAG_TEMPLATE.format(query=query)
         return await self.generate(prompt, context=formatted_context)
 
     async def stream_answer_with_rag(self, query: str, context_chunks: list[str]):
-        formatted_context = "\n---\n".join(context_chunks)
+        packed = await ContextPacker().pack(query, context_chunks, site="messenger")
+        formatted_context = packed.as_text()
         prompt = Prompts.MESSENGER_RAG_TEMPLATE.format(query=query)
         async for token in self.generate_stream(prompt, context=formatted_context):
             yield token
@@ -4,32 +4,46 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from db.database import get_db
 from app.schemas.timeline import SummaryResponse
 from app.services.summary_service import SummaryService
+from app.core.summary_scheduler import summary_scheduler
 
 router = APIRouter()
 
+def summary_response(summary, is_stale: bool) -> SummaryResponse:
+    response = SummaryResponse.model_validate(summary)
+    response.version = summary.id
+    response.is_stale = is_stale
+    return response
+
 @router.get("/summary", response_model=SummaryResponse)
 async def get_summary(
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Get the latest rolling summary.
-    If no summary exists, attempts to generate one.
+    Get the latest rolling summary immediately (stale-while-revalidate).
+    Never generates inline: if notes changed since, `is_stale` is true and the
+    background scheduler regenerates it; poll until `version` changes.
+    A 404 with Retry-After means the first summary is being generated.
     """
     summary = await SummaryService.get_latest_summary(db)
     if not summary:
-        summary = await SummaryService.generate_summary(db)
-        if not summary:
-             raise HTTPException(status_code=404, detail="No content to summarize")
-    return summary
+        if await SummaryService.has_unsummarized(db, None):
+            summary_scheduler.mark_dirty()
+        headers = {"Retry-After": "5"} if summary_scheduler.stale else None
+        raise HTTPException(status_code=404, detail="No summary yet", headers=headers)
+
+    is_stale = summary_scheduler.stale or await SummaryService.has_unsummarized(db, summary)
+    if is_stale and not summary_scheduler.stale:
+        summary_scheduler.mark_dirty() # e.g. notes written before a restart
+    return summary_response(summary, is_stale)
 
 @router.post("/summary/refresh", response_model=SummaryResponse)
 async def refresh_summary(
     db: AsyncSession = Depends(get_db)
 ):
     """
-    Force regenerate the rolling summary based on latest notes.
+    Fold in the latest notes now (incremental; serialized with background runs).
     """
-    summary = await SummaryService.generate_summary(db)
+    summary = await summary_scheduler.refresh(db)
     if not summary:
         raise HTTPException(status_code=404, detail="No notes available to summarize")
-    return summary
+    return summary_response(summary, await SummaryService.has_unsummarized(db, summary))
@@ -9,6 +9,8 @@ from pydantic import BaseModel
 from app.config import settings
 from app.services.multimodal_service import MultimodalService
 from app.services.note_service import NoteService
+from app.services.audio_archive_service import AudioArchiveService
+from app.core.chunking import chunk_text
 from app.schemas.note import NoteCreate, NoteResponse
 from app.models.base import MediaType
 from db.database import get_db
@@ -30,15 +32,6 @@ class UploadResponse(BaseModel):
     tags: List[str] = []
     chunks_created: int = 0
 
-def chunk_text(text: str, chunk_size: int = 2000, overlap: int = 200) -> List[str]:
-    chunks = []
-    start = 0
-    while start < len(text):
-        end = start + chunk_size
-        chunks.append(text[start:end])
-        start += (chunk_size - overlap)
-    return chunks
-
 # Background processing placeholder removed for clarity
 
 
@@ -53,8 +46,29 @@ def extract_pdf_text_sync(file_path: str) -> str:
         full_text += page.extract_text() + "\n"
     return full_text
 
+async def index_pdf_parent(db, parent_note, overview: str):
+    """
+    Index the parent note itself so the file appears in search results, not just its chunks.
+    `overview` is the first chunk until the whole-document summary exists, then the summary.
+    """
+    from app.services.vector_service import VectorService
+    from sqlalchemy import text
+    import json
+
+    # Construct enriched parent text: filename (in content) + overview + tags
+    parent_text = f"Type: pdf\nTags: pdf, document\nSummary: {overview}\nContent: {parent_note.content}"
+    try:
+        vector = await VectorService.embed_text(parent_text, call_site="embed.pdf")
+        await db.execute(text("DELETE FROM vec_notes WHERE rowid = :id"), {"id": parent_note.id}) # re-index / retry
+        vec_stmt = text("INSERT INTO vec_notes(rowid, embedding) VALUES (:id, :embedding)")
+        await db.execute(vec_stmt, {"id": parent_note.id, "embedding": json.dumps(vector)})
+        await db.commit()
+        print(f"[PDF] Parent note {parent_note.id} indexed successfully.")
+    except Exception as ve:
+        print(f"[PDF] Failed to index parent note: {ve}")
+
 async def process_pdf_task(file_path: str, parent_note_id: int):
-    """Background task to chunk and embed PDF."""
+    """Background task to chunk and embed PDF, then summarize it."""
     from app.services.summary_service import SummaryService
     from sqlalchemy import select
     from app.models.base import Note
@@ -72,63 +86,57 @@ async def process_pdf_task(file_path: str, parent_note_id: int):
                 print(f"[PDF] Warning: No text extracted from {file_path}")
                 full_text = "(Empty PDF)"
 
-            # 1. Summarize the PDF (Update Parent)
-            summary_text = await SummaryService.summarize_single_note(full_text[:10000])
-            
-            # Update Parent Note with Summary
-            stmt = select(Note).where(Note.id == parent_note_id)
-            result = await db.execute(stmt)
-            parent_note = result.scalars().first()
-            if parent_note:
-                parent_note.summary = summary_text
-                # Optional: Append summary to content so it's searchable? 
-                # Or keep content as "PDF: filename" and use summary field.
-                # Let's keep content clean, but ensure summary is saved.
-                await db.commit()
-                print(f"[PDF] Summary generated: {summary_text[:50]}...")
-
-                # NEW: Index the Parent Note itself using its Summary!
-                # This ensures the File itself appears in search results, not just its chunks.
-                from app.services.vector_service import VectorService
-                from sqlalchemy import text
-                import json
-                
-                # Construct enriched parent text
-                # We use the filename (in content) + Summary + Tags
-                parent_text = f"Type: pdf\nTags: pdf, document\nSummary: {summary_text}\nContent: {parent_note.content}"
-                
-                try:
-                    vector = await VectorService.embed_text(parent_text)
-                    vec_stmt = text("INSERT INTO vec_notes(rowid, embedding) VALUES (:id, :embedding)")
-                    await db.execute(vec_stmt, {"id": parent_note.id, "embedding": json.dumps(vector)})
-                    await db.commit()
-                    print(f"[PDF] Parent note {parent_note.id} indexed successfully.")
-                except Exception as ve:
-                    print(f"[PDF] Failed to index parent note: {ve}")
-            
-            # 2. Chunking
+            # 1. Chunking (a retry reuses chunks that already exist, with their cached summaries)
             chunks = chunk_text(full_text)
-            print(f"[PDF] Created {len(chunks)} chunks.")
-            
+            existing = await db.execute(select(Note).where(Note.parent_id == parent_note_id))
+            existing_by_content = {n.content: n for n in existing.scalars().all()}
+            chunk_notes = []
+            created = 0
             for i, chunk in enumerate(chunks):
-                child_in = NoteCreate(
-                    content=chunk,
-                    media_type=MediaType.PDF,
-                    tags=["pdf", "chunk", f"part_{i+1}"],
-                    file_path=file_path,
-                    parent_id=parent_note_id,
-                    is_hidden=True
-                )
-                # Create and Embed Chunk
-                await NoteService.create_note(db, child_in)
-                
-            # Mark Parent as Ready
+                child = existing_by_content.get(chunk)
+                if child is None:
+                    child_in = NoteCreate(
+                        content=chunk,
+                        media_type=MediaType.PDF,
+                        tags=["pdf", "chunk", f"part_{i+1}"],
+                        file_path=file_path,
+                        parent_id=parent_note_id,
+                        is_hidden=True
+                    )
+                    # Create and Embed Chunk
+                    child = await NoteService.create_note(db, child_in)
+                    created += 1
+                chunk_notes.append(child)
+            print(f"[PDF] {len(chunks)} chunks ({created} new).")
+
+            # 2. Searchable and chat-ready now: index the parent from its first chunk and mark it ready,
+            # instead of holding it (and the rolling summary) for the whole map-reduce below
+            parent_note = await NoteService.get_note(db, parent_note_id)
+            if parent_note is None:
+                return
+            await index_pdf_parent(db, parent_note, parent_note.summary or (chunks[0] if chunks else full_text))
             await NoteService.mark_as_processed(db, parent_note_id)
+            print(f"[PDF] Note {parent_note_id} ready; summarizing in the background")
+
+            # 3. Summarize the whole PDF: chunk summaries in parallel, then reduce (Update Parent)
+            summary_text = await SummaryService.summarize_document(db, chunk_notes)
+            if summary_text:
+                # Keep content as "PDF: filename"; the summary lives in its own field
+                parent_note.summary = summary_text
+                await db.commit()
+                print(f"[PDF] Summary generated: {summary_text[:50]}...")
+                await index_pdf_parent(db, parent_note, summary_text)
             print(f"Background processing complete for note {parent_note_id}")
             
         except Exception as e:
             print(f"Background PDF processing failed: {e}")
-            # Optionally mark as failed or handle error in DB
+            await db.rollback()
+            # Never leave the parent "processing": it would hold back the rolling summary watermark.
+            # A retry reuses the chunks and their cached summaries.
+            await NoteService.update_note(db, parent_note_id, {
+                "is_processing": False,
+                "tags": ["processing_failed", "pdf"]
+            })
 
 @router.post("/upload", response_model=NoteResponse) # Changed from UploadResponse to NoteResponse
 async def upload_file(
@@ -262,26 +270,47 @@ async def process_image_task(file_path: str, note_id: int):
             })
 
 async def process_audio_task(file_path: str, note_id: int):
-    """Background Audio Transcription"""
+    """
+    Background Audio Transcription (long-form, on the Voice Engine).
+    Segments arrive as parallel chunks finish and are written into the note in timestamp order.
+    """
+    from app.services.voice_service import VoiceService
     async with async_session_maker() as db:
         try:
             print(f"[Audio] Queued {file_path} for Note {note_id}")
-            text = await run_with_semaphore(MultimodalService.process_audio(file_path))
-            
-            # Remove processing tag
-            # We don't fetch note here, but we should if we want to preserve other tags?
-            # Or just overwrite since audio usually doesn't have other tags initially except media_type?
-            # Safe to just set tags as [voice, audio]
-            
+            segments = []
+            last_flush = 0.0
+            loop = asyncio.get_running_loop()
+            async for event in VoiceService.transcribe_long(file_path):
+                if event["type"] == "start":
+                    print(f"[Audio] {event['duration']}s in {event['chunks']} chunks (tier {event['tier']})")
+                elif event["type"] == "segment":
+                    segments.append(event)
+                    # Partial transcript for the UI, at most once a second
+                    if loop.time() - last_flush >= 1.0:
+                        await NoteService.update_note(db, note_id, {"content": format_transcript(segments)})
+                        last_flush = loop.time()
+                elif event["type"] == "done":
+                    print(f"[Audio] Transcribed Note {note_id} in {event['elapsed']}s (RTF {event['rtf']})")
+
             await NoteService.update_note(db, note_id, {
-                "content": text,
+                "content": format_transcript(segments) if segments else "[Voice Note]: (no speech detected)",
                 "is_processing": False,
                 "tags": ["voice", "audio"]
             })
             print(f"[Audio] Finished Note {note_id}")
+            await AudioArchiveService.archive(file_path)
         except Exception as e:
             print(f"[Audio] Failed: {e}")
             await NoteService.update_note(db, note_id, {
                 "is_processing": False,
                 "tags": ["processing_failed", "voice"]
             })
+
+def format_transcript(segments: list[dict]) -> str:
+    """'[Voice Note]:' followed by one '[mm:ss] text' line per segment, in time order."""
+    lines = ["[Voice Note]:"]
+    for segment in sorted(segments, key=lambda s: s["start"]):
+        minutes, seconds = divmod(int(segment["start"]), 60)
+        lines.append(f"[{minutes:02d}:{seconds:02d}] {segment['text']}")
+    return "\n".join(lines)
@@ -1,8 +1,8 @@
-from fastapi import APIRouter, Depends, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, UploadFile, File, Form, WebSocket, WebSocketDisconnect
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from db.database import get_db
-from app.services.voice_service import VoiceService
+from app.services.voice_service import VoiceService, audio_mime
 from starlette.responses import StreamingResponse
 import json
 
@@ -11,6 +11,7 @@ router = APIRouter()
 class VoiceCommandResponse(BaseModel):
     response: str
     audio: str | None = None
+    audio_mime: str | None = None
     action_taken: str | None = None
     intent: str | None = None
     query: str | None = None
@@ -21,6 +22,8 @@ async def process_voice_command(
     file: UploadFile = File(None), # Optional audio file
     stt_only: bool = Form(False),
     speak: bool = Form(True), # Controls audio generation
+    voice: str = Form(None), # Kokoro voice (default: VOICE_DEFAULT_VOICE)
+    background_tasks: BackgroundTasks = None,
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -40,13 +43,14 @@ async def process_voice_command(
                  intent="STT_ONLY"
              )
              
-        result = await VoiceService.process_audio(db, audio_bytes)
+        result = await VoiceService.process_audio(db, audio_bytes, background_tasks=background_tasks, voice=voice)
     elif text:
-        result = await VoiceService.process_command(db, text, generate_audio=speak)
+        result = await VoiceService.process_command(db, text, generate_audio=speak, voice=voice)
         
     return VoiceCommandResponse(
         response=result.get("response"),
         audio=result.get("audio"),
+        audio_mime=audio_mime() if result.get("audio") else None,
         action_taken=result.get("action_taken"),
         intent=result.get("intent"),
         query=result.get("query")
@@ -56,6 +60,7 @@ async def process_voice_command(
 async def chat_with_pdf_voice(
     note_id: int,
     file: UploadFile = File(...),
+    voice: str = Form(None),
     db: AsyncSession = Depends(get_db)
 ):
     """
@@ -64,36 +69,26 @@ async def chat_with_pdf_voice(
     Returns transcribed text as 'query', answer as 'response', and 'audio'.
     """
     audio_bytes = await file.read()
-    result = await VoiceService.process_pdf_audio(db, audio_bytes, note_id)
+    result = await VoiceService.process_pdf_audio(db, audio_bytes, note_id, voice=voice)
     
     return VoiceCommandResponse(
         response=result.get("response"),
         audio=result.get("audio"),
+        audio_mime=audio_mime() if result.get("audio") else None,
         query=result.get("user_text"),
         intent="PDF_CHAT"
     )
 
-@router.post("/voice/pdf/{note_id}/stream")
-async def stream_pdf_audio(
-    note_id: int,
-    file: UploadFile = File(...),
-    # db: AsyncSession = Depends(get_db) # Remove Depends to manage lifecycle manually
-):
+async def prepare_pdf_turn(note_id: int, audio_bytes: bytes, session_id: str | None = None) -> tuple[str, list[str], str | None]:
     """
-    Streaming Endpoint for Voice Chat with PDF.
-    Manages DB session manually to ensure it closes BEFORE long streaming starts.
+    Transcribe and fetch (pinned) document context for a streaming voice turn.
+    Manages the DB session manually so it closes BEFORE long streaming starts.
+    Returns (text, context_chunks, session_id); pass the session id back on the next turn.
     """
-    audio_bytes = await file.read()
-    
     # 1. Transcribe (No DB)
-    from app.services.voice_service import VoiceService
-    text = await VoiceService.transcribe(audio_bytes)
-    
+    text = await VoiceService.transcribe(audio_bytes, mode="command") # Questions: latency over beam search
     if not text:
-        # Return simple stream saying "I didn't hear you"
-        async def empty_gen():
-            yield f"data: {json.dumps({'response': 'I did not hear anything.'})}\n\n"
-        return StreamingResponse(empty_gen(), media_type="text/event-stream")
+        return "", [], session_id
 
     # 2. Get Context (Short-lived DB Session)
     from db.database import async_session_maker
@@ -109,10 +104,144 @@ async def stream_pdf_audio(
         except Exception as e:
             print(f"[Streaming] DB Error: {e}")
             pass
+
+    # A client's voice turns on the same document share one pinned context (stable prompt prefix)
+    if context_chunks:
+        from app.core.chat_sessions import chat_sessions
+        from app.config import settings
+        session_id, context_chunks, pin_status = await chat_sessions.resolve(
+            session_id, note_id, text, context_chunks, settings.VOICE_CONTEXT_TOKEN_BUDGET
+        )
+        print(f"[Streaming] Context: {pin_status}")
+
+    return text, context_chunks, session_id
+
+@router.post("/voice/pdf/{note_id}/stream")
+async def stream_pdf_audio(
+    note_id: int,
+    file: UploadFile = File(...),
+    voice: str = Form(None),
+    session_id: str = Form(None),
+):
+    """
+    Streaming Endpoint for Voice Chat with PDF (SSE, base64 audio - compatibility mode).
+    Send back the X-Chat-Session response header as `session_id` to keep the pinned context.
+    """
+    audio_bytes = await file.read()
+    text, context_chunks, session_id = await prepare_pdf_turn(note_id, audio_bytes, session_id)
+    headers = {"X-Chat-Session": session_id} if session_id else None
+    
+    if not text:
+        # Return simple stream saying "I didn't hear you"
+        async def empty_gen():
+            yield f"data: {json.dumps({'response': 'I did not hear anything.'})}\n\n"
+        return StreamingResponse(empty_gen(), media_type="text/event-stream", headers=headers)
             
     # 3. Stream Response (Pure CPU/Network, No DB)
-    # The session 'db' is successfully closed here.
     return StreamingResponse(
-        VoiceService.generate_pdf_response_stream(text, context_chunks, note_id),
-        media_type="text/event-stream"
+        VoiceService.generate_pdf_response_stream(text, context_chunks, note_id, voice=voice),
+        media_type="text/event-stream",
+        headers=headers
     )
+
+@router.websocket("/voice/pdf/{note_id}/ws")
+async def stream_pdf_audio_ws(websocket: WebSocket, note_id: int, voice: str = None):
+    """
+    Voice Chat with PDF over a WebSocket.
+    Client sends each recorded utterance as one binary message (WAV).
+    Server replies with JSON text frames (query/token/verification/done/error)
+    and binary frames holding one audio clip per sentence (TTS_AUDIO_FORMAT, see 'audio_mime'), in playback order.
+    """
+    await websocket.accept()
+    session_id = None # One pinned context per connection
+    try:
+        while True:
+            audio_bytes = await websocket.receive_bytes()
+            text, context_chunks, session_id = await prepare_pdf_turn(note_id, audio_bytes, session_id)
+            if not text:
+                await websocket.send_json({'response': 'I did not hear anything.', 'done': True})
+                continue
+
+            async for event in VoiceService.pdf_response_events(text, context_chunks, note_id, voice=voice):
+                if 'audio' in event:
+                    await websocket.send_bytes(event['audio'])
+                else:
+                    await websocket.send_json(event)
+    except WebSocketDisconnect:
+        print(f"[Streaming] Voice socket closed for note {note_id}")
+
+@router.websocket("/voice/command/ws")
+async def voice_command_ws(websocket: WebSocket, speak: bool = True, voice: str = None):
+    """
+    Streaming voice command.
+    Client streams 16 kHz mono PCM16 binary frames and sends "end" when the user stops.
+    Audio is relayed to the Voice Engine's streaming STT; partial/final transcripts are forwarded as they arrive.
+    Each final segment kicks off interpretation of the text so far, so the command is usually understood by "end".
+    Replies with the command result as JSON, then (if speak) the spoken response as one binary audio frame.
+    """
+    import asyncio
+    from app.core.voice_engine import voice_engine
+    from db.database import async_session_maker
+
+    await websocket.accept()
+    route_task, routed_text = None, None
+
+    try:
+        async with voice_engine.connect_stream("/stt/stream") as engine_ws:
+            async def relay_audio():
+                while True:
+                    message = await websocket.receive()
+                    if message["type"] == "websocket.disconnect":
+                        await engine_ws.close()
+                        return
+                    if message.get("bytes"):
+                        await engine_ws.send(message["bytes"])
+                    elif message.get("text"):
+                        await engine_ws.send(message["text"])
+
+            relay = asyncio.create_task(relay_audio())
+            finals, text = [], ""
+            try:
+                async for raw in engine_ws:
+                    event = json.loads(raw)
+                    if event["type"] == "done":
+                        text = event.get("text") or " ".join(finals)
+                        break
+                    await websocket.send_json(event)
+                    if event["type"] == "final" and event.get("text"):
+                        finals.append(event["text"])
+                        # Speculative interpretation of what has been said so far
+                        if route_task:
+                            route_task.cancel()
+                        routed_text = " ".join(finals)
+                        route_task = asyncio.create_task(VoiceService.interpret(routed_text))
+            finally:
+                relay.cancel()
+
+        if not text:
+            await websocket.send_json({"response": "I didn't catch that.", "done": True})
+            return
+
+        # Reuse the speculative interpretation only if nothing was said after it was computed
+        interpretation = None
+        if route_task and routed_text == text:
+            try:
+                interpretation = await route_task
+            except Exception as e:
+                print(f"[VoiceWS] Speculative interpretation failed: {e}")
+        print(f"[VoiceWS] Final transcript: {text} (pre-interpreted: {interpretation is not None})")
+
+        async with async_session_maker() as db:
+            result = await VoiceService.process_command(db, text, generate_audio=False, interpretation=interpretation, voice=voice)
+        await websocket.send_json({**result, "query": text, "audio_mime": audio_mime(), "done": True})
+
+        if speak and result.get("response"):
+            audio = await VoiceService.synthesize_audio_bytes(result["response"], voice=voice)
+            if audio:
+                await websocket.send_bytes(audio)
+        await websocket.close()
+    except WebSocketDisconnect:
+        print("[VoiceWS] Client disconnected")
+    finally:
+        if route_task and not route_task.done():
+            route_task.cancel()
@@ -17,6 +17,52 @@ class Settings(BaseSettings):
     # LLM Provider Config
     LLM_PROVIDER: str = "ollama"
     LLM_API_BASE: str = "http://localhost:11434"
+    # "openai" targets any OpenAI-compatible server (llama.cpp, vLLM). Base must include /v1.
+    LLM_API_KEY: str | None = None
+    LLM_REQUEST_TIMEOUT: float = 120.0
+    LLM_MAX_CONCURRENCY: int = 4 # In-flight LLM calls; extra calls queue (see /metrics queue wait)
+    # Per-call-site deadline overrides in seconds, e.g. LLM_CALL_DEADLINES='{"auditor": 10}'
+    LLM_CALL_DEADLINES: dict[str, float] = {}
+    LLM_BREAKER_FAILURES: int = 5
+    LLM_BREAKER_RESET_SECONDS: float = 30.0
+
+    # Voice intent router (app/core/intent_router.py): kNN over embedded examples, LLM below these thresholds
+    INTENT_ROUTER_K: int = 5
+    INTENT_ROUTER_MIN_CONFIDENCE: float = 0.8 # share of the top-k similarity mass for the winning label
+    INTENT_ROUTER_MIN_SIMILARITY: float = 0.45 # nearest example must be at least this close
+
+    # Rolling summary (SummaryService.generate_summary): only notes newer than the last summary are folded in
+    SUMMARY_BATCH_CHARS: int = 6000 # new-note text per LLM call; more than one batch is map-reduced
+    SUMMARY_MAX_NEW_NOTES: int = 200 # per refresh; the rest are folded in on the next one
+    SUMMARY_HISTORY: int = 5 # rolling summary versions kept in the database (older ones are pruned)
+    SUMMARY_DEBOUNCE_SECONDS: float = 5.0 # background regeneration waits for this much quiet after a note change
+    SUMMARY_DEBOUNCE_MAX_SECONDS: float = 60.0 # ...but no longer than this after the first change
+    SUMMARY_MAP_CONCURRENCY: int = 2 # parallel chunk summaries per document (leaves LLM slots for chat/voice)
+
+    # Auditor pre-check (app/core/grounding.py): answer sentences at least this similar to a context sentence skip the LLM auditor
+    GROUNDING_MIN_SIMILARITY: float = 0.75
+
+    # RAG prompt budgets (estimated tokens of retrieved context per prompt)
+    CONTEXT_TOKEN_BUDGET: int = 1500
+    VOICE_CONTEXT_TOKEN_BUDGET: int = 600
+
+    # Voice Engine (voice_engine/server.py). Set VOICE_ENGINE_SOCKET to talk over a Unix socket instead of TCP.
+    VOICE_ENGINE_URL: str = "http://localhost:8001"
+    VOICE_ENGINE_SOCKET: str | None = None
+    VOICE_ENGINE_MAX_CONNECTIONS: int = 16
+    VOICE_TTS_MAX_IN_FLIGHT: int = 2 # Sentences synthesized concurrently while the answer streams
+    VOICE_DEFAULT_VOICE: str = "af_sarah"
+    # Spoken responses: "mp3", "ogg" (Opus) or "wav"; bitrate in kbps
+    TTS_AUDIO_FORMAT: str = "mp3"
+    TTS_AUDIO_BITRATE: int = 48
+    # Stored voice recordings are re-encoded in the background ("wav" disables)
+    AUDIO_ARCHIVE_FORMAT: str = "ogg"
+    AUDIO_ARCHIVE_BITRATE: int = 24
+
+    # TTS cache (memory LRU + disk) for repeated spoken responses
+    TTS_CACHE_DIR: str = ".cache/tts"
+    TTS_CACHE_ITEMS: int = 256
+    TTS_CACHE_DISK_MB: int = 64 # Disk tier budget; least recently used files are evicted
 
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8")
 
@@ -0,0 +1,83 @@
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from app.core.context_packer import ContextPacker
+from app.core.text_utils import estimate_tokens
+
+@dataclass
+class PinnedContext:
+    note_id: int
+    chunks: list[str] = field(default_factory=list)
+    sources: set[str] = field(default_factory=set) # raw retrieved chunks already represented
+    tokens: int = 0
+    last_used: float = field(default_factory=time.time)
+
+class ChatSessionStore:
+    """
+    Pins the packed document context of a chat session so every turn sends the
+    same prompt prefix (system prompt + context). The model server can then reuse
+    its KV/prefix cache instead of re-prefilling the document each turn.
+
+    Per turn:
+    - "hit": retrieved chunks are already pinned -> identical prefix.
+    - "extended": new chunks fit the remaining budget -> appended after the pinned ones.
+    - "new": no session, or new chunks don't fit -> context re-packed and re-pinned.
+    """
+
+    def __init__(self, max_sessions: int = 256, ttl_seconds: float = 1800):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: OrderedDict[str, PinnedContext] = OrderedDict()
+
+    def _get(self, session_id: str, note_id: int) -> PinnedContext | None:
+        pinned = self._sessions.get(session_id)
+        if not pinned:
+            return None
+        if pinned.note_id != note_id or time.time() - pinned.last_used > self.ttl_seconds:
+            del self._sessions[session_id]
+            return None
+        return pinned
+
+    def _pin(self, session_id: str, pinned: PinnedContext):
+        pinned.last_used = time.time()
+        self._sessions[session_id] = pinned
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    async def resolve(self, session_id: str | None, note_id: int, query: str, retrieved: list[str], budget_tokens: int) -> tuple[str, list[str], str]:
+        """
+        Returns (session_id, context_chunks, status) for this turn.
+        """
+        session_id = session_id or uuid.uuid4().hex
+        pinned = self._get(session_id, note_id)
+
+        if pinned:
+            missing = [c for c in retrieved if c not in pinned.sources]
+            if not missing:
+                self._pin(session_id, pinned)
+                return session_id, pinned.chunks, "hit"
+
+            remaining = budget_tokens - pinned.tokens
+            if remaining > 0:
+                extra = await ContextPacker(remaining).pack(query, missing, site="session.extend")
+                if extra.chunks:
+                    # Append only: the pinned prefix stays byte-identical
+                    pinned.chunks = pinned.chunks + extra.chunks
+                    pinned.sources.update(missing)
+                    pinned.tokens += extra.tokens_used
+                    self._pin(session_id, pinned)
+                    return session_id, pinned.chunks, "extended"
+
+        packed = await ContextPacker(budget_tokens).pack(query, retrieved, site="session.pin")
+        pinned = PinnedContext(
+            note_id=note_id,
+            chunks=packed.chunks,
+            sources=set(retrieved),
+            tokens=sum(estimate_tokens(c) for c in packed.chunks)
+        )
+        self._pin(session_id, pinned)
+        return session_id, pinned.chunks, "new"
+
+chat_sessions = ChatSessionStore()
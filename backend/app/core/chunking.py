@@ -0,0 +1,11 @@
+from typing import List
+
+def chunk_text(text: str, chunk_size: int = 2000, overlap: int = 200) -> List[str]:
+    """Fixed-size overlapping chunks; PDF chunk notes (embedding, RAG) and document summaries share these boundaries."""
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = start + chunk_size
+        chunks.append(text[start:end])
+        start += (chunk_size - overlap)
+    return chunks
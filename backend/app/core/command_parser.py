@@ -0,0 +1,223 @@
+import re
+from datetime import datetime, timedelta
+import dateparser
+
+# --- Grammar ---
+# Only short, unambiguous commands are handled here; anything else goes to the LLM.
+MAX_COMMAND_WORDS = 25
+
+POLITE = r"(?:(?:please|hey|ok(?:ay)?|can you|could you)[,\s]+)*"
+
+SEARCH_PATTERNS = [
+    re.compile(POLITE + r"(?:find(?!\s+out\b)|search(?:\s+for)?|look\s+up|show\s+me)\s+"
+               r"(?:(?:my|all|any|the)\s+)?(?:notes?|anything|everything)?\s*"
+               r"(?:about|on|for|regarding|related\s+to|mentioning)?\s*(?P<query>.+)$", re.I),
+    re.compile(r"what\s+did\s+i\s+(?:say|write|note|save)\s+(?:about|on|regarding)\s+(?P<query>.+)$", re.I),
+]
+TASK_PATTERNS = [
+    re.compile(POLITE + r"remind\s+me\s+(?:to\s+|about\s+|that\s+)?(?P<rest>.+)$", re.I),
+    re.compile(POLITE + r"add\s+(?P<rest>.+?)\s+to\s+(?:my\s+)?(?:\w+\s+)?(?:list|to-?do(?:\s+list)?|tasks?)$", re.I),
+    re.compile(r"(?:to-?do|to do|new task|add task)[:\s]+(?P<rest>.+)$", re.I),
+]
+EVENT_PATTERNS = [
+    # "book" only as a verb with an object ("book a table"), not as a noun ("book club on Friday")
+    re.compile(POLITE + r"(?:schedule|book(?=\s+(?:a|an|the|my|me|us)\b)|set\s+up|put)\s+(?:a\s+|an\s+|the\s+|my\s+)?(?P<rest>.+?)(?:\s+(?:in|on)\s+(?:my|the)\s+calendar)?$", re.I),
+]
+
+WEEKDAYS = r"(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday)"
+MONTHS = r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)"
+NUMBER = r"(?:\d+|an?|one|two|three|four|five|ten|fifteen|twenty|thirty|forty-five|half\s+an?)"
+
+DATE_PHRASE = re.compile(
+    r"\b(?:(?:on|by|for)\s+)?(?:"
+    r"(?:the\s+)?day\s+after\s+tomorrow|today|tonight|tomorrow(?:\s+(?:morning|afternoon|evening|night))?"
+    r"|(?:this\s+|next\s+)?" + WEEKDAYS +
+    r"|" + MONTHS + r"\s+\d{1,2}(?:st|nd|rd|th)?|(?:the\s+)?\d{1,2}(?:st|nd|rd|th)?\s+(?:of\s+)?" + MONTHS +
+    r"|in\s+" + NUMBER + r"\s+(?:minutes?|mins?|hours?|days?|weeks?)"
+    r"|(?:the\s+)?\d{1,2}(?:st|nd|rd|th)" # day of month alone ("on the 1st")
+    r")\b", re.I)
+TIME_PHRASE = re.compile(
+    r"\b(?:(?:at|by|around)\s+)?(?:"
+    r"\d{1,2}(?::\d{2})?\s*(?:am|pm|a\.m\.|p\.m\.)|\d{1,2}:\d{2}|noon|midnight"
+    r")|\b(?:at|around)\s+\d{1,2}\b", re.I)
+# Date-like words still left once the phrases above are cut out ("next month", "this weekend", "every monday", "12/3"):
+# the command has a date we would silently drop, so it goes to the LLM instead
+UNRESOLVED_DATE = re.compile(
+    r"\b(?:months?|weeks?|weekends?|fortnight|years?|every|daily|weekly|monthly|yearly|annually"
+    r"|today|tonight|tomorrow|yesterday|morning|afternoon|evening|night"
+    r"|" + WEEKDAYS + r"s?"
+    r"|january|february|march|april|june|july|august|september|october|november|december)\b"
+    r"|\b\d{1,4}[/.-]\d{1,2}(?:[/.-]\d{2,4})?\b|\b\d{1,2}(?:st|nd|rd|th)\b", re.I)
+# Search commands with nothing to search for ("search for")
+EMPTY_QUERY = {"for", "about", "on", "notes", "note", "my", "anything", "everything", "it", "that", "this"}
+DURATION_PHRASE = re.compile(r"\bfor\s+(?P<n>" + NUMBER + r")\s+(?P<unit>hours?|hrs?|minutes?|mins?)\b", re.I)
+
+# Part-of-day words resolve to a sensible default time when no clock time is given
+PART_OF_DAY = {"morning": "09:00", "afternoon": "14:00", "evening": "18:00", "tonight": "20:00", "night": "20:00"}
+WORD_NUMBERS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "ten": 10,
+                "fifteen": 15, "twenty": 20, "thirty": 30, "forty-five": 45}
+
+CATEGORY_KEYWORDS = {
+    "Work": ("meeting", "standup", "client", "project", "report", "deadline", "presentation", "boss", "team", "review", "interview"),
+    "Health": ("doctor", "dentist", "gym", "workout", "run", "medicine", "pills", "therapy", "appointment", "yoga"),
+    "Finance": ("pay", "bill", "rent", "bank", "invoice", "tax", "taxes", "budget", "insurance", "salary"),
+    "Personal": ("mom", "dad", "birthday", "groceries", "milk", "family", "friend", "dinner", "laundry", "anniversary"),
+}
+URGENT_WORDS = ("urgent", "urgently", "asap", "important", "right away")
+
+def _minutes(number: str, unit: str) -> int:
+    number = number.lower()
+    if number.startswith("half"):
+        value = 0.5
+    else:
+        value = int(number) if number.isdigit() else WORD_NUMBERS.get(number, 1)
+    return int(value * 60) if unit.lower().startswith("h") else int(value)
+
+def _next_day_of_month(day: int, now: datetime) -> datetime | None:
+    """The next date (today included) falling on this day of the month, skipping months that lack it."""
+    year, month = now.year, now.month
+    for offset in range(13):
+        if offset or day >= now.day:
+            try:
+                return datetime(year, month, day)
+            except ValueError:
+                pass # e.g. the 31st in a 30-day month
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return None
+
+def _category(text: str) -> str:
+    words = set(re.findall(r"[a-z]+", text.lower()))
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        if words.intersection(keywords):
+            return category
+    return "General"
+
+def _clean_summary(text: str) -> str:
+    text = re.sub(r"\s{2,}", " ", text).strip(" ,.-")
+    text = re.sub(r"^(?:to|about|that)\s+", "", text, flags=re.I)
+    # Connectors left dangling once the date/time phrases are cut out
+    text = re.sub(r"\s+(?:on|at|by|for|from|this|next|and)$", "", text, flags=re.I).strip(" ,.-")
+    return text[:1].upper() + text[1:]
+
+class CommandParser:
+    """
+    Rule-based interpreter for common short voice commands
+    ("remind me to X at 5pm", "schedule ... tomorrow", "find notes about ...").
+    Runs in milliseconds; returns None when unsure so the caller can fall back to the LLM.
+    """
+
+    @staticmethod
+    def resolve_when(phrases: list[str], now: datetime) -> tuple[datetime | None, bool]:
+        """Resolve the extracted date/time phrases. Returns (datetime, has_clock_time)."""
+        if not phrases:
+            return None, False
+        phrase = " ".join(phrases).lower()
+        has_time = bool(TIME_PHRASE.search(phrase) or re.search(r"\bin\s+\S+\s+(?:minutes?|mins?|hours?)\b", phrase))
+        if not has_time:
+            for word, default in PART_OF_DAY.items():
+                if re.search(rf"\b{word}\b", phrase):
+                    phrase = re.sub(rf"\b{word}\b", "" if word != "tonight" else "today", phrase) + f" {default}"
+                    has_time = True
+                    break
+        # "at 5" / "5:30" / "at 12" with no am/pm: set the clock ourselves (dateparser reads a bare
+        # number as a month or day), assuming the next occurrence during waking hours
+        clock = None
+        bare_hour = re.search(r"\b(?:at|around)\s+(\d{1,2})(?::(\d{2}))?\b|\b(\d{1,2}):(\d{2})\b", phrase)
+        if bare_hour and not re.search(r"\d\s*(?:am|pm|a\.m\.|p\.m\.)", phrase):
+            hour = int(bare_hour.group(1) or bare_hour.group(3))
+            minute = int(bare_hour.group(2) or bare_hour.group(4) or 0)
+            if hour > 23 or minute > 59:
+                return None, False
+            clock = (hour + 12 if 1 <= hour <= 7 else hour, minute)
+            phrase = phrase[:bare_hour.start()] + phrase[bare_hour.end():]
+        # A day of the month alone ("the 1st"): dateparser takes the number for a month
+        base = now
+        ordinal = None if re.search(r"\b" + MONTHS + r"\b", phrase) else re.search(r"\b(?:the\s+)?(\d{1,2})(?:st|nd|rd|th)\b", phrase)
+        if ordinal:
+            base = _next_day_of_month(int(ordinal.group(1)), now)
+            if base is None:
+                return None, False
+            phrase = phrase[:ordinal.start()] + phrase[ordinal.end():]
+        # dateparser has no "next <weekday>"; with PREFER_DATES_FROM=future the bare weekday is the upcoming one
+        phrase = re.sub(r"\b(?:on|by|for|around|this|next)\b", " ", phrase).strip()
+        phrase = phrase.replace("noon", "12:00 pm").replace("midnight", "12:00 am")
+
+        parsed = base
+        if phrase:
+            parsed = dateparser.parse(phrase, languages=["en"], settings={
+                "RELATIVE_BASE": base,
+                "PREFER_DATES_FROM": "future",
+                "RETURN_AS_TIMEZONE_AWARE": False,
+            })
+            if parsed is None:
+                return None, False
+        if clock:
+            parsed = parsed.replace(hour=clock[0], minute=clock[1])
+        if has_time and not DATE_PHRASE.search(" ".join(phrases)) and parsed < now:
+            parsed += timedelta(days=1) # "at 9am" said in the evening means tomorrow
+        if not has_time:
+            parsed = parsed.replace(hour=0, minute=0, second=0, microsecond=0)
+        return parsed.replace(second=0, microsecond=0), has_time
+
+    @staticmethod
+    def parse(text: str, now: datetime = None) -> dict | None:
+        """
+        Returns ActionResponse-shaped data (type, summary, due_date, time, priority, category,
+        duration_minutes) for recognised commands, None otherwise.
+        """
+        now = now or datetime.now()
+        command = text.strip().rstrip(".!?").strip()
+        if not command or len(command.split()) > MAX_COMMAND_WORDS:
+            return None
+
+        for pattern in SEARCH_PATTERNS:
+            match = pattern.match(command)
+            query = match.group("query").strip(" ?.") if match else ""
+            if query and query.lower() not in EMPTY_QUERY:
+                return {"type": "SEARCH", "summary": query, "due_date": None, "time": None,
+                        "priority": 4, "category": "General", "duration_minutes": 60}
+
+        action_type, rest = None, None
+        for kind, patterns in (("TASK", TASK_PATTERNS), ("EVENT", EVENT_PATTERNS)):
+            for pattern in patterns:
+                match = pattern.match(command)
+                if match:
+                    action_type, rest = kind, match.group("rest")
+                    break
+            if action_type:
+                break
+        if not action_type:
+            return None
+
+        duration = 60
+        duration_match = DURATION_PHRASE.search(rest)
+        if duration_match:
+            duration = _minutes(duration_match.group("n"), duration_match.group("unit"))
+            rest = rest[:duration_match.start()] + rest[duration_match.end():]
+
+        phrases = [m.group(0) for m in DATE_PHRASE.finditer(rest)] + [m.group(0) for m in TIME_PHRASE.finditer(rest)]
+        leftover = DURATION_PHRASE.sub("", TIME_PHRASE.sub("", DATE_PHRASE.sub("", rest)))
+        if UNRESOLVED_DATE.search(leftover):
+            return None
+        when, has_time = CommandParser.resolve_when(phrases, now)
+        if phrases and when is None:
+            return None # Something date-like we can't resolve: let the LLM handle it
+        if action_type == "EVENT" and not has_time:
+            return None # Events need a start time; "schedule a review" is ambiguous
+
+        summary = leftover
+        for word in URGENT_WORDS:
+            summary = re.sub(rf"\b{word}\b", "", summary, flags=re.I)
+        summary = _clean_summary(summary)
+        if not summary:
+            return None
+
+        return {
+            "type": action_type,
+            "summary": summary,
+            "due_date": when.strftime("%Y-%m-%d") if when else None,
+            "time": when.strftime("%H:%M") if when and has_time else None,
+            "priority": 1 if any(re.search(rf"\b{w}\b", command, re.I) for w in URGENT_WORDS) else 4,
+            "category": _category(summary),
+            "duration_minutes": duration,
+        }
@@ -0,0 +1,109 @@
+import re
+from dataclasses import dataclass
+import numpy as np
+from app.config import settings
+from app.core.text_utils import split_sentences, estimate_tokens
+
+@dataclass
+class PackedContext:
+    chunks: list[str]
+    tokens_used: int
+    tokens_original: int
+
+    @property
+    def tokens_saved(self) -> int:
+        return max(0, self.tokens_original - self.tokens_used)
+
+    def as_text(self, separator: str = "\n---\n") -> str:
+        return separator.join(self.chunks)
+
+class ContextPacker:
+    """
+    Fits retrieved chunks into a token budget before they are pasted into a prompt.
+    1. Chunks are taken in score order (highest first).
+    2. If everything fits, chunks pass through untouched (no extra model call).
+    3. Otherwise each chunk is reduced to the sentences most similar to the query,
+       using one batched embedding call for the query and all sentences.
+    """
+
+    # Keep sentences scoring within this fraction of the chunk's best sentence
+    SENTENCE_KEEP_RATIO = 0.85
+
+    def __init__(self, budget_tokens: int | None = None):
+        self.budget_tokens = budget_tokens or settings.CONTEXT_TOKEN_BUDGET
+
+    async def pack(self, query: str, chunks: list[str], scores: list[float] | None = None, site: str = "rag") -> PackedContext:
+        chunks = [c for c in chunks if c and c.strip()]
+        if scores is not None:
+            ranked = sorted(zip(chunks, scores), key=lambda x: x[1], reverse=True)
+            chunks = [c for c, _ in ranked]
+
+        tokens_original = sum(estimate_tokens(c) for c in chunks)
+        if tokens_original <= self.budget_tokens:
+            return PackedContext(chunks=chunks, tokens_used=tokens_original, tokens_original=tokens_original)
+
+        chunk_sentences = [split_sentences(c) for c in chunks]
+        similarities = await self._sentence_similarities(query, chunk_sentences)
+
+        packed = []
+        remaining = self.budget_tokens
+        for sentences, sims in zip(chunk_sentences, similarities):
+            if remaining <= 0 or not sentences:
+                break
+            selected = self._select_sentences(sentences, sims, remaining)
+            if not selected:
+                continue
+            text = " ".join(sentences[i] for i in selected)
+            packed.append(text)
+            remaining -= estimate_tokens(text)
+
+        result = PackedContext(
+            chunks=packed,
+            tokens_used=self.budget_tokens - remaining,
+            tokens_original=tokens_original
+        )
+        print(f"[Packer] {site}: {result.tokens_used}/{tokens_original} tokens kept, saved {result.tokens_saved}")
+        return result
+
+    def _select_sentences(self, sentences: list[str], sims: np.ndarray, budget: int) -> list[int]:
+        order = np.argsort(-sims)
+        floor = sims[order[0]] * self.SENTENCE_KEEP_RATIO if sims[order[0]] > 0 else sims[order[0]]
+        selected = []
+        used = 0
+        for rank, idx in enumerate(order):
+            if rank > 0 and sims[idx] < floor:
+                break
+            cost = estimate_tokens(sentences[idx])
+            if used + cost > budget:
+                continue
+            selected.append(int(idx))
+            used += cost
+        # Restore reading order inside the chunk
+        return sorted(selected)
+
+    async def _sentence_similarities(self, query: str, chunk_sentences: list[list[str]]) -> list[np.ndarray]:
+        flat = [s for sentences in chunk_sentences for s in sentences]
+        try:
+            from app.services.vector_service import VectorService
+            vectors = np.array(await VectorService.embed_texts([query] + flat, call_site="embed.packer"), dtype=np.float32)
+            norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+            vectors = vectors / np.where(norms == 0, 1, norms)
+            flat_sims = vectors[1:] @ vectors[0]
+        except Exception as e:
+            print(f"[Packer] Embedding failed, using lexical overlap: {e}")
+            flat_sims = np.array([self._lexical_similarity(query, s) for s in flat], dtype=np.float32)
+
+        result = []
+        offset = 0
+        for sentences in chunk_sentences:
+            result.append(flat_sims[offset:offset + len(sentences)])
+            offset += len(sentences)
+        return result
+
+    @staticmethod
+    def _lexical_similarity(query: str, sentence: str) -> float:
+        q = set(re.findall(r"\w+", query.lower()))
+        s = set(re.findall(r"\w+", sentence.lower()))
+        if not q or not s:
+            return 0.0
+        return len(q & s) / len(q | s)
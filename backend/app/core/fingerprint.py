@@ -0,0 +1,19 @@
+import hashlib
+import re
+from datetime import date, datetime
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_SPACES = re.compile(r"\s+")
+
+def normalize_text(text: str) -> str:
+    """Case, punctuation and whitespace-insensitive form of an extracted item."""
+    return _SPACES.sub(" ", _PUNCTUATION.sub(" ", text.lower())).strip()
+
+def item_fingerprint(kind: str, text: str, origin_note_id: int | None, when: date | datetime | None) -> str:
+    """
+    Stable identity of an AI-extracted task/event: normalized text + origin note + date.
+    Re-extracting the same item from the same note yields the same fingerprint.
+    """
+    day = when.date() if isinstance(when, datetime) else when
+    key = "|".join([kind, normalize_text(text), str(origin_note_id or ""), day.isoformat() if day else ""])
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
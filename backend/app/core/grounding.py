@@ -0,0 +1,105 @@
+import re
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import numpy as np
+from app.config import settings
+from app.core.text_utils import split_sentences
+
+NUMBER_WORDS = {
+    "zero": "0", "one": "1", "two": "2", "three": "3", "four": "4", "five": "5", "six": "6",
+    "seven": "7", "eight": "8", "nine": "9", "ten": "10", "eleven": "11", "twelve": "12",
+    "twenty": "20", "thirty": "30", "fifty": "50", "hundred": "100", "thousand": "1000",
+}
+NEGATIONS = {"not", "no", "never", "none", "nor", "without", "cannot"}
+WORD = re.compile(r"\d+(?:[.,:]\d+)*|[a-z]+(?:'[a-z]+)?")
+
+def claim_markers(sentence: str) -> tuple[set[str], bool]:
+    """Numbers (words normalized to digits) and whether the sentence is negated."""
+    words = WORD.findall(sentence.lower())
+    numbers = {NUMBER_WORDS.get(w, w) for w in words if w[0].isdigit() or w in NUMBER_WORDS}
+    negated = any(w in NEGATIONS or w.endswith("n't") for w in words)
+    return numbers, negated
+
+@dataclass
+class GroundingReport:
+    sentences: list[str]
+    scores: list[float] # best cosine similarity to any context sentence
+    unsupported: list[str] = field(default_factory=list)
+    checked: bool = True # False when nothing could be scored (embeddings unavailable, or no checkable sentence)
+
+    @property
+    def grounded(self) -> bool:
+        return self.checked and not self.unsupported
+
+class GroundingScorer:
+    """
+    Fast grounding pre-check for RAG answers, run before the LLM auditor.
+    Each answer sentence is compared with every context sentence (one batched embedding call,
+    one matrix product over unit vectors); a sentence whose best cosine similarity is below
+    GROUNDING_MIN_SIMILARITY is flagged unsupported. Embeddings barely move when only a number
+    or a "not" changes, so a sentence also needs its numbers and polarity in its best match.
+    Context sentence vectors are memoized, so pinned chat contexts only pay for the answer's
+    sentences on later turns.
+    """
+
+    # Fillers like "Sure!" carry no claim worth checking (short sentences with a number or negation do)
+    MIN_WORDS = 4
+    CACHE_SIZE = 4096
+    _cache: "OrderedDict[str, np.ndarray]" = OrderedDict()
+
+    def __init__(self, min_similarity: float | None = None):
+        self.min_similarity = min_similarity if min_similarity is not None else settings.GROUNDING_MIN_SIMILARITY
+
+    async def score(self, answer: str, context_chunks: list[str]) -> GroundingReport:
+        sentences = [s for s in split_sentences(answer) if self._checkable(s)]
+        context = [s for chunk in context_chunks for s in split_sentences(chunk)]
+        if not sentences:
+            # Nothing checkable is not evidence of grounding: the auditor sees the whole answer
+            return GroundingReport(sentences=[], scores=[], checked=False)
+        if not context:
+            return GroundingReport(sentences=sentences, scores=[0.0] * len(sentences), unsupported=sentences)
+
+        try:
+            vectors = await self._embed(sentences + context)
+        except Exception as e:
+            print(f"[Grounding] Embedding failed, deferring to the auditor: {e}")
+            return GroundingReport(sentences=sentences, scores=[], unsupported=sentences, checked=False)
+
+        answer_vectors, context_vectors = vectors[:len(sentences)], vectors[len(sentences):]
+        similarity = answer_vectors @ context_vectors.T
+        best, best_match = similarity.max(axis=1), similarity.argmax(axis=1)
+        unsupported = [
+            s for s, score, match in zip(sentences, best, best_match)
+            if score < self.min_similarity or not self._markers_agree(s, context[match])
+        ]
+        print(f"[Grounding] {len(sentences) - len(unsupported)}/{len(sentences)} sentences supported (min sim {float(best.min()):.2f})")
+        return GroundingReport(sentences=sentences, scores=[float(s) for s in best], unsupported=unsupported)
+
+    def _checkable(self, sentence: str) -> bool:
+        if len(sentence.split()) >= self.MIN_WORDS:
+            return True
+        numbers, negated = claim_markers(sentence)
+        return bool(numbers) or negated
+
+    @staticmethod
+    def _markers_agree(sentence: str, context_sentence: str) -> bool:
+        numbers, negated = claim_markers(sentence)
+        context_numbers, context_negated = claim_markers(context_sentence)
+        return numbers <= context_numbers and negated == context_negated
+
+    async def _embed(self, texts: list[str]) -> np.ndarray:
+        """Unit vectors for texts; only texts not in the memo are embedded (one call)."""
+        missing = list(dict.fromkeys(t for t in texts if t not in self._cache))
+        if missing:
+            from app.services.vector_service import VectorService
+            raw = np.asarray(await VectorService.embed_texts(missing, call_site="embed.grounding"), dtype=np.float32)
+            norms = np.linalg.norm(raw, axis=1, keepdims=True)
+            for text, vector in zip(missing, raw / np.maximum(norms, 1e-12)):
+                self._cache[text] = vector
+        vectors = []
+        for text in texts:
+            self._cache.move_to_end(text)
+            vectors.append(self._cache[text])
+        while len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return np.stack(vectors)
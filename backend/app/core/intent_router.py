@@ -0,0 +1,128 @@
+import asyncio
+import time
+import numpy as np
+from app.config import settings
+from app.core.llm import NeuroVaultLLM
+
+# Labeled utterances, embedded once with EMBEDDING_MODEL. Add phrasings here to teach the router.
+INTENT_EXAMPLES = {
+    "SEARCH": [
+        "what did I write about the project budget",
+        "do I have anything on machine learning",
+        "when is my dentist appointment",
+        "what was the name of that restaurant",
+        "look for my notes from the conference",
+        "what do I know about Sarah's birthday",
+        "pull up the recipe I saved",
+        "which meetings do I have this week",
+        "what were the action items from the last standup",
+        "where did I put the wifi password",
+        "tell me what I noted about the car insurance",
+        "did I save anything about flights to Tokyo",
+    ],
+    "ACTION": [
+        "I need to call the plumber on Monday",
+        "don't let me forget to water the plants",
+        "put the quarterly review on my calendar for Thursday",
+        "buy batteries and light bulbs",
+        "pick up the dry cleaning after work",
+        "set a meeting with Alex next week",
+        "I have to submit the report by Friday",
+        "make sure I email the landlord tonight",
+        "plan a call with the design team tomorrow morning",
+        "renew my passport",
+        "cancel the gym membership this month",
+        "need to book a table for dinner on Saturday",
+    ],
+    "SAVE": [
+        "the meeting went well and the client liked the new design",
+        "idea for the app: let users share playlists with friends",
+        "today I learned that octopuses have three hearts",
+        "the wifi password at the office is on the fridge",
+        "feeling tired today, didn't sleep much",
+        "grandma's soup uses two carrots, one onion and a lot of dill",
+        "quote I liked: simplicity is the ultimate sophistication",
+        "the conference talk argued that small models beat large ones on latency",
+        "Sarah's birthday is in March and she likes orchids",
+        "thoughts on the book so far: slow start but great characters",
+        "parking spot is on level three, row B",
+        "we decided to use Postgres for the new service",
+    ],
+}
+
+class IntentRouter:
+    """
+    Nearest-neighbour intent classifier over embedded example utterances.
+    The example matrix is built once; classifying is one matrix-vector product over
+    unit vectors (cosine), then a similarity-weighted vote among the top k.
+    Low-confidence results return None so the caller can escalate to the LLM.
+    """
+
+    def __init__(self, examples: dict[str, list[str]] | None = None, k: int | None = None,
+                 min_confidence: float | None = None, min_similarity: float | None = None):
+        self.examples = examples or INTENT_EXAMPLES
+        self.k = k or settings.INTENT_ROUTER_K
+        self.min_confidence = min_confidence if min_confidence is not None else settings.INTENT_ROUTER_MIN_CONFIDENCE
+        self.min_similarity = min_similarity if min_similarity is not None else settings.INTENT_ROUTER_MIN_SIMILARITY
+        self.matrix: np.ndarray | None = None
+        self.labels: np.ndarray | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.matrix is not None
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    async def warm(self) -> bool:
+        """Embed the examples (one batched call). Safe to call repeatedly; False if the embedder is down."""
+        if self.ready:
+            return True
+        async with self._lock:
+            if self.ready:
+                return True
+            labels, texts = [], []
+            for label, utterances in self.examples.items():
+                labels.extend([label] * len(utterances))
+                texts.extend(utterances)
+            try:
+                response = await NeuroVaultLLM.embed_batch(model=settings.EMBEDDING_MODEL, inputs=texts, call_site="embed.router")
+                vectors = response["embeddings"]
+            except Exception as e:
+                print(f"[IntentRouter] Could not embed examples: {e}")
+                return False
+            self.matrix = self._normalize(np.asarray(vectors, dtype=np.float32))
+            self.labels = np.asarray(labels)
+            print(f"[IntentRouter] Ready with {len(texts)} examples")
+            return True
+
+    def classify(self, vector: list[float]) -> tuple[str | None, float]:
+        """Returns (label, confidence); label is None when below the confidence/similarity thresholds."""
+        if not self.ready:
+            return None, 0.0
+        started = time.perf_counter()
+        query = self._normalize(np.asarray(vector, dtype=np.float32))
+        sims = self.matrix @ query
+        k = min(self.k, len(sims))
+        top = np.argpartition(-sims, k - 1)[:k]
+        weights = np.maximum(sims[top], 0.0)
+        total = float(weights.sum())
+        if total <= 0:
+            return None, 0.0
+
+        votes = {}
+        for label, weight in zip(self.labels[top], weights):
+            votes[label] = votes.get(label, 0.0) + float(weight)
+        label = max(votes, key=votes.get)
+        confidence = votes[label] / total
+        best = float(sims[top].max())
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        print(f"[IntentRouter] {label} conf={confidence:.2f} best_sim={best:.2f} ({elapsed_ms:.2f} ms)")
+        if confidence < self.min_confidence or best < self.min_similarity:
+            return None, confidence
+        return str(label), confidence
+
+intent_router = IntentRouter()
@@ -0,0 +1,81 @@
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
+
+T = TypeVar("T")
+
+@dataclass
+class Interval(Generic[T]):
+    start: Any # any ordered type (datetime, int...)
+    end: Any # exclusive
+    data: T = None
+
+    def overlaps(self, start, end) -> bool:
+        return self.start < end and self.end > start
+
+class IntervalTree(Generic[T]):
+    """
+    Static centered interval tree for batch overlap queries (half-open intervals).
+    Built once; each query is O(log n + matches), so checking n new events
+    against each other and the stored calendar costs O(n log n) instead of O(n^2).
+    """
+
+    def __init__(self, intervals: list[Interval[T]]):
+        # Empty intervals overlap nothing (half-open), and dropping them guarantees every node holds one
+        intervals = [i for i in intervals if i.end > i.start]
+        self.size = len(intervals)
+        self._root = self._build(intervals)
+
+    @classmethod
+    def _build(cls, intervals: list[Interval[T]]):
+        if not intervals:
+            return None
+        # Center on the median start: that interval contains the center, so each level makes progress
+        center = sorted(i.start for i in intervals)[len(intervals) // 2]
+        left, right, here = [], [], []
+        for interval in intervals:
+            if interval.end <= center:
+                left.append(interval)
+            elif interval.start > center:
+                right.append(interval)
+            else:
+                here.append(interval)
+        return (
+            center,
+            sorted(here, key=lambda i: i.start), # ascending start
+            sorted(here, key=lambda i: i.end, reverse=True), # descending end
+            cls._build(left),
+            cls._build(right),
+        )
+
+    def overlapping(self, start, end) -> list[Interval[T]]:
+        """All intervals with interval.start < end and interval.end > start."""
+        found = []
+        node = self._root
+        stack = [node] if node else []
+        while stack:
+            center, by_start, by_end, left, right = stack.pop()
+            if end <= center:
+                # Query lies left of center: stored intervals overlap iff they start before `end`
+                for interval in by_start:
+                    if interval.start >= end:
+                        break
+                    if interval.end > start:
+                        found.append(interval)
+                if left:
+                    stack.append(left)
+            elif start > center:
+                # Query lies right of center: stored intervals overlap iff they end after `start`
+                for interval in by_end:
+                    if interval.end <= start:
+                        break
+                    if interval.start < end:
+                        found.append(interval)
+                if right:
+                    stack.append(right)
+            else:
+                found.extend(i for i in by_start if i.overlaps(start, end))
+                if left:
+                    stack.append(left)
+                if right:
+                    stack.append(right)
+        return found
@@ -1,15 +1,97 @@
-import ollama
-from ollama import AsyncClient
+import asyncio
+import time
 from app.config import settings
+from app.core.providers import get_provider
+from app.core.telemetry import telemetry, LLMCallRecord
+from app.core.resilience import (
+    llm_breaker, policy_for, call_with_policy, guard_stream, ClosingStream,
+    LLMUnavailableError, LLMDeadlineExceeded
+)
+
+# Client-side LLM slots; time spent waiting here is reported as queue wait
+_llm_slots = asyncio.Semaphore(settings.LLM_MAX_CONCURRENCY)
 
 class NeuroVaultLLM:
     """
     Centralized LLM Wrapper.
-    Currently defaults to Ollama, but designed to bridge to LiteLLM or others.
+    Dispatches to the provider selected by LLM_PROVIDER (Ollama or any OpenAI-compatible server).
+    All providers return Ollama-shaped responses.
+    Every call is recorded in `app.core.telemetry` under its `call_site` label and runs under
+    that call site's policy (`app.core.resilience`): deadline, retries with backoff, optional
+    hedging, and a shared circuit breaker that fails fast with LLMUnavailableError.
     """
-    
+
+    @staticmethod
+    async def _instrumented(op: str, model: str, call_site: str, invoke, stream: bool = False):
+        rec = LLMCallRecord(op=op, model=model, call_site=call_site)
+        policy = policy_for(call_site)
+        loop = asyncio.get_running_loop()
+        deadline_at = loop.time() + policy.deadline
+        started = time.perf_counter()
+
+        try:
+            # Fail fast instead of queueing behind a dead server
+            if llm_breaker.is_open:
+                raise LLMUnavailableError("LLM circuit open: model server unhealthy")
+            try:
+                await asyncio.wait_for(_llm_slots.acquire(), policy.deadline)
+            except asyncio.TimeoutError:
+                raise LLMDeadlineExceeded(f"No LLM slot within {policy.deadline:.1f}s")
+        except LLMUnavailableError as e:
+            rec.status = e.telemetry_status
+            rec.total = time.perf_counter() - started
+            telemetry.record(rec)
+            raise
+        rec.queue_wait = time.perf_counter() - started
+
+        handed_off = False # streams keep the slot until observe_stream finishes
+        try:
+            if stream:
+                probe = llm_breaker.check()
+                try:
+                    raw = await invoke()
+                except BaseException:
+                    if probe and llm_breaker.probe_pending:
+                        llm_breaker.record_failure() # the probe never got a stream
+                    raise
+                response = guard_stream(raw, policy, deadline_at, probe=probe)
+                handed_off = True
+
+                async def closed_unread():
+                    if probe and llm_breaker.probe_pending:
+                        llm_breaker.record_failure()
+                    aclose = getattr(raw, "aclose", None)
+                    if aclose:
+                        await aclose()
+                    rec.status = "cancelled"
+                    rec.total = time.perf_counter() - started
+                    telemetry.record(rec)
+                    _llm_slots.release()
+
+                return ClosingStream(
+                    telemetry.observe_stream(response, rec, started, on_finish=_llm_slots.release),
+                    closed_unread
+                )
+            # Hedged duplicates take their own slot (skipped when none is free)
+            response = await call_with_policy(invoke, policy, deadline_at, slots=_llm_slots)
+        except BaseException as e:
+            # BaseException: a cancelled call (client hung up, speculative task) must not keep its slot
+            rec.status = "cancelled" if isinstance(e, asyncio.CancelledError) else getattr(e, "telemetry_status", "error")
+            rec.total = time.perf_counter() - started
+            telemetry.record(rec)
+            raise
+        finally:
+            if not handed_off:
+                _llm_slots.release()
+
+        rec.total = time.perf_counter() - started
+        rec.ttft = rec.total - rec.queue_wait # non-streaming: whole response is the first byte
+        telemetry.apply_response_stats(rec, response)
+        telemetry.record(rec)
+        return response
+
     @staticmethod
-    async def chat(model: str, messages: list, format: str | dict = None, stream: bool = False, options: dict = None):
+    async def chat(model: str, messages: list, format: str | dict = None, stream: bool = False, options: dict = None, call_site: str = "unknown"):
         """
         Standard Chat Completion.
         Supports:
@@ -17,52 +99,64 @@ class NeuroVaultLLM:
         - Format='json' OR Pydantic Schema / JSON Schema (Structured Outputs)
         - Images in messages
         """
-        if settings.LLM_PROVIDER == "ollama":
-            # Use AsyncClient for non-blocking IO
-            client = AsyncClient(host=settings.LLM_API_BASE)
-            try:
-                response = await client.chat(
-                    model=model, 
-                    messages=messages, 
-                    format=format, 
-                    stream=stream, 
+        try:
+            return await NeuroVaultLLM._instrumented(
+                "chat", model, call_site,
+                lambda: get_provider().chat(
+                    model=model,
+                    messages=messages,
+                    format=format,
+                    stream=stream,
                     options=options
-                )
-                return response
-            except Exception as e:
-                print(f"LLM Chat Failed ({model}): {e}")
-                raise e
-        else:
-            raise NotImplementedError(f"Provider {settings.LLM_PROVIDER} not implemented yet.")
-    
+                ),
+                stream=stream
+            )
+        except Exception as e:
+            print(f"LLM Chat Failed ({model}): {e}")
+            raise e
+
     @staticmethod
-    async def generate(model: str, prompt: str, stream: bool = False):
+    async def generate(model: str, prompt: str, stream: bool = False, call_site: str = "unknown"):
         """
         Text Completion (Legacy/Simple).
         """
-        if settings.LLM_PROVIDER == "ollama":
-            client = AsyncClient(host=settings.LLM_API_BASE)
-            try:
-                response = await client.generate(model=model, prompt=prompt, stream=stream)
-                return response
-            except Exception as e:
-                print(f"LLM Generate Failed ({model}): {e}")
-                raise e
-        else:
-             raise NotImplementedError(f"Provider {settings.LLM_PROVIDER} not implemented yet.")
+        try:
+            return await NeuroVaultLLM._instrumented(
+                "generate", model, call_site,
+                lambda: get_provider().generate(model=model, prompt=prompt, stream=stream),
+                stream=stream
+            )
+        except Exception as e:
+            print(f"LLM Generate Failed ({model}): {e}")
+            raise e
 
     @staticmethod
-    async def embed(model: str, input_text: str):
+    async def embed(model: str, input_text: str, call_site: str = "embed"):
         """
         Embedding Generation.
         """
-        if settings.LLM_PROVIDER == "ollama":
-            client = AsyncClient(host=settings.LLM_API_BASE)
-            try:
-                response = await client.embeddings(model=model, prompt=input_text)
-                return response
-            except Exception as e:
-                print(f"LLM Embed Failed ({model}): {e}")
-                raise e
-        else:
-             raise NotImplementedError(f"Provider {settings.LLM_PROVIDER} not implemented yet.")
+        try:
+            return await NeuroVaultLLM._instrumented(
+                "embed", model, call_site,
+                lambda: get_provider().embed(model=model, input_text=input_text)
+            )
+        except Exception as e:
+            print(f"LLM Embed Failed ({model}): {e}")
+            raise e
+
+    @staticmethod
+    async def embed_batch(model: str, inputs: list[str], call_site: str = "embed"):
+        """
+        Batched Embedding Generation (single request).
+        Returns {'embeddings': [...]} in input order.
+        """
+        if not inputs:
+            return {"embeddings": []}
+        try:
+            return await NeuroVaultLLM._instrumented(
+                "embed_batch", model, call_site,
+                lambda: get_provider().embed_batch(model=model, inputs=inputs)
+            )
+        except Exception as e:
+            print(f"LLM Embed Batch Failed ({model}): {e}")
+            raise e
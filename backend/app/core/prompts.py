@@ -1,20 +1,37 @@
 
 class Prompts:
     # --- Summary Service ---
-    SUMMARY_GENERATION_TEMPLATE = """
+    SUMMARY_UPDATE_TEMPLATE = """
         You are a personal executive assistant.
         Current Date: {current_time}
-        Analyze the following notes to provide a "Rolling Summary", a "Priority Task List", and a "Schedule of Events".
+        Update the "Rolling Summary" with the new notes, and build a "Priority Task List" and a "Schedule of Events" from the NEW notes only.
         
         RULES:
         1. Extract action items (TODOs, Goals, Plans) into the 'tasks' list.
         2. Extract distinct events with specific times or dates into the 'events' list.
-        3. Summarize context in 'summary'.
+        3. 'summary' is the complete updated summary: keep what still matters from the previous summary and fold in the new notes.
+        4. Set 'source_note' on each task and event to the # of the note it came from.
         
-        Recent Notes:
+        Previous Summary:
+        {previous_summary}
+        
+        New Notes:
         {notes_text}
         """
 
+    SUMMARY_MERGE_TEMPLATE = """
+        Current Date: {current_time}
+        Merge the previous rolling summary with the summaries of newer notes into one updated rolling summary.
+        Keep what still matters from the previous summary, prefer newer information when they disagree, and stay concise.
+        Return ONLY the summary content.
+        
+        Previous Summary:
+        {previous_summary}
+        
+        Newer Notes (summarized in batches):
+        {partial_summaries}
+        """
+
     SUMMARY_SINGLE_NOTE_TEMPLATE = """
         Summarize the following text in 1-2 concise sentences. Capture the core idea.
         Return ONLY the summary content. Do NOT include any introductory phrases like "Here is a summary".
@@ -23,17 +40,24 @@ class Prompts:
         {text}
         """
 
+    SUMMARY_REDUCE_TEMPLATE = """
+        The following are summaries of consecutive sections of one document, in order.
+        Combine them into {length}. Capture the core ideas and the document's overall arc.
+        Return ONLY the summary content. Do NOT include any introductory phrases like "Here is a summary".
+        
+        Section Summaries:
+        {summaries}
+        """
+
     # --- Auditor Agent ---
     AUDITOR_SYSTEM = """You are The Auditor, a strict fact-checking AI. 
             Your goal is to verify if a generated answer is supported by the source context.
             Fill the schema: valid (bool), reason (str), correction (str/null).
             """
 
+    # Context goes in the system message (stable prefix); only the volatile parts live here
     AUDITOR_VERIFY_TEMPLATE = """
         Current Date: {current_time}
-        Context:
-        {context}
-        
         Question: {question}
         Generated Answer: {answer}
         
@@ -42,6 +66,20 @@ class Prompts:
         If it contradicts the context, it is INVALID.
         """
 
+    # Used when the grounding pre-check (app/core/grounding.py) already matched most of the answer to the context
+    AUDITOR_CLAIMS_TEMPLATE = """
+        Current Date: {current_time}
+        Question: {question}
+        Generated Answer: {answer}
+        
+        Only these sentences of the answer could not be matched to the context; the rest already were:
+        {claims}
+        
+        Verify: Are these sentences supported by the Context? 
+        If they contain information NOT in the context, the answer is INVALID (Hallucination).
+        If they contradict the context, it is INVALID.
+        """
+
     # --- Messenger Agent ---
     MESSENGER_SYSTEM = """You are The Messenger, a helpful and fast AI assistant. 
             You answer questions based strictly on the provided context. 
@@ -49,7 +87,7 @@ class Prompts:
             Keep answers concise and friendly."""
 
     MESSENGER_RAG_TEMPLATE = """
-        Use the following pieces of context to answer the question at the end. 
+        Use the context above to answer the question. 
         If you don't know the answer, just say that you don't know, don't try to make up an answer.
         
         Question: {query}
@@ -60,73 +98,42 @@ class Prompts:
     IMAGE_DESCRIPTION_USER = "Analyze this image in detail. Describe visible text, scene details, colors, and mood. Provide tags for type and key elements."
 
     # --- Voice Service ---
-    # --- Two-Stage Pipeline Prompts ---
-    
-    ROUTER_PROMPT = """
-    You are a semantic router for a personal productivity system. Your job is to classify the user's input into one of two categories:
+    # --- Command Interpretation (single call; short commands are usually parsed by app/core/command_parser.py) ---
 
-    1. "ACTION": The user is explicitly commanding the system to do something.
-       - Triggers: "Remind me to...", "Schedule...", "Buy...", "I need to...", "Search for..."
-       - Condition: Must contain an imperative verb directing the system or the user's future self.
+    VOICE_COMMAND_PROMPT = """
+    You interpret input for a personal productivity system. Current Date/Time: {current_time}
 
-    2. "SAVE": The user is storing information, dumping thoughts, or pasting text.
-       - Triggers: Pasted articles, random thoughts, meeting notes, recipes, text with dates that are descriptive.
-       - Condition: If the text describes a plan but doesn't explicitly ASK to schedule it, it is SAVE.
+    1. Decide the "intent":
+       - "ACTION": The user is explicitly commanding the system to do something.
+         Triggers: "Remind me to...", "Schedule...", "Buy...", "I need to...", "Search for..."
+       - "SAVE": The user is storing information, dumping thoughts, or pasting text.
+         If the text describes a plan but doesn't explicitly ASK to schedule it, it is SAVE.
+       **CRITICAL RULE:** If you are unsure, choose "SAVE". Do not hallucinate tasks from informational text.
 
-    **CRITICAL RULE:** If you are unsure, default to "SAVE". Do not hallucinate tasks from informational text.
+    2. If ACTION, fill the action fields:
+       - "type": "EVENT" for a calendar event with a start time, "TASK" for a checkbox item (deadline or no time), "SEARCH" for a query (e.g. "Find notes about...").
+       - "summary": clean, concise title or query.
+       - "due_date": YYYY-MM-DD or null. "time": HH:MM (24hr) or null.
+       - "priority": 1-4 (1 is highest, default 4). "category": "Work" | "Personal" | "Health" | "Finance" | "General".
+       - "duration_minutes": default 60 if not specified.
 
-    **OUTPUT FORMAT:**
-    Return ONLY a raw JSON object. No markdown.
-    {{
-      "category": "ACTION" | "SAVE",
-      "reasoning": "Brief explanation why",
-      "confidence": 0.0 to 1.0
-    }}
-
-    ### USER INPUT
-    {text}
-    """
-
-    ACTION_PARSER_PROMPT = """
-    You are an extraction engine. The user has provided an ACTIONABLE command. 
-    Current Date/Time: {current_time}
-
-    Extract the following fields into JSON.
-    - If it is a calendar event (has specific start/end time), set type to "EVENT".
-    - If it is a checkbox item (has deadline or no time), set type to "TASK".
-    - If it is a search query (e.g., "Find notes about..."), set type to "SEARCH".
-
-    **OUTPUT FORMAT:**
-    Return ONLY a raw JSON object.
-    {{
-      "type": "TASK" | "EVENT" | "SEARCH",
-      "summary": "Clean, concise title or query",
-      "due_date": "ISO 8601 format (YYYY-MM-DD) or null",
-      "time": "HH:MM (24hr) or null",
-      "priority": 1-4 (1 is highest, default 4),
-      "category": "Work" | "Personal" | "Health" | "Finance" | "General",
-      "duration_minutes": 60 // Default 60 if not specified
-    }}
-
-    ### USER INPUT
-    {text}
-    """
-
-    NOTE_PROCESSOR_PROMPT = """
-    You are a knowledge graph generator. The user has dumped text for storage.
-    Your goal is to generate metadata to make this text searchable later.
-
-    1. Generate a "Title" that summarizes the content.
-    2. Generate "Tags" (lowercase, kebab-case).
-    3. If the text mentions dates/people, extract them as "Linked Entities".
+    3. If SAVE, fill the note fields:
+       - "tags": lowercase, kebab-case tags that make the text searchable later.
+       - "mentioned_entities": people, dates and projects mentioned.
 
     **OUTPUT FORMAT:**
-    Return ONLY a raw JSON object.
+    Return ONLY a raw JSON object. No markdown.
     {{
-      "generated_title": "String",
+      "intent": "ACTION" | "SAVE",
+      "type": "TASK" | "EVENT" | "SEARCH" | null,
+      "summary": "String or null",
+      "due_date": "YYYY-MM-DD or null",
+      "time": "HH:MM or null",
+      "priority": 4,
+      "category": "General",
+      "duration_minutes": 60,
       "tags": ["tag1", "tag2"],
-      "mentioned_entities": ["Person Name", "Date", "Project Name"],
-      "is_voice_transcript": true | false
+      "mentioned_entities": ["Person Name", "Project Name"]
     }}
 
     ### USER INPUT
@@ -140,24 +147,22 @@ class Prompts:
         Give a concise, natural language answer. Start directly with the answer.
         """
 
+    # Voice PDF prompts are split into a stable system part (instructions + document context)
+    # and a volatile user part (the question) so the model server can reuse the prefix cache.
     VOICE_PDF_RAG_TEMPLATE = """
         You are a helpful assistant analyzing a document.
-        Context from document:
-        {context}
-        
-        User Question: "{text}"
-        
         Answer efficiently and naturally in 1-2 sentences. 
         Do not say "Based on the document". Just answer.
         If the answer isn't in the context, say "I don't see that in the document."
+        Context from document:
+        {context}
         """
 
     VOICE_STREAM_SYSTEM_TEMPLATE = """
         You are a helpful assistant analyzing a document.
+        Answer conversationally in 1-2 sentences.
         Context from the document:
         {context}
-        
-        User Question: {text}
-        
-        Answer conversationally in 1-2 sentences.
         """
+
+    VOICE_QUESTION_TEMPLATE = 'User Question: "{text}"'
@@ -0,0 +1,226 @@
+import base64
+import json
+import mimetypes
+import os
+from ollama import AsyncClient
+import httpx
+from app.config import settings
+
+class LLMProvider:
+    """
+    Interface for model servers behind NeuroVaultLLM.
+    Every provider returns Ollama-shaped responses so callers stay provider-agnostic:
+    - chat -> {'message': {'role', 'content'}, 'done', ...}
+    - generate -> {'response': str, 'done', ...}
+    - embed -> {'embedding': [float]}
+    - embed_batch -> {'embeddings': [[float]]}
+    Streaming variants return an async iterator of chunks with the same keys.
+    """
+
+    async def chat(self, model: str, messages: list, format: str | dict = None, stream: bool = False, options: dict = None):
+        raise NotImplementedError
+
+    async def generate(self, model: str, prompt: str, stream: bool = False, options: dict = None):
+        raise NotImplementedError
+
+    async def embed(self, model: str, input_text: str) -> dict:
+        raise NotImplementedError
+
+    async def embed_batch(self, model: str, inputs: list[str]) -> dict:
+        raise NotImplementedError
+
+class OllamaProvider(LLMProvider):
+    """Native Ollama API (default)."""
+
+    def __init__(self, host: str, timeout: float | None = None):
+        self.host = host
+        self.timeout = timeout
+
+    def _client(self) -> AsyncClient:
+        return AsyncClient(host=self.host, timeout=self.timeout)
+
+    async def chat(self, model: str, messages: list, format: str | dict = None, stream: bool = False, options: dict = None):
+        return await self._client().chat(model=model, messages=messages, format=format, stream=stream, options=options)
+
+    async def generate(self, model: str, prompt: str, stream: bool = False, options: dict = None):
+        return await self._client().generate(model=model, prompt=prompt, stream=stream, options=options)
+
+    async def embed(self, model: str, input_text: str) -> dict:
+        return await self._client().embeddings(model=model, prompt=input_text)
+
+    async def embed_batch(self, model: str, inputs: list[str]) -> dict:
+        # /api/embed accepts a list and runs it as a single batch on the server
+        response = await self._client().embed(model=model, input=inputs)
+        return {"embeddings": list(response["embeddings"])}
+
+class OpenAICompatibleProvider(LLMProvider):
+    """
+    OpenAI-compatible HTTP API (llama.cpp server, vLLM, LiteLLM proxy...).
+    Continuous-batching servers merge concurrent requests, so callers can fan out freely.
+    `base_url` must include the version prefix, e.g. http://localhost:8080/v1
+    """
+
+    # Ollama option names -> OpenAI request fields
+    OPTION_MAP = {
+        "temperature": "temperature",
+        "top_p": "top_p",
+        "seed": "seed",
+        "stop": "stop",
+        "num_predict": "max_tokens",
+        "presence_penalty": "presence_penalty",
+        "frequency_penalty": "frequency_penalty",
+    }
+
+    def __init__(self, base_url: str, api_key: str | None = None, timeout: float = 120.0, transport: httpx.AsyncBaseTransport | None = None):
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self._client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            headers=headers,
+            timeout=timeout,
+            transport=transport,
+        )
+
+    # --- Request Mapping ---
+
+    @staticmethod
+    def _response_format(format: str | dict | None) -> dict | None:
+        if not format:
+            return None
+        if format == "json":
+            return {"type": "json_object"}
+        if isinstance(format, dict):
+            return {
+                "type": "json_schema",
+                "json_schema": {"name": format.get("title", "response"), "schema": format, "strict": True},
+            }
+        raise ValueError(f"Unsupported format: {format}")
+
+    @staticmethod
+    def _image_part(image) -> dict:
+        # Ollama accepts file paths, raw bytes or base64 strings
+        mime = "image/png"
+        if isinstance(image, bytes):
+            data = base64.b64encode(image).decode("utf-8")
+        elif isinstance(image, str) and os.path.exists(image):
+            mime = mimetypes.guess_type(image)[0] or mime
+            with open(image, "rb") as f:
+                data = base64.b64encode(f.read()).decode("utf-8")
+        else:
+            data = image
+        return {"type": "image_url", "image_url": {"url": f"data:{mime};base64,{data}"}}
+
+    @classmethod
+    def _convert_messages(cls, messages: list) -> list:
+        converted = []
+        for m in messages:
+            images = m.get("images")
+            if not images:
+                converted.append({"role": m["role"], "content": m.get("content", "")})
+                continue
+            parts = [{"type": "text", "text": m.get("content", "")}]
+            parts.extend(cls._image_part(img) for img in images)
+            converted.append({"role": m["role"], "content": parts})
+        return converted
+
+    def _build_payload(self, model: str, messages: list, format, stream: bool, options: dict | None) -> dict:
+        payload = {"model": model, "messages": self._convert_messages(messages), "stream": stream}
+        response_format = self._response_format(format)
+        if response_format:
+            payload["response_format"] = response_format
+        for key, value in (options or {}).items():
+            if key in self.OPTION_MAP:
+                payload[self.OPTION_MAP[key]] = value
+        if stream:
+            # Ask for a final usage chunk so token counts match Ollama's done chunk
+            payload["stream_options"] = {"include_usage": True}
+        return payload
+
+    # --- Response Mapping ---
+
+    @staticmethod
+    def _usage_fields(usage: dict | None) -> dict:
+        if not usage:
+            return {}
+        return {
+            "prompt_eval_count": usage.get("prompt_tokens"),
+            "eval_count": usage.get("completion_tokens"),
+        }
+
+    async def _stream_chat(self, payload: dict):
+        model = payload["model"]
+        usage = None
+        async with self._client.stream("POST", "/chat/completions", json=payload) as resp:
+            resp.raise_for_status()
+            async for line in resp.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+                event = json.loads(data)
+                if event.get("usage"):
+                    usage = event["usage"]
+                for choice in event.get("choices", []):
+                    content = (choice.get("delta") or {}).get("content")
+                    if content:
+                        yield {"model": model, "message": {"role": "assistant", "content": content}, "done": False}
+        yield {"model": model, "message": {"role": "assistant", "content": ""}, "done": True, **self._usage_fields(usage)}
+
+    async def _complete_chat(self, payload: dict) -> dict:
+        resp = await self._client.post("/chat/completions", json=payload)
+        resp.raise_for_status()
+        data = resp.json()
+        content = data["choices"][0]["message"].get("content") or ""
+        return {
+            "model": payload["model"],
+            "message": {"role": "assistant", "content": content},
+            "done": True,
+            **self._usage_fields(data.get("usage")),
+        }
+
+    # --- Public API ---
+
+    async def chat(self, model: str, messages: list, format: str | dict = None, stream: bool = False, options: dict = None):
+        payload = self._build_payload(model, messages, format, stream, options)
+        if stream:
+            return self._stream_chat(payload)
+        return await self._complete_chat(payload)
+
+    async def generate(self, model: str, prompt: str, stream: bool = False, options: dict = None):
+        # Chat endpoint applies the model's chat template, which /completions would skip
+        response = await self.chat(model, [{"role": "user", "content": prompt}], stream=stream, options=options)
+        if not stream:
+            return {**response, "response": response["message"]["content"]}
+
+        async def as_generate_chunks():
+            async for chunk in response:
+                yield {**chunk, "response": chunk["message"]["content"]}
+        return as_generate_chunks()
+
+    async def embed(self, model: str, input_text: str) -> dict:
+        response = await self.embed_batch(model, [input_text])
+        return {"embedding": response["embeddings"][0]}
+
+    async def embed_batch(self, model: str, inputs: list[str]) -> dict:
+        resp = await self._client.post("/embeddings", json={"model": model, "input": inputs})
+        resp.raise_for_status()
+        data = sorted(resp.json()["data"], key=lambda d: d["index"])
+        return {"embeddings": [d["embedding"] for d in data]}
+
+_provider: LLMProvider | None = None
+
+def get_provider() -> LLMProvider:
+    """Lazily build the provider selected by LLM_PROVIDER."""
+    global _provider
+    if _provider is None:
+        if settings.LLM_PROVIDER == "ollama":
+            _provider = OllamaProvider(settings.LLM_API_BASE, timeout=settings.LLM_REQUEST_TIMEOUT)
+        elif settings.LLM_PROVIDER in ("openai", "openai_compatible", "vllm", "llamacpp"):
+            _provider = OpenAICompatibleProvider(
+                settings.LLM_API_BASE,
+                api_key=settings.LLM_API_KEY,
+                timeout=settings.LLM_REQUEST_TIMEOUT,
+            )
+        else:
+            raise NotImplementedError(f"Provider {settings.LLM_PROVIDER} not implemented yet.")
+    return _provider
@@ -0,0 +1,276 @@
+import asyncio
+import random
+import time
+from dataclasses import dataclass
+import httpx
+from app.config import settings
+
+class LLMUnavailableError(Exception):
+    """Model server is unhealthy (circuit open) or the call ran out of time."""
+    telemetry_status = "rejected"
+
+class LLMDeadlineExceeded(LLMUnavailableError):
+    telemetry_status = "timeout"
+
+class LLMTransientError(LLMUnavailableError):
+    """Transient failures (connection errors, 5xx) that outlasted the retries; the cause is chained."""
+    telemetry_status = "error"
+
+@dataclass(frozen=True)
+class CallPolicy:
+    deadline: float # seconds for the whole call (queue wait + retries; first token for streams)
+    retries: int = 0 # extra attempts for transient failures (non-streaming only)
+    backoff: float = 0.25 # base delay, doubled per attempt (+ jitter)
+    hedge_after: float | None = None # launch a duplicate request if the first is still pending
+    idle_timeout: float = 30.0 # streams: max gap between chunks
+
+# Interactive paths get tight deadlines so tail latency stays bounded; background work gets room.
+CALL_SITE_POLICIES = {
+    "voice.command": CallPolicy(deadline=8.0, retries=1),
+    "voice.search_summary": CallPolicy(deadline=6.0),
+    "voice.pdf": CallPolicy(deadline=15.0),
+    "voice.stream": CallPolicy(deadline=15.0, idle_timeout=10.0),
+    "messenger": CallPolicy(deadline=20.0, idle_timeout=15.0),
+    "auditor": CallPolicy(deadline=15.0),
+    "embed.search": CallPolicy(deadline=5.0, retries=1, hedge_after=1.5),
+    "embed.rag": CallPolicy(deadline=5.0, retries=1, hedge_after=1.5),
+    "embed.packer": CallPolicy(deadline=5.0),
+    "embed.grounding": CallPolicy(deadline=5.0),
+    "embed": CallPolicy(deadline=15.0, retries=2),
+    "summary.rolling": CallPolicy(deadline=180.0, retries=1),
+    "summary.note": CallPolicy(deadline=90.0, retries=2),
+    "summary.merge": CallPolicy(deadline=90.0, retries=2),
+    "summary.chunk": CallPolicy(deadline=90.0, retries=2),
+    "summary.reduce": CallPolicy(deadline=90.0, retries=2),
+    "image.describe": CallPolicy(deadline=180.0, retries=1),
+}
+DEFAULT_POLICY = CallPolicy(deadline=120.0, retries=1)
+
+def policy_for(call_site: str) -> CallPolicy:
+    policy = CALL_SITE_POLICIES.get(call_site)
+    if policy is None and call_site.startswith("embed."):
+        policy = CALL_SITE_POLICIES["embed"]
+    policy = policy or DEFAULT_POLICY
+    override = settings.LLM_CALL_DEADLINES.get(call_site)
+    if override:
+        policy = CallPolicy(override, policy.retries, policy.backoff, policy.hedge_after, policy.idle_timeout)
+    return policy
+
+def is_transient(exc: BaseException) -> bool:
+    """Connection problems and 5xx/429 are worth retrying; bad requests are not."""
+    if isinstance(exc, (httpx.TransportError, ConnectionError, asyncio.TimeoutError)):
+        return True
+    status = getattr(exc, "status_code", None)
+    if status is None and isinstance(exc, httpx.HTTPStatusError):
+        status = exc.response.status_code
+    return status is not None and (status >= 500 or status == 429)
+
+class CircuitBreaker:
+    """
+    Fails fast while the model server is unhealthy.
+    closed -> open after `failure_threshold` consecutive transient failures;
+    open -> half-open after `reset_timeout` (one probe call allowed);
+    half-open -> closed on success, open again on failure.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    @property
+    def is_open(self) -> bool:
+        return self.state == "open"
+
+    def check(self) -> bool:
+        """Raises while open. Returns True if this call became the half-open probe (the caller must settle it)."""
+        state = self.state
+        if state == "open":
+            raise LLMUnavailableError("LLM circuit open: model server unhealthy")
+        if state == "half_open":
+            if self._probe_in_flight:
+                raise LLMUnavailableError("LLM circuit half-open: probe in flight")
+            self._probe_in_flight = True
+            return True
+        return False
+
+    def release_probe(self):
+        """The probe ended without a verdict (cancelled): let the next call probe instead."""
+        self._probe_in_flight = False
+
+    @property
+    def probe_pending(self) -> bool:
+        return self._probe_in_flight
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probe_in_flight = False
+
+    def record_failure(self):
+        self._probe_in_flight = False
+        self.failures += 1
+        if self.opened_at is not None or self.failures >= self.failure_threshold:
+            if self.opened_at is None:
+                print(f"[LLM] Circuit opened after {self.failures} failures")
+            self.opened_at = time.monotonic()
+
+llm_breaker = CircuitBreaker(settings.LLM_BREAKER_FAILURES, settings.LLM_BREAKER_RESET_SECONDS)
+
+async def hedged(invoke, hedge_after: float | None, slots: asyncio.Semaphore | None = None):
+    """
+    Run invoke(); if still pending after hedge_after, race a duplicate and keep the first result.
+    With `slots`, the duplicate takes a concurrency slot of its own and is skipped when none is free.
+    """
+    if not hedge_after:
+        return await invoke()
+
+    tasks = {asyncio.ensure_future(invoke())}
+    hedge_slot = False
+    try:
+        done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+        if not done and (slots is None or not slots.locked()):
+            if slots is not None:
+                await slots.acquire() # free (checked above), so this does not wait
+                hedge_slot = True
+            tasks.add(asyncio.ensure_future(invoke()))
+        while True:
+            done, tasks = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+            if not tasks:
+                raise next(iter(done)).exception()
+    finally:
+        # Also runs when the deadline cancels us: never leave a duplicate request behind
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        if hedge_slot:
+            slots.release()
+
+async def call_with_policy(invoke, policy: CallPolicy, deadline_at: float, slots: asyncio.Semaphore | None = None):
+    """
+    Run a non-streaming call under the breaker, the deadline and the retry policy.
+    `deadline_at` is a loop.time() timestamp shared with the queue wait; `slots` caps hedged duplicates.
+    """
+    loop = asyncio.get_running_loop()
+    attempt = 0
+    while True:
+        probe = llm_breaker.check()
+        try:
+            remaining = deadline_at - loop.time()
+            if remaining <= 0:
+                raise LLMDeadlineExceeded("LLM deadline exceeded before the call started")
+            response = await asyncio.wait_for(hedged(invoke, policy.hedge_after, slots), remaining)
+            llm_breaker.record_success()
+            return response
+        except asyncio.TimeoutError:
+            llm_breaker.record_failure()
+            raise LLMDeadlineExceeded(f"LLM call exceeded {policy.deadline:.1f}s deadline")
+        except LLMUnavailableError:
+            raise
+        except Exception as e:
+            if not is_transient(e):
+                # The server answered; it is healthy even if the request was bad
+                llm_breaker.record_success()
+                raise
+            llm_breaker.record_failure()
+            # Out of retries: surface as LLMUnavailableError so callers' fallbacks run
+            if attempt >= policy.retries or llm_breaker.is_open:
+                raise LLMTransientError(f"LLM unavailable after {attempt + 1} attempt(s): {e}") from e
+            delay = policy.backoff * (2 ** attempt) * (1 + random.random() * 0.5)
+            if loop.time() + delay >= deadline_at:
+                raise LLMTransientError(f"LLM unavailable, no time left to retry: {e}") from e
+            attempt += 1
+            print(f"[LLM] Transient failure ({e}); retry {attempt}/{policy.retries} in {delay:.2f}s")
+        finally:
+            # Cancelled, or out of time before sending: the probe gave no verdict, let the next call probe
+            if probe and llm_breaker.probe_pending:
+                llm_breaker.release_probe()
+        await asyncio.sleep(delay)
+
+class ClosingStream:
+    """
+    Async iterator over a generator pipeline whose cleanup lives in `finally` blocks.
+    An async generator closed before its first __anext__ never runs its body, so those blocks
+    would be skipped; `on_unstarted_close` is awaited instead in that case.
+    """
+
+    def __init__(self, stream, on_unstarted_close):
+        self._stream = stream
+        self._on_unstarted_close = on_unstarted_close
+        self._started = False
+        self._closed = False
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        self._started = True
+        return await self._stream.__anext__()
+
+    async def aclose(self):
+        if self._closed:
+            return
+        self._closed = True
+        await self._stream.aclose()
+        if not self._started:
+            await self._on_unstarted_close()
+
+async def guard_stream(stream, policy: CallPolicy, deadline_at: float, probe: bool = False):
+    """
+    Streams are not retried (tokens may already be shown), but a stalled server must not hang the request:
+    the first chunk must arrive before the deadline, later chunks within idle_timeout of each other.
+    `probe`: this stream is the half-open probe; ending before its first chunk counts as a failed probe.
+    """
+    loop = asyncio.get_running_loop()
+    iterator = stream.__aiter__()
+    first = True
+    try:
+        while True:
+            timeout = max(deadline_at - loop.time(), 0.001) if first else policy.idle_timeout
+            try:
+                chunk = await asyncio.wait_for(iterator.__anext__(), timeout)
+            except StopAsyncIteration:
+                break
+            except asyncio.TimeoutError:
+                llm_breaker.record_failure()
+                stage = "first token" if first else "next token"
+                raise LLMDeadlineExceeded(f"LLM stream stalled waiting for {stage}")
+            except Exception as e:
+                if is_transient(e):
+                    llm_breaker.record_failure()
+                raise
+            if first:
+                llm_breaker.record_success()
+                first = False
+            yield chunk
+    finally:
+        # Closed, cancelled or failed (non-transient) before the first chunk: never leave the probe pending
+        if probe and llm_breaker.probe_pending:
+            llm_breaker.record_failure()
+        aclose = getattr(iterator, "aclose", None)
+        if aclose:
+            await aclose()
+
+async def retry_until(attempt, name: str, first_delay: float = 2.0, max_delay: float = 60.0):
+    """
+    Background warm-up: await attempt() until it returns truthy, doubling the pause (capped) between tries.
+    For dependencies that may still be loading at startup (embedder, voice engine).
+    """
+    delay = first_delay
+    while not await attempt():
+        print(f"[Startup] {name} not ready; retrying in {delay:.0f}s")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, max_delay)
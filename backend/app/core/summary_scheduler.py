@@ -0,0 +1,86 @@
+import asyncio
+import time
+from app.config import settings
+
+class SummaryScheduler:
+    """
+    Keeps the rolling summary fresh in the background so GET /summary never waits on the LLM.
+    Note changes mark it dirty; changes within SUMMARY_DEBOUNCE_SECONDS of each other coalesce
+    into one regeneration (at most SUMMARY_DEBOUNCE_MAX_SECONDS after the first), and a change
+    during a run schedules another. A failed run is retried (after the same debounce) with its
+    rebuild flag. Runs only between start() and stop() (the app lifespan).
+    """
+
+    def __init__(self, delay: float | None = None, max_delay: float | None = None):
+        self.delay = delay if delay is not None else settings.SUMMARY_DEBOUNCE_SECONDS
+        self.max_delay = max_delay if max_delay is not None else settings.SUMMARY_DEBOUNCE_MAX_SECONDS
+        self.pending = False # changes not yet folded into a summary
+        self.running = False
+        self._rebuild = False
+        self._first_change = 0.0
+        self._last_change = 0.0
+        self._started = False
+        self._task: asyncio.Task | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def stale(self) -> bool:
+        return self.pending or self.running
+
+    def start(self):
+        self._started = True
+        self.mark_dirty() # fold in anything written while the server was down
+
+    async def stop(self):
+        self._started = False
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def mark_dirty(self, rebuild: bool = False):
+        """Record a note change. `rebuild` regenerates from scratch (a summarized note was deleted)."""
+        now = time.monotonic()
+        if not self.pending:
+            self._first_change = now
+        self.pending = True
+        self._rebuild = self._rebuild or rebuild
+        self._last_change = now
+        if self._started and (self._task is None or self._task.done()):
+            self._task = asyncio.get_running_loop().create_task(self._worker())
+
+    async def refresh(self, db, rebuild: bool = False):
+        """Regenerate now (serialized with background runs). Returns the latest summary."""
+        from app.services.summary_service import SummaryService
+        async with self._lock:
+            return await SummaryService.generate_summary(db, rebuild=rebuild)
+
+    async def _worker(self):
+        from db.database import async_session_maker
+        from app.services.summary_service import SummaryService
+        while self.pending:
+            # Debounce: wait for a quiet period, but never longer than max_delay overall
+            while (wait := min(self._last_change + self.delay, self._first_change + self.max_delay) - time.monotonic()) > 0:
+                await asyncio.sleep(wait)
+            self.pending = False
+            rebuild, self._rebuild = self._rebuild, False
+            self.running = True
+            failed = False
+            try:
+                async with async_session_maker() as db:
+                    summary = await self.refresh(db, rebuild=rebuild)
+                    if summary is None:
+                        # None with notes to summarize means generation failed (already logged)
+                        failed = await SummaryService.has_unsummarized(db, None)
+                    elif await SummaryService.has_unsummarized(db, summary):
+                        self.mark_dirty() # a backlog over SUMMARY_MAX_NEW_NOTES is folded in over several runs
+                if not failed:
+                    print(f"[SummaryScheduler] Summary v{summary.id if summary else 0} ready")
+            except Exception as e:
+                print(f"[SummaryScheduler] Regeneration failed: {e}")
+                failed = True
+            finally:
+                self.running = False
+            if failed:
+                self.mark_dirty(rebuild=rebuild) # keep the rebuild flag for the retry
+
+summary_scheduler = SummaryScheduler()
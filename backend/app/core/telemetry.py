@@ -0,0 +1,175 @@
+import time
+from bisect import bisect_left
+from dataclasses import dataclass
+
+LATENCY_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+THROUGHPUT_BUCKETS = (1, 2, 5, 10, 20, 40, 80, 160, 320)
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics)."""
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1) # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> list[tuple[str, int]]:
+        total = 0
+        result = []
+        for bound, count in zip(list(self.buckets) + ["+Inf"], self.counts):
+            total += count
+            result.append((str(bound), total))
+        return result
+
+@dataclass
+class LLMCallRecord:
+    op: str # chat | generate | embed | embed_batch
+    model: str
+    call_site: str
+    queue_wait: float = 0.0
+    ttft: float | None = None
+    total: float = 0.0
+    prompt_eval_count: int | None = None
+    eval_count: int | None = None
+    prompt_eval_duration: float | None = None # seconds
+    eval_duration: float | None = None # seconds
+    status: str = "ok"
+
+    @property
+    def tokens_per_second(self) -> float | None:
+        if not self.eval_count:
+            return None
+        if self.eval_duration:
+            return self.eval_count / self.eval_duration
+        decode_time = self.total - (self.ttft or 0.0)
+        return self.eval_count / decode_time if decode_time > 0 else None
+
+def _field(response, key: str):
+    """Read a field from an Ollama response object or a plain dict."""
+    try:
+        return response.get(key)
+    except AttributeError:
+        return getattr(response, key, None)
+
+def _ns_to_seconds(value) -> float | None:
+    return value / 1e9 if value else None
+
+class LLMTelemetry:
+    """
+    In-process aggregation of per-call LLM metrics, labelled by op, model and call site.
+    Exported in Prometheus text format via GET /metrics.
+    """
+
+    HISTOGRAMS = {
+        "neurovault_llm_queue_wait_seconds": ("Time spent waiting for an LLM slot", LATENCY_BUCKETS),
+        "neurovault_llm_ttft_seconds": ("Time to first token (streaming) or first byte of response", LATENCY_BUCKETS),
+        "neurovault_llm_latency_seconds": ("Total LLM call latency including queue wait", LATENCY_BUCKETS),
+        "neurovault_llm_tokens_per_second": ("Decode throughput", THROUGHPUT_BUCKETS),
+    }
+    COUNTERS = {
+        "neurovault_llm_calls_total": "LLM calls by outcome",
+        "neurovault_llm_prompt_eval_tokens_total": "Prompt tokens evaluated (prefill)",
+        "neurovault_llm_eval_tokens_total": "Tokens generated (decode)",
+        "neurovault_llm_prompt_eval_seconds_total": "Server-side prefill time",
+        "neurovault_llm_eval_seconds_total": "Server-side decode time",
+    }
+
+    def __init__(self):
+        self._histograms: dict[tuple, Histogram] = {}
+        self._counters: dict[tuple, float] = {}
+
+    def reset(self):
+        self._histograms.clear()
+        self._counters.clear()
+
+    def _observe(self, name: str, labels: tuple, value: float | None):
+        if value is None:
+            return
+        key = (name, labels)
+        if key not in self._histograms:
+            self._histograms[key] = Histogram(self.HISTOGRAMS[name][1])
+        self._histograms[key].observe(value)
+
+    def _inc(self, name: str, labels: tuple, value: float | None):
+        if value is None:
+            return
+        self._counters[(name, labels)] = self._counters.get((name, labels), 0) + value
+
+    def record(self, rec: LLMCallRecord):
+        labels = (("op", rec.op), ("model", rec.model), ("call_site", rec.call_site))
+        self._inc("neurovault_llm_calls_total", labels + (("status", rec.status),), 1)
+        self._observe("neurovault_llm_queue_wait_seconds", labels, rec.queue_wait)
+        self._observe("neurovault_llm_latency_seconds", labels, rec.total)
+        if rec.status != "ok":
+            return
+        self._observe("neurovault_llm_ttft_seconds", labels, rec.ttft)
+        self._observe("neurovault_llm_tokens_per_second", labels, rec.tokens_per_second)
+        self._inc("neurovault_llm_prompt_eval_tokens_total", labels, rec.prompt_eval_count)
+        self._inc("neurovault_llm_eval_tokens_total", labels, rec.eval_count)
+        self._inc("neurovault_llm_prompt_eval_seconds_total", labels, rec.prompt_eval_duration)
+        self._inc("neurovault_llm_eval_seconds_total", labels, rec.eval_duration)
+
+    # --- Response helpers ---
+
+    @staticmethod
+    def apply_response_stats(rec: LLMCallRecord, response):
+        """Copy Ollama's server-side counters (durations in ns) onto the record."""
+        if response is None:
+            return
+        rec.prompt_eval_count = _field(response, "prompt_eval_count") or rec.prompt_eval_count
+        rec.eval_count = _field(response, "eval_count") or rec.eval_count
+        rec.prompt_eval_duration = _ns_to_seconds(_field(response, "prompt_eval_duration")) or rec.prompt_eval_duration
+        rec.eval_duration = _ns_to_seconds(_field(response, "eval_duration")) or rec.eval_duration
+
+    async def observe_stream(self, stream, rec: LLMCallRecord, started: float, on_finish=None):
+        """Wrap a streaming response: TTFT on the first chunk, counters from the final (done) chunk."""
+        try:
+            async for chunk in stream:
+                if rec.ttft is None:
+                    rec.ttft = time.perf_counter() - started
+                if _field(chunk, "done"):
+                    self.apply_response_stats(rec, chunk)
+                yield chunk
+        except BaseException as e:
+            rec.status = getattr(e, "telemetry_status", "error")
+            raise
+        finally:
+            rec.total = time.perf_counter() - started
+            self.record(rec)
+            if on_finish:
+                on_finish()
+
+    # --- Export ---
+
+    @staticmethod
+    def _format_labels(labels: tuple, extra: tuple = ()) -> str:
+        items = [f'{k}="{v}"' for k, v in labels + extra]
+        return "{" + ",".join(items) + "}"
+
+    def render_prometheus(self) -> str:
+        lines = []
+        for name, (help_text, _) in self.HISTOGRAMS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} histogram")
+            for (metric, labels), hist in sorted(self._histograms.items()):
+                if metric != name:
+                    continue
+                for bound, count in hist.cumulative():
+                    lines.append(f"{name}_bucket{self._format_labels(labels, (('le', bound),))} {count}")
+                lines.append(f"{name}_sum{self._format_labels(labels)} {hist.sum:.6f}")
+                lines.append(f"{name}_count{self._format_labels(labels)} {hist.count}")
+        for name, help_text in self.COUNTERS.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} counter")
+            for (metric, labels), value in sorted(self._counters.items()):
+                if metric == name:
+                    lines.append(f"{name}{self._format_labels(labels)} {value:g}")
+        return "\n".join(lines) + "\n"
+
+telemetry = LLMTelemetry()
@@ -0,0 +1,34 @@
+import math
+import re
+
+# Sentence end: terminal punctuation followed by whitespace, or a blank line
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.?!])\s+|\n\s*\n')
+
+def split_sentences(text: str) -> list[str]:
+    """Split text into trimmed, non-empty sentences."""
+    return [s.strip() for s in SENTENCE_BOUNDARY.split(text) if s and s.strip()]
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap token estimate (~4 chars per token for English with Gemma/Llama tokenizers).
+    Good enough for budgeting; avoids loading a tokenizer into the API process.
+    """
+    if not text:
+        return 0
+    return math.ceil(len(text) / 4)
+
+class SentenceStream:
+    """Cut streamed tokens into sentences as soon as each boundary arrives."""
+
+    def __init__(self):
+        self.buffer = ""
+
+    def feed(self, token: str) -> list[str]:
+        self.buffer += token
+        parts = SENTENCE_BOUNDARY.split(self.buffer)
+        self.buffer = parts.pop() # may still be growing
+        return [p.strip() for p in parts if p and p.strip()]
+
+    def flush(self) -> str | None:
+        rest, self.buffer = self.buffer.strip(), ""
+        return rest or None
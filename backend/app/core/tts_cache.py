@@ -0,0 +1,144 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from app.config import settings
+
+_OWNER_CANCELLED = object() # In-flight result telling waiters to retry (and maybe become the owner)
+
+class TTSCache:
+    """
+    Memoized TTS audio keyed by (text, voice, speed, format).
+    In-memory LRU in front of an on-disk store, so canned confirmations survive restarts
+    and come back without a Kokoro call. The disk tier is an LRU too, capped at `max_disk_bytes`.
+    Concurrent requests for the same key share one synthesis.
+    """
+
+    def __init__(self, directory: str | None = None, max_items: int | None = None, max_disk_bytes: int | None = None):
+        self.directory = directory or settings.TTS_CACHE_DIR
+        self.max_items = max_items or settings.TTS_CACHE_ITEMS
+        self.max_disk_bytes = max_disk_bytes or settings.TTS_CACHE_DISK_MB * 1024 * 1024
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._disk: OrderedDict[str, int] | None = None # key -> size, oldest first; loaded on first use
+        self._disk_bytes = 0
+        self._disk_lock = threading.Lock() # Disk I/O runs in worker threads
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(text: str, voice: str, speed: float, format: str) -> str:
+        raw = json.dumps([" ".join(text.split()), voice, round(speed, 3), format])
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.bin")
+
+    def _remember(self, key: str, audio: bytes):
+        self._memory[key] = audio
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_items:
+            self._memory.popitem(last=False)
+
+    def _disk_index(self) -> OrderedDict:
+        """Scan the store once (oldest mtime first); afterwards the index is kept up to date in memory."""
+        if self._disk is None:
+            entries = []
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if name.endswith(".bin"):
+                        stat = os.stat(os.path.join(root, name))
+                        entries.append((stat.st_mtime, name[:-4], stat.st_size))
+            self._disk = OrderedDict((key, size) for _, key, size in sorted(entries))
+            self._disk_bytes = sum(self._disk.values())
+        return self._disk
+
+    def _read_disk(self, key: str) -> bytes | None:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                audio = f.read()
+        except FileNotFoundError:
+            return None
+        with self._disk_lock:
+            index = self._disk_index()
+            if key in index:
+                index.move_to_end(key)
+                os.utime(path) # mtime doubles as last use, so LRU order survives restarts
+        return audio
+
+    def _write_disk(self, key: str, audio: bytes):
+        if len(audio) > self.max_disk_bytes:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(audio)
+        with self._disk_lock:
+            index = self._disk_index()
+            os.replace(tmp, path) # Readers never see a partial file
+            self._disk_bytes += len(audio) - index.pop(key, 0)
+            index[key] = len(audio)
+            while self._disk_bytes > self.max_disk_bytes:
+                old_key, size = index.popitem(last=False)
+                self._disk_bytes -= size
+                try:
+                    os.remove(self._path(old_key))
+                except FileNotFoundError:
+                    pass
+
+    async def get(self, key: str) -> bytes | None:
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return self._memory[key]
+        audio = await asyncio.to_thread(self._read_disk, key)
+        if audio:
+            self._remember(key, audio)
+        return audio
+
+    async def put(self, key: str, audio: bytes):
+        self._remember(key, audio)
+        try:
+            await asyncio.to_thread(self._write_disk, key, audio)
+        except OSError as e:
+            print(f"[TTSCache] Disk write failed: {e}")
+
+    async def get_or_synthesize(self, text: str, voice: str, speed: float, format: str, synthesize) -> bytes | None:
+        """Return cached audio, or run `synthesize()` once for this key and cache a non-empty result."""
+        key = self.key(text, voice, speed, format)
+        while True:
+            audio = await self.get(key)
+            if audio:
+                self.hits += 1
+                return audio
+
+            if key not in self._inflight:
+                break
+            audio = await asyncio.shield(self._inflight[key])
+            if audio is not _OWNER_CANCELLED:
+                return audio
+            # The owner was cancelled (its client went away): retry, the first waiter back becomes the owner
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            audio = await synthesize()
+            if audio:
+                await self.put(key, audio)
+            future.set_result(audio)
+            return audio
+        except asyncio.CancelledError:
+            future.set_result(_OWNER_CANCELLED)
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception() # Mark retrieved when nobody else was waiting
+            raise
+        finally:
+            del self._inflight[key]
+
+tts_cache = TTSCache()
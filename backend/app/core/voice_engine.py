@@ -0,0 +1,58 @@
+import httpx
+from app.config import settings
+
+class VoiceEngineClient:
+    """
+    Long-lived, pooled HTTP client for the Voice Engine.
+    Opened in the app lifespan so per-sentence TTS reuses keep-alive connections
+    instead of paying a TCP handshake each time. With VOICE_ENGINE_SOCKET set,
+    requests go over a Unix-domain socket (engine must run with the same socket path).
+    """
+
+    def __init__(self, base_url: str | None = None, socket_path: str | None = None, transport: httpx.AsyncBaseTransport | None = None):
+        self.base_url = base_url or settings.VOICE_ENGINE_URL
+        self.socket_path = socket_path if socket_path is not None else settings.VOICE_ENGINE_SOCKET
+        self._transport = transport
+        self._client: httpx.AsyncClient | None = None
+
+    def _build(self) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=settings.VOICE_ENGINE_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.VOICE_ENGINE_MAX_CONNECTIONS,
+        )
+        transport = self._transport
+        base_url = self.base_url
+        if transport is None and self.socket_path:
+            transport = httpx.AsyncHTTPTransport(uds=self.socket_path, limits=limits)
+            base_url = "http://voice-engine" # Host is ignored over UDS
+        print(f"[VoiceEngine] Client ready ({'unix:' + self.socket_path if self.socket_path else base_url})")
+        return httpx.AsyncClient(base_url=base_url, transport=transport, limits=limits, timeout=30.0)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Lazily opened so scripts and tests work without the app lifespan
+        if self._client is None or self._client.is_closed:
+            self._client = self._build()
+        return self._client
+
+    async def start(self):
+        self.client
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def post(self, path: str, **kwargs) -> httpx.Response:
+        return await self.client.post(path, **kwargs)
+
+    def connect_stream(self, path: str):
+        """Open a WebSocket to the engine (async context manager), over the same TCP/UDS route."""
+        import websockets # Only needed for streaming endpoints
+
+        ws_url = self.base_url.replace("http", "ws", 1).rstrip("/") + path
+        if self.socket_path:
+            return websockets.unix_connect(self.socket_path, f"ws://voice-engine{path}", max_size=None)
+        return websockets.connect(ws_url, max_size=None)
+
+voice_engine = VoiceEngineClient()
@@ -1,15 +1,33 @@
+import asyncio
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from app.config import settings
 from db.database import init_db
+from app.core.voice_engine import voice_engine
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # Startup
     await init_db()
+    await voice_engine.start()
+    # Background: the voice engine may still be loading models
+    from app.services.voice_service import VoiceService
+    from app.services.audio_archive_service import AudioArchiveService
+    from app.core.intent_router import intent_router
+    from app.core.resilience import retry_until
+    from app.core.summary_scheduler import summary_scheduler
+    background = [
+        asyncio.create_task(retry_until(VoiceService.prewarm_tts, "TTS prewarm")),
+        asyncio.create_task(AudioArchiveService.sweep()),
+        asyncio.create_task(retry_until(intent_router.warm, "Intent router")),
+    ]
+    summary_scheduler.start()
     yield
     # Shutdown
-    pass
+    for task in background:
+        task.cancel()
+    await summary_scheduler.stop()
+    await voice_engine.close()
 
 from app.api import notes, upload, summary
 from app.api import notes, summary, upload, chat
@@ -24,6 +42,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["Retry-After", "X-Chat-Session"], # first summary still generating; pinned chat context
 )
 
 # Routes
@@ -44,6 +63,14 @@ app.mount("/files", StaticFiles(directory="dumps"), name="files")
 def health_check():
     return {"status": "ok", "project": settings.PROJECT_NAME}
 
+from fastapi.responses import PlainTextResponse
+from app.core.telemetry import telemetry
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """LLM telemetry (queue wait, TTFT, latency, tokens/sec, token counts) in Prometheus text format."""
+    return telemetry.render_prometheus()
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
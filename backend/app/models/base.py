@@ -1,7 +1,7 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from enum import Enum
 from typing import List, Optional
-from sqlalchemy import Integer, String, Boolean, DateTime, Date, Text, func
+from sqlalchemy import Integer, String, Boolean, DateTime, Date, Text, Index, event, func
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 from sqlalchemy.types import JSON
 
@@ -42,7 +42,28 @@ class Note(Base):
     origin_note_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True) # ID of the voice/text note this task was extracted from
     event_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True) # Specific scheduled time for events
     event_duration: Mapped[int] = mapped_column(Integer, default=60) # Duration in minutes
+    event_end: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True) # event_at + event_duration, kept in sync below
+    fingerprint: Mapped[Optional[str]] = mapped_column(String, nullable=True) # AI-extracted items only (app/core/fingerprint.py)
 
+    # Overlap queries (event_end > start AND event_at < end) range-scan only events still running after `start`
+    __table_args__ = (
+        Index("ix_notes_active_event_window", "is_active", "event_end", "event_at"),
+        # Re-extracting an item is a no-op (NoteService.upsert_fingerprinted); NULLs don't collide
+        Index("ux_notes_fingerprint", "fingerprint", unique=True),
+    )
+
+@event.listens_for(Note, "before_insert")
+@event.listens_for(Note, "before_update")
+def sync_event_end(mapper, connection, note: Note):
+    note.event_end = note.event_at + timedelta(minutes=note.event_duration or 60) if note.event_at else None
+
+
+class DismissedFingerprint(Base):
+    """Tombstone for a deleted AI-extracted task/event, so re-extraction does not bring it back."""
+    __tablename__ = "dismissed_fingerprints"
+
+    fingerprint: Mapped[str] = mapped_column(String, primary_key=True)
+    dismissed_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
 
 class Summary(Base):
     __tablename__ = "summaries"
@@ -50,5 +71,7 @@ class Summary(Base):
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     date_bucket: Mapped[datetime] = mapped_column(Date)
     summary_text: Mapped[str] = mapped_column(Text)
-    linked_note_ids: Mapped[List[int]] = mapped_column(JSON, default=list)
+    linked_note_ids: Mapped[List[int]] = mapped_column(JSON, default=list) # notes folded in by this version only
+    watermark: Mapped[int] = mapped_column(Integer, default=0) # highest note id covered (this and earlier versions)
+    pending_note_ids: Mapped[List[int]] = mapped_column(JSON, default=list) # below the watermark but still processing: folded once final
     created_at: Mapped[datetime] = mapped_column(DateTime, default=func.now())
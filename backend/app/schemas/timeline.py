@@ -15,6 +15,8 @@ class SummaryResponse(BaseModel):
     linked_note_ids: List[int]
     created_at: datetime
     tasks: List[TaskItem] = []
+    version: int = 0 # id of this summary; increases with every regeneration
+    is_stale: bool = False # notes changed since; a background regeneration is pending or running
 
     model_config = ConfigDict(from_attributes=True)
 
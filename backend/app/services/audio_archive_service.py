@@ -0,0 +1,83 @@
+import asyncio
+import os
+from sqlalchemy import select
+from app.config import settings
+from app.core.voice_engine import voice_engine
+from app.models.base import Note
+
+ARCHIVE_EXTENSIONS = {"ogg": ".ogg", "opus": ".ogg", "mp3": ".mp3"}
+
+class AudioArchiveService:
+    """
+    Background re-encoding of stored voice recordings (WAV -> Opus/MP3 via the Voice Engine).
+    Speech at 24 kbps Opus is roughly a tenth of 16 kHz PCM WAV.
+    """
+
+    # One transcode at a time: archiving must never compete with interactive STT/TTS
+    _lock = asyncio.Lock()
+
+    @staticmethod
+    async def archive(path: str) -> str | None:
+        """Transcode one WAV file and repoint every note that references it. Returns the new path."""
+        fmt = settings.AUDIO_ARCHIVE_FORMAT
+        if fmt not in ARCHIVE_EXTENSIONS or not path or not path.lower().endswith(".wav"):
+            return None
+
+        async with AudioArchiveService._lock:
+            if not os.path.exists(path):
+                return None
+            raw = await asyncio.to_thread(AudioArchiveService._read, path)
+            try:
+                resp = await voice_engine.post(
+                    "/transcode",
+                    files={"file": (os.path.basename(path), raw, "audio/wav")},
+                    data={"encoding": fmt, "bitrate": str(settings.AUDIO_ARCHIVE_BITRATE)},
+                    timeout=120.0,
+                )
+            except Exception as e:
+                print(f"[Archive] Voice Engine unreachable: {e}")
+                return None
+            if resp.status_code != 200:
+                print(f"[Archive] Transcode failed for {path}: {resp.status_code} {resp.text}")
+                return None
+
+            new_path = os.path.splitext(path)[0] + ARCHIVE_EXTENSIONS[fmt]
+            await asyncio.to_thread(AudioArchiveService._write, new_path, resp.content)
+
+            from db.database import async_session_maker
+            async with async_session_maker() as db:
+                result = await db.execute(select(Note).where(Note.file_path == path))
+                for note in result.scalars().all():
+                    note.file_path = new_path
+                await db.commit()
+
+            # Only drop the original once nothing points at it
+            await asyncio.to_thread(os.remove, path)
+            print(f"[Archive] {path} -> {new_path} ({len(raw) // 1024} KB -> {len(resp.content) // 1024} KB)")
+            return new_path
+
+    @staticmethod
+    async def sweep():
+        """Archive WAV recordings left over from before archiving was enabled (or from failed attempts)."""
+        if settings.AUDIO_ARCHIVE_FORMAT not in ARCHIVE_EXTENSIONS:
+            return
+        from db.database import async_session_maker
+        async with async_session_maker() as db:
+            result = await db.execute(
+                select(Note.file_path).where(Note.media_type == "voice", Note.file_path.like("%.wav")).distinct()
+            )
+            paths = [p for p in result.scalars().all() if p]
+        for path in paths:
+            await AudioArchiveService.archive(path)
+
+    @staticmethod
+    def _read(path: str) -> bytes:
+        with open(path, "rb") as f:
+            return f.read()
+
+    @staticmethod
+    def _write(path: str, data: bytes):
+        tmp = f"{path}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
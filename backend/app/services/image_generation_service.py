@@ -1,10 +1,7 @@
 import os
 import time
 import base64
-import torch
-import sdnq # Critical for patching loading of Z-Image-Turbo-SDNQ
 from io import BytesIO
-from diffusers import AutoPipelineForText2Image, FlowMatchEulerDiscreteScheduler
 
 # Critical for MPS performance with Z-Image
 os.environ["PYTORCH_MPS_FAST_MATH"] = "1"
@@ -19,6 +16,10 @@ class ImageGenerationService:
         """
         if cls._pipeline is None:
             print("Loading Z-Image-Turbo Pipeline...")
+            # Heavy imports deferred to first use so the API process starts without torch
+            import torch
+            import sdnq # Critical for patching loading of Z-Image-Turbo-SDNQ
+            from diffusers import AutoPipelineForText2Image, FlowMatchEulerDiscreteScheduler
             
             # Use bfloat16 for MPS (cleaner images than float16, faster than float32)
             dtype = torch.bfloat16 if torch.backends.mps.is_available() else torch.float32
@@ -68,6 +69,7 @@ class ImageGenerationService:
         
         try:
             pipe = cls.get_pipeline()
+            import torch
             device = "mps" if torch.backends.mps.is_available() else "cpu"
             
             # Seed handling
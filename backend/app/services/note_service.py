@@ -3,9 +3,10 @@ from datetime import datetime
 from sqlalchemy import select, desc
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from app.models.base import Note
+from app.models.base import Note, DismissedFingerprint
 from app.schemas.note import NoteCreate
 from app.services.vector_service import VectorService
+from app.core.summary_scheduler import summary_scheduler
 
 class NoteService:
     @staticmethod
@@ -32,6 +33,8 @@ class NoteService:
         db.add(db_note)
         await db.commit()
         await db.refresh(db_note)
+        if not db_note.is_hidden and db_note.origin_note_id is None:
+            summary_scheduler.mark_dirty()
 
         # 2. Vector Embedding (Only if not processing in background)
         # Note: We keep embedding synchronous for now to ensure search works instantly?
@@ -57,23 +60,9 @@ class NoteService:
             try:
                 # Construct enriched text for embedding
                 # This drastically improves search by matching tags and summaries
-                parts = []
-                if note_in.media_type:
-                    parts.append(f"Type: {note_in.media_type}")
-                
-                # Handle tags (might be list or string depending on source, but Pydantic guarantees list here)
-                if note_in.tags:
-                    tag_str = ", ".join(note_in.tags)
-                    parts.append(f"Tags: {tag_str}")
-                
-                if db_note.summary:
-                    parts.append(f"Summary: {db_note.summary}")
-                
-                parts.append(f"Content: {note_in.content}")
-                
-                text_to_embed = "\n".join(parts)
+                text_to_embed = NoteService.embedding_text(note_in.media_type, note_in.tags, note_in.content, db_note.summary)
 
-                vector = await VectorService.embed_text(text_to_embed)
+                vector = await VectorService.embed_text(text_to_embed, call_site="embed.note")
                 stmt = text("INSERT INTO vec_notes(rowid, embedding) VALUES (:id, :embedding)")
                 # sqlite-vec expects raw bytes or json? 
                 # We used json.loads in read. Insert should be safe with list?
@@ -95,6 +84,62 @@ class NoteService:
         
         return db_note
 
+    @staticmethod
+    def embedding_text(media_type, tags: list[str], content: str, summary: str = None) -> str:
+        """Enriched text that gets embedded for a note (type + tags + summary + content)."""
+        parts = []
+        if media_type:
+            parts.append(f"Type: {media_type}")
+        if tags:
+            parts.append(f"Tags: {', '.join(tags)}")
+        if summary:
+            parts.append(f"Summary: {summary}")
+        parts.append(f"Content: {content}")
+        return "\n".join(parts)
+
+    @staticmethod
+    async def known_fingerprints(db: AsyncSession, fingerprints: list[str]) -> set[str]:
+        """Fingerprints already stored as notes or dismissed (deleted by the user)."""
+        stored = await db.execute(select(Note.fingerprint).where(Note.fingerprint.in_(fingerprints)))
+        dismissed = await db.execute(
+            select(DismissedFingerprint.fingerprint).where(DismissedFingerprint.fingerprint.in_(fingerprints))
+        )
+        return set(stored.scalars().all()) | set(dismissed.scalars().all())
+
+    @staticmethod
+    async def upsert_fingerprinted(db: AsyncSession, notes: List[Note]) -> List[Note]:
+        """
+        Insert notes whose `fingerprint` is not stored yet, in one transaction, and embed
+        only those (one batched call). Existing rows are left untouched so user edits and
+        completion survive re-extraction, and items the user deleted (tombstoned) stay deleted.
+        Returns the newly inserted notes.
+        """
+        unique = {}
+        for note in notes:
+            unique.setdefault(note.fingerprint, note)
+        if not unique:
+            return []
+
+        existing = await NoteService.known_fingerprints(db, list(unique))
+        new_notes = [note for fp, note in unique.items() if fp not in existing]
+        if not new_notes:
+            return []
+
+        db.add_all(new_notes)
+        await db.flush() # assigns ids for vec_notes rowids
+
+        try:
+            import json
+            texts = [NoteService.embedding_text(n.media_type, n.tags, n.content) for n in new_notes]
+            vectors = await VectorService.embed_texts(texts, call_site="embed.note")
+            stmt = text("INSERT INTO vec_notes(rowid, embedding) VALUES (:id, :embedding)")
+            await db.execute(stmt, [{"id": n.id, "embedding": json.dumps(v)} for n, v in zip(new_notes, vectors)])
+        except Exception as e:
+            print(f"Embedding failed: {e}") # Notes are still saved, like create_note
+
+        await db.commit()
+        return new_notes
+
     @staticmethod
     async def mark_as_processed(db: AsyncSession, note_id: int):
         stmt = select(Note).where(Note.id == note_id)
@@ -103,12 +148,30 @@ class NoteService:
         if note:
             note.is_processing = False
             await db.commit()
+            summary_scheduler.mark_dirty() # content is final now
 
     @staticmethod
     async def get_note(db: AsyncSession, note_id: int) -> Optional[Note]:
         result = await db.execute(select(Note).where(Note.id == note_id))
         return result.scalars().first()
 
+    @staticmethod
+    async def get_overlapping_events(db: AsyncSession, start: datetime, end: datetime, limit: int = None) -> List[Note]:
+        """
+        Active events overlapping [start, end), earliest first.
+        Uses the stored event_end and ix_notes_active_event_window, so only events
+        still running after `start` are scanned (never the whole history).
+        """
+        stmt = select(Note).where(
+            Note.is_active == True,
+            Note.event_end > start,
+            Note.event_at < end
+        ).order_by(Note.event_at)
+        if limit:
+            stmt = stmt.limit(limit)
+        result = await db.execute(stmt)
+        return result.scalars().all()
+
     @staticmethod
     async def get_timeline(db: AsyncSession, skip: int = 0, limit: int = 20):
         # Return simple list of notes ordered by creation, excluding hidden chunks
@@ -117,7 +180,26 @@ class NoteService:
         return result.scalars().all()
 
     @staticmethod
-    async def search_notes(db: AsyncSession, query_text: str, limit: int = 10, media_type: str = None, start_date: datetime = None, end_date: datetime = None):
+    async def get_notes_by_ids(db: AsyncSession, note_ids: list[int]):
+        """Active notes with these ids, oldest first (missing or deleted ids are skipped)."""
+        stmt = select(Note).where(Note.id.in_(note_ids), Note.is_active == True).order_by(Note.id)
+        result = await db.execute(stmt)
+        return result.scalars().all()
+
+    @staticmethod
+    async def get_notes_since(db: AsyncSession, after_id: int, limit: int = 200):
+        """User notes with id > after_id, oldest first (skips hidden chunks and AI-extracted tasks/events)."""
+        stmt = select(Note).where(
+            Note.id > after_id,
+            Note.is_active == True,
+            Note.is_hidden == False,
+            Note.origin_note_id.is_(None),
+        ).order_by(Note.id).limit(limit)
+        result = await db.execute(stmt)
+        return result.scalars().all()
+
+    @staticmethod
+    async def search_notes(db: AsyncSession, query_text: str, limit: int = 10, media_type: str = None, start_date: datetime = None, end_date: datetime = None, query_vector: list[float] = None):
         # Base SQL components
         filter_clause = "notes.is_active = 1"
         params = {"limit": limit}
@@ -209,8 +291,8 @@ class NoteService:
             return final_results
 
         # Case 2: Vector Search
-        # 1. Embed query (Local Embedding Model)
-        query_vector = await VectorService.embed_text(query_text)
+        # 1. Embed query (Local Embedding Model), unless the caller already did (e.g. voice intent routing)
+        query_vector = query_vector or await VectorService.embed_text(query_text, call_site="embed.search")
         import json
         query_vec_json = json.dumps(query_vector)
         params["query_vec"] = query_vec_json
@@ -335,7 +417,7 @@ class NoteService:
             return []
             
         # 2. Embed Query
-        query_vector = await VectorService.embed_text(query_text)
+        query_vector = await VectorService.embed_text(query_text, call_site="embed.rag")
         
         # 3. Fetch Embeddings for these children (Manual Join)
         import json
@@ -377,15 +459,17 @@ class NoteService:
             
             # 5. Sort and Top K
             scores.sort(key=lambda x: x[1], reverse=True)
-            top_ids = [x[0] for x in scores[:3]] # Limit to Top 3 for performance
-            
+            # Prompt size is bounded later by ContextPacker, so honour top_k here
+            top_ids = [x[0] for x in scores[:top_k]]
+
             if not top_ids:
                 return []
-                
-            # 6. Fetch Content
-            content_stmt = select(Note.content).where(Note.id.in_(top_ids))
+
+            # 6. Fetch Content (returned best-first so the packer keeps the top chunks)
+            content_stmt = select(Note.id, Note.content).where(Note.id.in_(top_ids))
             content_result = await db.execute(content_stmt)
-            return content_result.scalars().all()
+            content_by_id = {row.id: row.content for row in content_result.fetchall()}
+            return [content_by_id[i] for i in top_ids if i in content_by_id]
             
         except Exception as e:
             return []
@@ -409,6 +493,8 @@ class NoteService:
         note.updated_at = datetime.utcnow()
         await db.commit()
         await db.refresh(note)
+        if note_update.get("is_processing") is False:
+            summary_scheduler.mark_dirty() # content is final now
         
         # Re-embed if content changed? 
         # For now, we assume caller handles re-embedding or we ignore it for simple property updates.
@@ -473,24 +559,17 @@ class NoteService:
             # Delete dependent note
             await db.delete(child)
             
-        # 4. Check if this note is part of the latest summary.
-        # If so, invalidate the summary (delete it), so it regenerates or shows empty.
-        # This keeps "Rolling Updates" in sync with actual available data.
+        # 4. If the latest summary covers this note, regenerate it in the background.
+        # The old summary keeps being served (marked stale) until the new one is ready.
         from app.services.summary_service import SummaryService
-        
-        # We need to do this BEFORE deleting the note? No, after is fine, or before.
-        # Actually logic is: if note_id in summary.linked_note_ids -> delete summary.
-        # Ideally we check the latest summary.
         latest_summary = await SummaryService.get_latest_summary(db)
-        if latest_summary and latest_summary.linked_note_ids:
-             # Ensure linked_note_ids is a list (it should be from JSON)
-             linked_ids = latest_summary.linked_note_ids
-             if isinstance(linked_ids, list) and note_id in linked_ids:
-                 await db.delete(latest_summary)
-                 # We don't need to generate a new one immediately. 
-                 # Next GET /summary will trigger generation or 404.
-
-        # 5. Delete from main notes table
+        if (latest_summary and note.origin_note_id is None and not note.is_hidden and note_id <= latest_summary.watermark
+                and note_id not in (latest_summary.pending_note_ids or [])):
+            summary_scheduler.mark_dirty(rebuild=True)
+
+        # 5. Delete from main notes table; a deleted AI-extracted item leaves a tombstone
+        if note.fingerprint:
+            await db.merge(DismissedFingerprint(fingerprint=note.fingerprint))
         await db.delete(note)
         await db.commit()
         
@@ -1,138 +1,92 @@
 from app.core.llm import NeuroVaultLLM
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, desc
+from sqlalchemy import select, desc, delete
 from app.models.base import Summary
 from app.api.notes import NoteService
 from app.config import settings
 from app.core.prompts import Prompts
+from app.core.interval_tree import IntervalTree, Interval
+from app.core.fingerprint import item_fingerprint
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+import asyncio
 import datetime
+import json
+
+# Notes stuck in is_processing longer than this are summarized as they are
+PROCESSING_GRACE = datetime.timedelta(minutes=15)
+
+class TaskItem(BaseModel):
+    task: str
+    priority: Literal["High", "Medium", "Low"]
+    timeline: Literal["Today", "This Week", "Upcoming"]
+    source_note: Optional[int] = None
+
+class EventItem(BaseModel):
+    title: str
+    date_time: str
+    duration_minutes: int = 60
+    source_note: Optional[int] = None
+
+class RollingSummaryResponse(BaseModel):
+    summary: str
+    tasks: List[TaskItem]
+    events: List[EventItem] = []
 
 class SummaryService:
     @staticmethod
-    async def generate_summary(db: AsyncSession) -> Summary:
-        # 1. Fetch recent notes (e.g. last 20 or last 24 hours)
-        # For simplicity, let's take last 10 notes to summarize context
-        notes = await NoteService.get_timeline(db, limit=10)
-        
-        if not notes:
-            return None
-            
-        # Format notes for prompt
-        notes_text = "\n".join([f"- [{n.created_at}] {n.content}" for n in notes])
-        
-        now_str = datetime.datetime.now().strftime("%A, %B %d, %Y")
-        prompt = Prompts.SUMMARY_GENERATION_TEMPLATE.format(notes_text=notes_text, current_time=now_str)
-        
-        # Define Schema
-        from pydantic import BaseModel
-        from typing import List, Literal
-
-        class TaskItem(BaseModel):
-            task: str
-            priority: Literal["High", "Medium", "Low"]
-            timeline: Literal["Today", "This Week", "Upcoming"]
-
-        class EventItem(BaseModel):
-            title: str
-            date_time: str
-            duration_minutes: int = 60
-
-        class RollingSummaryResponse(BaseModel):
-            summary: str
-            tasks: List[TaskItem]
-            events: List[EventItem] = []
+    async def generate_summary(db: AsyncSession, rebuild: bool = False) -> Summary:
+        """
+        Incremental rolling summary: folds only the notes created since the last summary into it,
+        so a refresh costs in proportion to what is new. New notes that fit in one batch take a
+        single call; larger backlogs are summarized per batch in parallel (map) and merged into
+        the previous summary (reduce). With nothing new, the previous summary is returned as is.
+        Notes still being processed are skipped (kept in `pending_note_ids`) and folded once final.
+        `rebuild` starts over from the oldest note (after a summarized note was deleted) and folds
+        every page before publishing, so a partial summary is never served.
+        """
+        latest = await SummaryService.get_latest_summary(db)
+        previous = None if rebuild else latest
+        watermark = previous.watermark if previous else 0
+        waiting = list(previous.pending_note_ids or []) if previous else []
+        summary_text = previous.summary_text if previous else ""
 
         try:
-            # Use Structured Outputs
-            response = await NeuroVaultLLM.chat(
-                model=settings.SUMMARY_MODEL, 
-                messages=[
-                    {'role': 'user', 'content': prompt},
-                ],
-                format=RollingSummaryResponse.model_json_schema()
-            )
-            
-            summary_json_str = response['message']['content']
-            import json
-            data = json.loads(summary_json_str)
-            summary_content = data.get("summary", "")
-            
-            # Extract and Save Tasks
-            tasks_data = data.get("tasks", [])
-            from app.schemas.note import NoteCreate
-            from app.models.base import MediaType
-
-            print(f"[Summary] Extracted {len(tasks_data)} tasks. Saving...")
+            # Notes skipped earlier because they were still processing, oldest first
+            late = await NoteService.get_notes_by_ids(db, waiting) if waiting else []
+            folded, waiting = [], []
+            while True:
+                new = await NoteService.get_notes_since(db, watermark, limit=settings.SUMMARY_MAX_NEW_NOTES)
+                ready, in_flight = SummaryService.ready_notes(late + list(new))
+                late = []
+                waiting += [n.id for n in in_flight]
+                if new:
+                    watermark = new[-1].id
+                if ready:
+                    summary_text = await SummaryService.fold_notes(db, ready, summary_text)
+                    folded += ready
+                if not rebuild or len(new) < settings.SUMMARY_MAX_NEW_NOTES:
+                    break
 
-            for t in tasks_data:
-                try:
-                    # Construct Note for the task
-                    task_content = t.get("task")
-                    if not task_content: continue
-                    
-                    priority = t.get("priority", "Medium")
-                    timeline = t.get("timeline", "Today")
-                    
-                    task_note_in = NoteCreate(
-                        content=task_content,
-                        media_type=MediaType.TEXT,
-                        tags=["todo", "ai-generated", priority, timeline],
-                        is_task=True,
-                        category=priority,
-                        is_completed=False,
-                        origin_note_id=notes[0].id if notes else None
-                    )
-                    
-                    # Create the task note using NoteService
-                    await NoteService.create_note(db, task_note_in)
-                    
-                except Exception as task_e:
-                    print(f"Failed to create task note: {task_e}")
-
-            # Extract and Save Events
-            events_data = data.get("events", [])
-            print(f"[Summary] Extracted {len(events_data)} events. Saving...")
-            
-            import dateparser
-            
-            for e in events_data:
-                try:
-                    event_title = e.get("title")
-                    event_time_str = e.get("date_time")
-                    if not event_title or not event_time_str: continue
-                    
-                    # Parse Date
-                    event_dt = dateparser.parse(event_time_str, settings={'RELATIVE_BASE': datetime.datetime.now(), 'PREFER_DATES_FROM': 'future'})
-                    
-                    if not event_dt:
-                        print(f"Could not parse date for event: {event_time_str}")
-                        continue
-                        
-                    event_note_in = NoteCreate(
-                        content=event_title,
-                        media_type=MediaType.TEXT,
-                        tags=["event", "ai-generated"],
-                        is_task=True,
-                        category="Event",
-                        is_completed=False,
-                        origin_note_id=notes[0].id if notes else None,
-                        event_at=event_dt,
-                        event_duration=e.get("duration_minutes", 60)
-                    )
-                     # Create the event note
-                    await NoteService.create_note(db, event_note_in)
-                    print(f"Created event: {event_title} at {event_dt}")
-                    
-                except Exception as event_e:
-                    print(f"Failed to create event note: {event_e}")
+            if latest and not rebuild and watermark == latest.watermark and not folded and waiting == list(latest.pending_note_ids or []):
+                return latest # nothing new
+            if not latest and not folded and not waiting:
+                return None # no notes at all
 
             # create summary record
             new_summary = Summary(
-                summary_text=summary_content,
-                date_bucket=notes[0].created_at, # Using most recent note date as bucket anchor
-                linked_note_ids=[n.id for n in notes]
+                summary_text=summary_text,
+                # Using most recent note date as bucket anchor
+                date_bucket=folded[-1].created_at if folded else (latest.date_bucket if latest else datetime.datetime.utcnow()),
+                linked_note_ids=[n.id for n in folded],
+                watermark=watermark,
+                pending_note_ids=waiting
             )
             db.add(new_summary)
+            await db.flush()
+            # Only the latest version is served; keep a few for debugging
+            kept = select(Summary.id).order_by(desc(Summary.id)).limit(settings.SUMMARY_HISTORY)
+            await db.execute(delete(Summary).where(Summary.id.not_in(kept)))
             await db.commit()
             await db.refresh(new_summary)
             return new_summary
@@ -141,9 +95,213 @@ class SummaryService:
             print(f"Summary generation failed: {e}")
             return None
 
+    @staticmethod
+    async def fold_notes(db: AsyncSession, notes: list, previous_text: str) -> str:
+        """Fold final notes into the summary text and store their tasks/events. Returns the new text."""
+        batches = SummaryService.plan_batches(notes, settings.SUMMARY_BATCH_CHARS)
+        print(f"[Summary] Folding {len(notes)} new notes in {len(batches)} batch(es)")
+        if len(batches) == 1:
+            results = [await SummaryService.summarize_batch(batches[0], previous_text)]
+            summary_content = results[0].get("summary", "")
+        else:
+            # Bounded like map_summaries: each batch holds an LLM slot for a while, leave some for voice/chat
+            slots = asyncio.Semaphore(settings.SUMMARY_MAP_CONCURRENCY)
+
+            async def summarize_limited(batch: list) -> dict:
+                async with slots:
+                    return await SummaryService.summarize_batch(batch, "")
+
+            results = await asyncio.gather(*(summarize_limited(batch) for batch in batches))
+            summary_content = await SummaryService.merge_summaries(previous_text, [r.get("summary", "") for r in results])
+        await SummaryService.save_extracted(db, list(zip(batches, results)))
+        return summary_content
+
+    @staticmethod
+    def ready_notes(notes: list) -> tuple[list, list]:
+        """
+        Split notes into (final, in flight), each in id order. A note still being transcribed or
+        captioned is in flight unless it has been stuck longer than PROCESSING_GRACE.
+        """
+        cutoff = datetime.datetime.utcnow() - PROCESSING_GRACE
+        ready, in_flight = [], []
+        for note in sorted(notes, key=lambda n: n.id):
+            if note.is_processing and note.created_at and note.created_at > cutoff:
+                in_flight.append(note)
+            else:
+                ready.append(note)
+        return ready, in_flight
+
+    @staticmethod
+    async def has_unsummarized(db: AsyncSession, summary: Summary | None) -> bool:
+        """True if notes newer than `summary`, or skipped notes that are now final, exist (it no longer reflects everything)."""
+        if await NoteService.get_notes_since(db, summary.watermark if summary else 0, limit=1):
+            return True
+        if summary and summary.pending_note_ids:
+            ready, _ = SummaryService.ready_notes(await NoteService.get_notes_by_ids(db, summary.pending_note_ids))
+            return bool(ready)
+        return False
+
+    @staticmethod
+    def plan_batches(notes: list, max_chars: int) -> list[list]:
+        """Consecutive notes grouped so each batch's formatted text stays within max_chars (a long note gets its own batch)."""
+        batches, current, size = [], [], 0
+        for note in notes:
+            length = len(SummaryService.format_note(note, max_chars))
+            if current and size + length > max_chars:
+                batches.append(current)
+                current, size = [], 0
+            current.append(note)
+            size += length
+        if current:
+            batches.append(current)
+        return batches
+
+    @staticmethod
+    def format_note(note, max_chars: int = None) -> str:
+        content = note.content if not max_chars or len(note.content) <= max_chars else note.content[:max_chars] + "...(truncated)"
+        return f"- #{note.id} [{note.created_at}] {content}"
+
+    @staticmethod
+    async def summarize_batch(notes: list, previous_summary: str) -> dict:
+        """One structured call: updated summary plus tasks/events found in `notes`."""
+        notes_text = "\n".join(SummaryService.format_note(n, settings.SUMMARY_BATCH_CHARS) for n in notes)
+        now_str = datetime.datetime.now().strftime("%A, %B %d, %Y")
+        prompt = Prompts.SUMMARY_UPDATE_TEMPLATE.format(
+            previous_summary=previous_summary or "(none yet)", notes_text=notes_text, current_time=now_str
+        )
+        # Use Structured Outputs
+        response = await NeuroVaultLLM.chat(
+            model=settings.SUMMARY_MODEL, 
+            messages=[
+                {'role': 'user', 'content': prompt},
+            ],
+            format=RollingSummaryResponse.model_json_schema(),
+            call_site="summary.rolling"
+        )
+        return json.loads(response['message']['content'])
+
+    @staticmethod
+    async def merge_summaries(previous_summary: str, partial_summaries: list[str]) -> str:
+        """Reduce step: fold per-batch summaries (oldest first) into the previous rolling summary."""
+        now_str = datetime.datetime.now().strftime("%A, %B %d, %Y")
+        prompt = Prompts.SUMMARY_MERGE_TEMPLATE.format(
+            previous_summary=previous_summary or "(none yet)",
+            partial_summaries="\n".join(f"{i + 1}. {p}" for i, p in enumerate(partial_summaries) if p),
+            current_time=now_str,
+        )
+        response = await NeuroVaultLLM.chat(model=settings.SUMMARY_MODEL, messages=[
+            {'role': 'user', 'content': prompt},
+        ], call_site="summary.merge")
+        return response['message']['content'].strip()
+
+    @staticmethod
+    def source_note(batch: list, item: dict):
+        """The note an item was extracted from: the one the model cited, else the newest in its batch."""
+        by_id = {n.id: n for n in batch}
+        return by_id.get(item.get("source_note"), batch[-1])
+
+    @staticmethod
+    async def save_extracted(db: AsyncSession, extracted: list[tuple[list, dict]]) -> list:
+        """
+        Idempotently store tasks/events from (batch notes, structured summary) pairs.
+        Items are fingerprinted (normalized text + origin note + date) and upserted in one
+        transaction; only items not seen before are inserted and embedded. Returns the new notes.
+        """
+        from app.models.base import MediaType, Note
+        import dateparser
+
+        task_notes = []
+        for batch, data in extracted:
+            for t in data.get("tasks", []):
+                task_content = t.get("task")
+                if not task_content: continue
+                origin = SummaryService.source_note(batch, t)
+                priority = t.get("priority", "Medium")
+                timeline = t.get("timeline", "Today")
+                task_notes.append(Note(
+                    content=task_content,
+                    media_type=MediaType.TEXT,
+                    tags=["todo", "ai-generated", priority, timeline],
+                    is_task=True,
+                    category=priority,
+                    is_completed=False,
+                    origin_note_id=origin.id,
+                    fingerprint=item_fingerprint("task", task_content, origin.id, origin.created_at),
+                ))
+
+        event_notes = []
+        for batch, data in extracted:
+            for e in data.get("events", []):
+                event_title = e.get("title")
+                event_time_str = e.get("date_time")
+                if not event_title or not event_time_str: continue
+                origin = SummaryService.source_note(batch, e)
+                # Parse Date relative to when the note was written, so re-extraction lands on the same day
+                base = origin.created_at or datetime.datetime.now()
+                event_dt = dateparser.parse(event_time_str, settings={'RELATIVE_BASE': base, 'PREFER_DATES_FROM': 'future'})
+                if not event_dt:
+                    print(f"Could not parse date for event: {event_time_str}")
+                    continue
+                event_notes.append(Note(
+                    content=event_title,
+                    media_type=MediaType.TEXT,
+                    tags=["event", "ai-generated"],
+                    is_task=True,
+                    category="Event",
+                    is_completed=False,
+                    origin_note_id=origin.id,
+                    event_at=event_dt,
+                    event_duration=e.get("duration_minutes", 60) or 60,
+                    fingerprint=item_fingerprint("event", event_title, origin.id, event_dt),
+                ))
+
+        # Conflict-check only events that aren't stored yet (a stored copy would clash with itself)
+        unique = {}
+        for note in event_notes:
+            unique.setdefault(note.fingerprint, note)
+        event_notes = list(unique.values())
+        stored = set()
+        fingerprints = [n.fingerprint for n in event_notes]
+        if fingerprints:
+            stored = await NoteService.known_fingerprints(db, fingerprints)
+        fresh_events = [n for n in event_notes if n.fingerprint not in stored]
+        conflicts = await SummaryService.find_batch_conflicts(
+            db, [(n.content, n.event_at, n.event_duration) for n in fresh_events]
+        )
+        for index, clashes in conflicts.items():
+            fresh_events[index].tags = fresh_events[index].tags + ["conflict"]
+            print(f"Event {fresh_events[index].content} at {fresh_events[index].event_at} clashes with {', '.join(clashes)}")
+
+        created = await NoteService.upsert_fingerprinted(db, task_notes + event_notes)
+        print(f"[Summary] Extracted {len(task_notes)} tasks, {len(event_notes)} events; {len(created)} new")
+        return created
+
+    @staticmethod
+    async def find_batch_conflicts(db: AsyncSession, events: list[tuple[str, datetime.datetime, int]]) -> dict[int, list[str]]:
+        """
+        Conflicts for a batch of new (title, start, duration_minutes) events, against the stored
+        calendar and each other. One window query + an interval tree instead of a query per event.
+        Returns {event index: [titles it clashes with]}.
+        """
+        if not events:
+            return {}
+        windows = [(start, start + datetime.timedelta(minutes=duration)) for _, start, duration in events]
+        stored = await NoteService.get_overlapping_events(db, min(s for s, _ in windows), max(e for _, e in windows))
+
+        tree = IntervalTree(
+            [Interval(n.event_at, n.event_end, (None, n.content)) for n in stored if n.event_end] +
+            [Interval(start, end, (i, events[i][0])) for i, (start, end) in enumerate(windows)]
+        )
+        conflicts = {}
+        for i, (start, end) in enumerate(windows):
+            clashes = [title for index, title in (hit.data for hit in tree.overlapping(start, end)) if index != i]
+            if clashes:
+                conflicts[i] = clashes
+        return conflicts
+
     @staticmethod
     async def get_latest_summary(db: AsyncSession) -> Summary:
-        stmt = select(Summary).order_by(desc(Summary.created_at)).limit(1)
+        stmt = select(Summary).order_by(desc(Summary.id)).limit(1) # id is the version; created_at has 1 s resolution
         result = await db.execute(stmt)
         return result.scalars().first()
 
@@ -151,17 +309,131 @@ class SummaryService:
     async def summarize_single_note(text: str) -> str:
         """
         Produce a concise summary for a large note.
+        Text beyond one context's worth is summarized hierarchically instead of truncated.
         """
-        # Truncate if insanely large to avoid context blowing
         if len(text) > 10000:
-            text = text[:10000] + "...(truncated)"
-            
-        prompt = Prompts.SUMMARY_SINGLE_NOTE_TEMPLATE.format(text=text)
+            from app.core.chunking import chunk_text
+            chunks = chunk_text(text)
+            summaries = [None] * len(chunks)
+            try:
+                async for index, summary in SummaryService.map_summaries(chunks):
+                    summaries[index] = summary
+            except Exception as e:
+                print(f"Single note summary failed: {e}")
+            return await SummaryService.reduce_summaries([s for s in summaries if s]) or text[:200] + "..."
+
         try:
-             response = await NeuroVaultLLM.chat(model=settings.SUMMARY_MODEL, messages=[
-                {'role': 'user', 'content': prompt},
-            ])
-             return response['message']['content'].strip()
+            return await SummaryService.summarize_chunk(text, call_site="summary.note")
         except Exception as e:
             print(f"Single note summary failed: {e}")
             return text[:200] + "..."
+
+    @staticmethod
+    async def summarize_chunk(text: str, call_site: str = "summary.chunk") -> str:
+        prompt = Prompts.SUMMARY_SINGLE_NOTE_TEMPLATE.format(text=text)
+        response = await NeuroVaultLLM.chat(model=settings.SUMMARY_MODEL, messages=[
+            {'role': 'user', 'content': prompt},
+        ], call_site=call_site)
+        return response['message']['content'].strip()
+
+    @staticmethod
+    async def map_summaries(texts: list[str]):
+        """
+        Summarize texts in parallel (at most SUMMARY_MAP_CONCURRENCY in flight).
+        Yields (index, summary) as each finishes; failed chunks are skipped (logged).
+        """
+        slots = asyncio.Semaphore(settings.SUMMARY_MAP_CONCURRENCY)
+
+        async def run(index: int, text: str):
+            async with slots:
+                try:
+                    return index, await SummaryService.summarize_chunk(text)
+                except Exception as e:
+                    print(f"[Summary] Chunk {index} failed: {e}")
+                    return index, None
+
+        tasks = [asyncio.create_task(run(i, t)) for i, t in enumerate(texts)]
+        try:
+            for finished in asyncio.as_completed(tasks):
+                index, summary = await finished
+                if summary:
+                    yield index, summary
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    @staticmethod
+    async def reduce_summaries(summaries: list[str]) -> str:
+        """
+        Hierarchical reduce: groups of section summaries (up to SUMMARY_BATCH_CHARS) are combined
+        in parallel, level by level, until one call can produce the final summary.
+        If a combine call fails, the section summaries themselves are returned (concatenated, trimmed).
+        """
+        if len(summaries) <= 1:
+            return summaries[0] if summaries else ""
+
+        async def combine(group: list[str], length: str) -> str:
+            prompt = Prompts.SUMMARY_REDUCE_TEMPLATE.format(
+                length=length, summaries="\n".join(f"{i + 1}. {s}" for i, s in enumerate(group))
+            )
+            response = await NeuroVaultLLM.chat(model=settings.SUMMARY_MODEL, messages=[
+                {'role': 'user', 'content': prompt},
+            ], call_site="summary.reduce")
+            return response['message']['content'].strip()
+
+        slots = asyncio.Semaphore(settings.SUMMARY_MAP_CONCURRENCY)
+
+        async def combine_limited(group: list[str]) -> str:
+            async with slots:
+                return await combine(group, "one short paragraph")
+
+        level = summaries
+        while sum(len(s) for s in level) > settings.SUMMARY_BATCH_CHARS:
+            groups, current, size = [], [], 0
+            for summary in level:
+                if current and size + len(summary) > settings.SUMMARY_BATCH_CHARS:
+                    groups.append(current)
+                    current, size = [], 0
+                current.append(summary)
+                size += len(summary)
+            groups.append(current)
+            if len(groups) == len(level):
+                break # each summary alone fills a batch; reducing further cannot shrink the level
+            try:
+                level = await asyncio.gather(*(combine_limited(g) for g in groups))
+            except Exception as e:
+                print(f"[Summary] Reduce failed: {e}")
+                return SummaryService.concat_summaries(summaries)
+        try:
+            return await combine(level, "a concise summary of 2-4 sentences")
+        except Exception as e:
+            print(f"[Summary] Reduce failed: {e}")
+            return SummaryService.concat_summaries(level)
+
+    @staticmethod
+    def concat_summaries(summaries: list[str]) -> str:
+        """Fallback when the reduce step fails: the summaries as-is, within one batch."""
+        joined = " ".join(summaries)
+        if len(joined) <= settings.SUMMARY_BATCH_CHARS:
+            return joined
+        return joined[:settings.SUMMARY_BATCH_CHARS].rsplit(" ", 1)[0] + "..."
+
+    @staticmethod
+    async def summarize_document(db: AsyncSession, chunk_notes: list) -> str:
+        """
+        Map-reduce summary of a chunked document (PDF chunk notes, in order).
+        Chunk summaries are cached on each chunk note's `summary`, so a retry only
+        summarizes the chunks that are still missing.
+        """
+        missing = [n for n in chunk_notes if not n.summary]
+        print(f"[Summary] Document: {len(chunk_notes)} chunks, {len(chunk_notes) - len(missing)} cached")
+        try:
+            async for index, summary in SummaryService.map_summaries([n.content for n in missing]):
+                missing[index].summary = summary
+                await db.commit() # cache as soon as each chunk is done
+        except Exception as e:
+            print(f"[Summary] Document map failed: {e}")
+        summary = await SummaryService.reduce_summaries([n.summary for n in chunk_notes if n.summary])
+        if not summary and chunk_notes:
+            summary = chunk_notes[0].content[:200] + "..."
+        return summary
@@ -3,13 +3,25 @@ from app.config import settings
 
 class VectorService:
     @classmethod
-    async def embed_text(cls, text: str) -> list[float]:
+    async def embed_text(cls, text: str, call_site: str = "embed") -> list[float]:
         """
         Generate embeddings using Ollama (Async).
         """
         try:
-            response = await NeuroVaultLLM.embed(model=settings.EMBEDDING_MODEL, input_text=text)
+            response = await NeuroVaultLLM.embed(model=settings.EMBEDDING_MODEL, input_text=text, call_site=call_site)
             return response["embedding"]
         except Exception as e:
             print(f"Ollama embedding failed: {e}")
             raise e
+
+    @classmethod
+    async def embed_texts(cls, texts: list[str], call_site: str = "embed") -> list[list[float]]:
+        """
+        Generate embeddings for many texts in one provider round-trip.
+        """
+        try:
+            response = await NeuroVaultLLM.embed_batch(model=settings.EMBEDDING_MODEL, inputs=texts, call_site=call_site)
+            return response["embeddings"]
+        except Exception as e:
+            print(f"Batch embedding failed: {e}")
+            raise e
@@ -1,65 +1,127 @@
+import asyncio
 import json
 from datetime import datetime
 from app.core.llm import NeuroVaultLLM
-import httpx
+from app.core.resilience import LLMUnavailableError, llm_breaker
+from app.core.voice_engine import voice_engine
+from app.core.tts_cache import tts_cache
 import base64
+from pathlib import Path
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.config import settings
 from app.core.prompts import Prompts
+from app.core.context_packer import ContextPacker
+from app.core.command_parser import CommandParser
+from app.core.intent_router import intent_router
 from app.services.note_service import NoteService
+from app.services.vector_service import VectorService
 from app.schemas.note import NoteCreate
 
-VOICE_ENGINE_URL = "http://localhost:8001"
+AUDIO_MIME_TYPES = {"wav": "audio/wav", "ogg": "audio/ogg", "opus": "audio/ogg", "mp3": "audio/mpeg"}
+
+def audio_mime(format: str = None) -> str:
+    return AUDIO_MIME_TYPES.get(format or settings.TTS_AUDIO_FORMAT, "audio/wav")
+
+# Fixed spoken responses; synthesized once at startup so they play instantly
+CANNED_RESPONSES = (
+    "Note saved.",
+    "Processing note...",
+    "I didn't catch that.",
+    "I didn't hear anything.",
+    "I did not hear anything.",
+    "Error processing command.",
+    "Sorry, I had an error.",
+)
+
+# Used only when the LLM is unavailable (deadline hit / circuit open)
+SEARCH_PREFIXES = ("search", "find", "look up", "what did i", "when did i", "show me")
+ACTION_PREFIXES = ("remind", "schedule", "add", "buy", "call", "email", "book", "set", "todo", "to do") + SEARCH_PREFIXES
+
+# Fire-and-forget work (e.g. tagging) kept referenced until it finishes
+_background_tasks: set[asyncio.Task] = set()
 
 class VoiceService:
     @staticmethod
-    async def transcribe(audio_bytes: bytes) -> str:
+    async def transcribe(audio_bytes: bytes, mode: str = None) -> str:
         """
         Transcribe audio using the external Voice Engine (Faster Whisper).
+        `mode` ("command", "note", "dictation") hints the decoding tier; by default the engine picks it from the audio length.
         """
         try:
-            async with httpx.AsyncClient() as client:
-                files = {"file": ("audio.wav", audio_bytes, "audio/wav")}
-                resp = await client.post(f"{VOICE_ENGINE_URL}/stt", files=files, timeout=30.0)
-                if resp.status_code == 200:
-                    return resp.json().get("text", "")
-                else:
-                    print(f"STT Error {resp.status_code}: {resp.text}")
-                    return ""
+            files = {"file": ("audio.wav", audio_bytes, "audio/wav")}
+            data = {"mode": mode} if mode else None
+            resp = await voice_engine.post("/stt", files=files, data=data, timeout=30.0)
+            if resp.status_code == 200:
+                return resp.json().get("text", "")
+            else:
+                print(f"STT Error {resp.status_code}: {resp.text}")
+                return ""
         except Exception as e:
             print(f"STT Connection Error: {e}")
             return ""
 
     @staticmethod
-    async def process_audio(db: AsyncSession, audio_bytes: bytes, background_tasks=None) -> dict:
+    async def transcribe_long(file_path: str, mode: str = None):
+        """
+        Long-form transcription via the engine's `/stt/long` (VAD chunks transcribed in parallel).
+        Async generator of NDJSON events: "start", "segment" (absolute start/end seconds, completion order), "done" (text, rtf).
+        """
+        import os
+        data = {"mode": mode} if mode else None
+        audio_bytes = await asyncio.to_thread(Path(file_path).read_bytes)
+        files = {"file": (os.path.basename(file_path), audio_bytes, "application/octet-stream")}
+        async with voice_engine.client.stream("POST", "/stt/long", files=files, data=data, timeout=None) as resp:
+            if resp.status_code != 200:
+                detail = (await resp.aread()).decode(errors="ignore")
+                raise RuntimeError(f"Long-form STT Error {resp.status_code}: {detail}")
+            async for line in resp.aiter_lines():
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if event.get("type") == "error":
+                    raise RuntimeError(f"Long-form STT Error: {event.get('detail')}")
+                yield event
+
+    @staticmethod
+    async def process_audio(db: AsyncSession, audio_bytes: bytes, background_tasks=None, voice: str = None) -> dict:
         """
         Transcribe audio, SAVE IT, and process command.
         """
         try:
-            # 1. Save Audio File
             import uuid
             import os
-            
-            audio_filename = f"voice_{uuid.uuid4()}.wav"
-            # Ensure directory exists
+
             audio_dir = "dumps/audio"
-            os.makedirs(audio_dir, exist_ok=True)
-            
-            file_path = os.path.join(audio_dir, audio_filename)
-            
-            with open(file_path, "wb") as f:
-                f.write(audio_bytes)
-                
-            print(f"[Voice] Audio saved to: {file_path}")
-            
-            # 2. Transcribe
+            file_path = os.path.join(audio_dir, f"voice_{uuid.uuid4()}.wav")
+
+            def save_audio():
+                os.makedirs(audio_dir, exist_ok=True)
+                with open(file_path, "wb") as f:
+                    f.write(audio_bytes)
+
+            # 1. Save (worker thread) and transcribe concurrently; the write hides behind STT latency
+            save_task = asyncio.create_task(asyncio.to_thread(save_audio))
             text = await VoiceService.transcribe(audio_bytes)
-                
+
+            # 2. Link the recording only once it is on disk; a failed write doesn't fail the command
+            try:
+                await save_task
+                print(f"[Voice] Audio saved to: {file_path}")
+            except Exception as e:
+                print(f"[Voice] Could not save audio: {e}")
+                file_path = None
+
             if not text:
                 return {"response": "I didn't catch that."}
-                
+
             # 3. Process Text with Reference to Audio File
-            return await VoiceService.process_command(db, text, audio_path=file_path, background_tasks=background_tasks)
+            result = await VoiceService.process_command(db, text, audio_path=file_path, background_tasks=background_tasks, voice=voice)
+
+            # 4. Re-encode the raw recording once the response is out
+            from app.services.audio_archive_service import AudioArchiveService
+            if background_tasks and file_path:
+                background_tasks.add_task(AudioArchiveService.archive, file_path)
+            return result
             
         except Exception as e:
             import traceback
@@ -73,46 +135,26 @@ class VoiceService:
         Check if the proposed time overlaps with any existing event.
         Returns the content/name of the conflicting event, or None.
         """
-        from app.models.base import Note
-        from sqlalchemy import select, and_
         from datetime import timedelta
         
         end_time = start_time + timedelta(minutes=duration_minutes)
-        
-        # Query active notes that have an event_at time
-        # We need to fetch them to calculate end times (since DB doesn't store end_time explicitly yet for query, 
-        # but we can do a broad check or fetch all today's events)
-        # Proper SQL overlap check is harder without stored end_time.
-        # Let's fetch active events around the target time window for simplicity.
-        # Or better, fetch all events with event_at is not null. 
-        # For scale, we should filter by day, but let's do all for now or filter > now.
-        
-        stmt = select(Note).where(
-            Note.is_active == True,
-            Note.event_at.is_not(None)
-        )
-        result = await db.execute(stmt)
-        existing_events = result.scalars().all()
-        
-        print(f"[DEBUG] check_conflict: Found {len(existing_events)} existing events.")
-        
-        for event in existing_events:
-            # Calculate existing event window
-            # Uses default 60 if event_duration is missing (should be there after schema update)
-            existing_start = event.event_at
-            existing_duration = getattr(event, "event_duration", 60) 
-            existing_end = existing_start + timedelta(minutes=existing_duration)
-            
-            print(f"[DEBUG] Checking against '{event.content}': {existing_start} - {existing_end} vs Target: {start_time} - {end_time}")
-            
-            # Check Overlap: (StartA < EndB) and (EndA > StartB)
-            if (start_time < existing_end) and (end_time > existing_start):
-                return event.content
-                
-        return None
+        overlapping = await NoteService.get_overlapping_events(db, start_time, end_time, limit=1)
+        return overlapping[0].content if overlapping else None
 
     @staticmethod
-    async def process_command(db: AsyncSession, text: str, audio_path: str = None, background_tasks=None, generate_audio: bool = True) -> dict:
+    def fallback_action(text: str) -> dict | None:
+        """
+        Keyword heuristic used when the router/parser LLM is unavailable.
+        Returns ActionResponse-shaped data for imperative commands, None for plain notes.
+        """
+        lowered = text.strip().lower()
+        if not lowered.startswith(ACTION_PREFIXES):
+            return None
+        action_type = "SEARCH" if lowered.startswith(SEARCH_PREFIXES) else "TASK"
+        return {"type": action_type, "summary": text.strip(), "category": "General", "duration_minutes": 60}
+
+    @staticmethod
+    async def process_command(db: AsyncSession, text: str, audio_path: str = None, background_tasks=None, generate_audio: bool = True, interpretation: dict | None = None, voice: str = None) -> dict:
         """
         Process a voice command.
         - Always creates a 'Source Note' first (Processing State).
@@ -139,7 +181,7 @@ class VoiceService:
             from db.database import async_session_maker
             # Create new session for background work
             async with async_session_maker() as session:
-                return await VoiceService.analyze_and_update_note(session, note_id, text)
+                return await VoiceService.analyze_and_update_note(session, note_id, text, interpretation=interpretation)
 
         # 3. Dispatch based on Mode
         if not generate_audio and background_tasks:
@@ -156,81 +198,155 @@ class VoiceService:
             # VOICE MODE: Await result (Interactive)
             # We reuse the logic but wait for it to get the audio/response
             # Note: We can reuse the SAME 'db' session here since we are awaiting before return
-            result = await VoiceService.analyze_and_update_note(db, source_note.id, text)
+            result = await VoiceService.analyze_and_update_note(db, source_note.id, text, interpretation=interpretation)
             
             # Generate Audio
             audio_b64 = None
             if generate_audio and result.get("response"):
-                 audio_b64 = await VoiceService.synthesize_audio(result.get("response"))
+                 audio_b64 = await VoiceService.synthesize_audio(result.get("response"), voice=voice)
             
             result["audio"] = audio_b64
             return result
 
     @staticmethod
-    async def analyze_and_update_note(db: AsyncSession, note_id: int, text: str) -> dict:
+    async def interpret(text: str) -> dict:
+        """
+        Understand a command in at most one LLM call.
+        Returns {'intent': "ACTION"|"SAVE", 'action': ActionResponse-shaped dict or None,
+        'note': {'tags', 'mentioned_entities'} (None = tag later), 'source': "rules"|"knn"|"llm"|"heuristic"}
+        and, for kNN-routed searches, the utterance's 'query_vector'.
+        """
+        # Heuristic: If > 100 words, it's definitely a Note (SAVE).
+        word_count = len(text.split())
+        if word_count > 100:
+            print(f"[Voice] Word count {word_count} > 100. Force SAVE.")
+            return await VoiceService.llm_interpret(text, force_save=True)
+
+        # Fast path: common commands parsed by grammar + date parser, no model call
+        parsed = CommandParser.parse(text)
+        if parsed:
+            print(f"[Voice] Fast path: {parsed['type']} '{parsed['summary']}'")
+            return {"intent": "ACTION", "action": parsed, "note": {}, "source": "rules"}
+
+        # Nearest-neighbour routing on the utterance embedding; the same vector serves the search
+        routed = await VoiceService.route_by_embedding(text)
+        if routed:
+            return routed
+        return await VoiceService.llm_interpret(text)
+
+    @staticmethod
+    async def route_by_embedding(text: str) -> dict | None:
+        """Confident SEARCH / SAVE from the kNN intent router, else None (ACTION needs the LLM's fields)."""
+        if not intent_router.ready:
+            return None # still warming in the background (main.py); never wait on it here
+        try:
+            vector = await VectorService.embed_text(text, call_site="embed.search")
+        except Exception as e:
+            print(f"[Voice] Embedding router unavailable ({e})")
+            return None
+
+        label, _ = intent_router.classify(vector)
+        if label == "SEARCH":
+            action = {"type": "SEARCH", "summary": text, "due_date": None, "time": None,
+                      "priority": 4, "category": "General", "duration_minutes": 60}
+            return {"intent": "ACTION", "action": action, "note": {}, "source": "knn", "query_vector": vector}
+        if label == "SAVE":
+            return {"intent": "SAVE", "action": None, "note": None, "source": "knn"}
+        return None
+
+    @staticmethod
+    async def llm_interpret(text: str, force_save: bool = False) -> dict:
+        """The single structured LLM call (intent + action fields + note tags)."""
+        from pydantic import BaseModel
+        from typing import Literal, Optional
+
+        class CommandResponse(BaseModel):
+            intent: Literal["ACTION", "SAVE"]
+            type: Optional[Literal["TASK", "EVENT", "SEARCH"]] = None
+            summary: Optional[str] = None
+            due_date: Optional[str] = None
+            time: Optional[str] = None
+            priority: int = 4
+            category: Literal["Work", "Personal", "Health", "Finance", "General"] = "General"
+            duration_minutes: int = 60
+            tags: list[str] = []
+            mentioned_entities: list[str] = []
+
+        print(f"[Voice] Interpreting with LLM...")
+        try:
+            res = await NeuroVaultLLM.chat(
+                model=settings.SUMMARY_MODEL,
+                messages=[{"role": "user", "content": Prompts.VOICE_COMMAND_PROMPT.format(
+                    text=text, current_time=datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                )}],
+                format=CommandResponse.model_json_schema(),
+                call_site="voice.command"
+            )
+            data = json.loads(res['message']['content'])
+        except LLMUnavailableError as e:
+            # Keep imperative commands as undated tasks rather than losing them
+            action = None if force_save else VoiceService.fallback_action(text)
+            print(f"[Voice] Interpreter unavailable ({e}). Heuristic: {'ACTION' if action else 'SAVE'}")
+            return {"intent": "ACTION" if action else "SAVE", "action": action, "note": {}, "source": "heuristic"}
+
+        intent = "SAVE" if force_save else data.get("intent", "SAVE")
+        print(f"[Voice] Interpretation: {intent}")
+        action = None
+        if intent == "ACTION":
+            action = {k: data.get(k) for k in ("type", "summary", "due_date", "time", "priority", "category", "duration_minutes")}
+            action["type"] = action["type"] or "TASK"
+            action["summary"] = action["summary"] or text
+            action["category"] = action["category"] or "General"
+            action["duration_minutes"] = action["duration_minutes"] or 60
+        note = {"tags": data.get("tags") or [], "mentioned_entities": data.get("mentioned_entities") or []}
+        return {"intent": intent, "action": action, "note": note, "source": "llm"}
+
+    @staticmethod
+    def note_tags(note_data: dict) -> list[str]:
+        tags = list(note_data.get("tags", []))
+        if "note" not in tags: tags.append("note")
+        
+        # We append entities to tags for searchability? Or just store in summary?
+        # For now, let's add entities as tags
+        entities = note_data.get("mentioned_entities", [])
+        safe_entities = [e.replace(" ", "_").lower() for e in entities]
+        tags.extend(safe_entities)
+        
+        # Dedup tags
+        return list(set(tags))
+
+    @staticmethod
+    async def tag_note(note_id: int, text: str):
+        """Background metadata extraction for notes routed as SAVE without the LLM."""
+        from db.database import async_session_maker
+        try:
+            interpretation = await VoiceService.llm_interpret(text, force_save=True)
+            if not interpretation["note"]:
+                return
+            async with async_session_maker() as session:
+                await NoteService.update_note(session, note_id, {"tags": VoiceService.note_tags(interpretation["note"])})
+            print(f"[Voice] Tagged note {note_id}")
+        except Exception as e:
+            print(f"[Voice] Tagging note {note_id} failed: {e}")
+
+    @staticmethod
+    async def analyze_and_update_note(db: AsyncSession, note_id: int, text: str, interpretation: dict | None = None) -> dict:
         """
-        Core Logic: Two-Stage Pipeline (Router -> Parser)
+        Core Logic: interpret (rules, else one LLM call) -> apply.
         """
         response_text = ""
         category_intent = "SAVE" # Default
         result_list_for_ui = []
         
-        # Imports needed for logic
-        from pydantic import BaseModel
-        from typing import Literal, Optional
         from datetime import datetime
         
         try:
-            # --- PRE-PROCESSING ---
-            # Heuristic: If > 100 words, it's definitely a Note (SAVE).
-            word_count = len(text.split())
-            if word_count > 100:
-                print(f"[Voice] Word count {word_count} > 100. Skipping Router. Force SAVE.")
-                category_intent = "SAVE"
-            else:
-                # --- STAGE 1: ROUTER ---
-                print(f"[Voice] Stage 1: Router Analysis...")
-                from pydantic import BaseModel
-                from typing import Literal, Optional
-                
-                class RouterResponse(BaseModel):
-                    category: Literal["ACTION", "SAVE"]
-                    reasoning: Optional[str] = None
-                    confidence: float
-                
-                router_res = await NeuroVaultLLM.chat(
-                    model=settings.SUMMARY_MODEL,
-                    messages=[{"role": "user", "content": Prompts.ROUTER_PROMPT.format(text=text)}],
-                    format=RouterResponse.model_json_schema()
-                )
-                router_data = json.loads(router_res['message']['content'])
-                category_intent = router_data.get("category", "SAVE")
-                print(f"[Voice] Router Decision: {category_intent} (Conf: {router_data.get('confidence')})")
-
-            # --- STAGE 2: PARSER ---
-            from datetime import datetime
-            now = datetime.now()
-            current_time_str = now.strftime("%Y-%m-%d %H:%M:%S")
+            # --- INTERPRET (skipped when the caller already did it, e.g. speculatively while streaming STT) ---
+            interpretation = interpretation or await VoiceService.interpret(text)
+            category_intent = interpretation["intent"]
 
             if category_intent == "ACTION":
-                # --- STAGE 2A: ACTION PARSER ---
-                print(f"[Voice] Stage 2A: Action Parser...")
-                
-                class ActionResponse(BaseModel):
-                    type: Literal["TASK", "EVENT", "SEARCH"]
-                    summary: str
-                    due_date: Optional[str] = None
-                    time: Optional[str] = None
-                    priority: int = 4
-                    category: Literal["Work", "Personal", "Health", "Finance", "General"] = "General"
-                    duration_minutes: int = 60
-
-                action_res = await NeuroVaultLLM.chat(
-                    model=settings.SUMMARY_MODEL,
-                    messages=[{"role": "user", "content": Prompts.ACTION_PARSER_PROMPT.format(text=text, current_time=current_time_str)}],
-                    format=ActionResponse.model_json_schema()
-                )
-                action_data = json.loads(action_res['message']['content'])
+                action_data = interpretation["action"]
                 action_type = action_data.get("type", "TASK")
                 
                 print(f"[Voice] Action Type: {action_type}")
@@ -239,7 +355,7 @@ class VoiceService:
                     # SEARCH LOGIC
                     await NoteService.delete_note(db, note_id) # Cleanup temp note
                     query = action_data.get("summary", text)
-                    results = await NoteService.search_notes(db, query, limit=5)
+                    results = await NoteService.search_notes(db, query, limit=5, query_vector=interpretation.get("query_vector"))
                     
                     for r in results:
                         n = r['note']
@@ -251,10 +367,19 @@ class VoiceService:
                     if not results:
                         response_text = f"No results for '{query}'."
                     else:
-                        context_str = "\n".join([f"- {r['note'].content}" for r in results])
+                        packed = await ContextPacker(settings.VOICE_CONTEXT_TOKEN_BUDGET).pack(
+                            text,
+                            [r['note'].content for r in results],
+                            scores=[-r['distance'] for r in results],
+                            site="voice.search"
+                        )
+                        context_str = "\n".join([f"- {c}" for c in packed.chunks])
                         summary_prompt = Prompts.VOICE_SEARCH_SUMMARY_TEMPLATE.format(text=text, context_str=context_str)
-                        s_res = await NeuroVaultLLM.generate(model=settings.SUMMARY_MODEL, prompt=summary_prompt)
-                        response_text = s_res['response']
+                        try:
+                            s_res = await NeuroVaultLLM.generate(model=settings.SUMMARY_MODEL, prompt=summary_prompt, call_site="voice.search_summary")
+                            response_text = s_res['response']
+                        except LLMUnavailableError:
+                            response_text = f"Top match: {results[0]['note'].content[:200]}"
                         
                 else: 
                     # TASK / EVENT LOGIC
@@ -300,33 +425,9 @@ class VoiceService:
                          response_text = f"Added '{content}' to {cat} list."
 
             else:
-                # --- STAGE 2B: NOTE PROCESSOR (SAVE) ---
-                print(f"[Voice] Stage 2B: Note Processor...")
-                
-                class NoteResponse(BaseModel):
-                    generated_title: str
-                    tags: list[str]
-                    mentioned_entities: list[str]
-                    is_voice_transcript: bool
-
-                note_res = await NeuroVaultLLM.chat(
-                    model=settings.SUMMARY_MODEL,
-                    messages=[{"role": "user", "content": Prompts.NOTE_PROCESSOR_PROMPT.format(text=text)}],
-                    format=NoteResponse.model_json_schema()
-                )
-                note_data = json.loads(note_res['message']['content'])
-                
-                tags = note_data.get("tags", [])
-                if "note" not in tags: tags.append("note")
-                
-                # We append entities to tags for searchability? Or just store in summary?
-                # For now, let's add entities as tags
-                entities = note_data.get("mentioned_entities", [])
-                safe_entities = [e.replace(" ", "_").lower() for e in entities]
-                tags.extend(safe_entities)
-                
-                # Dedup tags
-                tags = list(set(tags))
+                # --- SAVE: the note is already stored; add the interpreted metadata ---
+                note_data = interpretation.get("note")
+                tags = VoiceService.note_tags(note_data or {})
                 
                 update_data = {
                     "is_processing": False,
@@ -337,6 +438,11 @@ class VoiceService:
                     # Let's just update tags and status.
                 }
                 await NoteService.update_note(db, note_id, update_data)
+                if note_data is None:
+                    # Routed locally: confirm now, tag with one LLM call in the background
+                    task = asyncio.create_task(VoiceService.tag_note(note_id, text))
+                    _background_tasks.add(task)
+                    task.add_done_callback(_background_tasks.discard)
                 response_text = "Note saved."
 
         except Exception as e:
@@ -354,24 +460,54 @@ class VoiceService:
         }
 
     @staticmethod
-    async def synthesize_audio(text: str) -> str:
+    async def synthesize_audio_bytes(text: str, voice: str = None, speed: float = 1.0, format: str = None, bitrate: int = None) -> bytes | None:
         """
-        Call Voice Engine for Kokoro TTS.
+        Call Voice Engine for Kokoro TTS. Returns encoded audio bytes (TTS_AUDIO_FORMAT by default).
+        Memoized by (text, voice, speed, format) in the TTS cache.
         """
-        try:
-            async with httpx.AsyncClient() as client:
-                resp = await client.post(f"{VOICE_ENGINE_URL}/tts", json={"text": text}, timeout=30.0)
+        voice = voice or settings.VOICE_DEFAULT_VOICE
+        format = format or settings.TTS_AUDIO_FORMAT
+        bitrate = bitrate or (settings.TTS_AUDIO_BITRATE if format != "wav" else None)
+        cache_format = f"{format}@{bitrate}k" if bitrate else format
+
+        async def synthesize():
+            try:
+                resp = await voice_engine.post("/tts", json={"text": text, "voice": voice, "speed": speed, "encoding": format, "bitrate": bitrate}, timeout=30.0)
                 if resp.status_code == 200:
-                    return resp.json().get("audio")
+                    return resp.content
                 else:
                     print(f"TTS Error {resp.status_code}: {resp.text}")
                     return None
-        except Exception as e:
-            print(f"TTS Connection Error: {e}")
-            return None
+            except Exception as e:
+                print(f"TTS Connection Error: {e}")
+                return None
+
+        return await tts_cache.get_or_synthesize(text, voice, speed, cache_format, synthesize)
+
+    @staticmethod
+    async def prewarm_tts() -> bool:
+        """
+        Fill the TTS cache with canned responses (disk hits make this cheap after the first run).
+        False while the engine does not answer at all, so startup can retry (resilience.retry_until).
+        """
+        warmed = 0
+        for text in CANNED_RESPONSES:
+            if await VoiceService.synthesize_audio_bytes(text):
+                warmed += 1
+        print(f"[Voice] TTS cache prewarmed: {warmed}/{len(CANNED_RESPONSES)} canned responses")
+        return warmed > 0
 
     @staticmethod
-    async def process_pdf_audio(db: AsyncSession, audio_bytes: bytes, note_id: int) -> dict:
+    async def synthesize_audio(text: str, voice: str = None) -> str:
+        """
+        Base64 audio for JSON responses (compatibility mode); MIME type via audio_mime().
+        Encoded once here; the engine itself sends binary.
+        """
+        audio = await VoiceService.synthesize_audio_bytes(text, voice=voice)
+        return base64.b64encode(audio).decode("utf-8") if audio else None
+
+    @staticmethod
+    async def process_pdf_audio(db: AsyncSession, audio_bytes: bytes, note_id: int, voice: str = None) -> dict:
         """
         Specialized flow for chatting with a PDF via Voice.
         1. Transcribe
@@ -381,7 +517,7 @@ class VoiceService:
         """
         try:
             # 1. Transcribe
-            text = await VoiceService.transcribe(audio_bytes)
+            text = await VoiceService.transcribe(audio_bytes, mode="command") # Questions: latency over beam search
             if not text:
                 return {"response": "I didn't hear anything.", "audio": None}
             
@@ -390,21 +526,24 @@ class VoiceService:
             # 2. Get Context from PDF
             # We assume note_id is the parent PDF note.
             context_chunks = await NoteService.get_note_context(db, note_id, text, top_k=3)
-            context_str = "\n".join(context_chunks)
+            packed = await ContextPacker(settings.VOICE_CONTEXT_TOKEN_BUDGET).pack(text, context_chunks, site="voice.pdf")
+            context_str = packed.as_text("\n")
             
             # 3. Generate Answer
             system_prompt = Prompts.VOICE_PDF_RAG_TEMPLATE.format(
-                context=context_chunks if context_chunks else "No relevant context found in document.",
-                text=text
+                context=context_str if context_str else "No relevant context found in document."
             )
             
             print(f"[VoicePDF] Generating answer with context len {len(context_str)}...")
-            llm_res = await NeuroVaultLLM.generate(model=settings.SUMMARY_MODEL, prompt=system_prompt)
-            answer = llm_res['response']
+            llm_res = await NeuroVaultLLM.chat(model=settings.SUMMARY_MODEL, messages=[
+                {'role': 'system', 'content': system_prompt},
+                {'role': 'user', 'content': Prompts.VOICE_QUESTION_TEMPLATE.format(text=text)}
+            ], call_site="voice.pdf")
+            answer = llm_res['message']['content']
             print(f"[VoicePDF] Answer: {answer}")
             
             # 4. Generate Audio
-            audio_b64 = await VoiceService.synthesize_audio(answer)
+            audio_b64 = await VoiceService.synthesize_audio(answer, voice=voice)
             
             return {
                 "response": answer,
@@ -417,95 +556,108 @@ class VoiceService:
             return {"response": "Sorry, I had an error.", "audio": None}
 
     @staticmethod
-    async def generate_pdf_response_stream(text: str, context_chunks: list[str], note_id: int):
+    async def pdf_response_events(text: str, context_chunks: list[str], note_id: int, voice: str = None):
         """
-        Pure generator that yields SSE events.
+        Transport-neutral event stream for voice chat with a PDF.
+        Yields dicts: {'query', 'audio_mime'}, {'token'}, {'type': 'verification', ...}, {'audio': <bytes>}, {'done'} / {'error'}.
+        Sentences go to TTS as soon as they complete (at most VOICE_TTS_MAX_IN_FLIGHT at once)
+        and audio is emitted in order while generation continues. The audit runs alongside
+        the remaining speech instead of gating it.
         Does NOT rely on DB. Context must be provided.
         """
+        import asyncio
+        from app.core.text_utils import SentenceStream
+
+        tts_slots = asyncio.Semaphore(settings.VOICE_TTS_MAX_IN_FLIGHT)
+        pending_audio = [] # TTS tasks in sentence order
+        audit_task = None
+
+        async def synthesize(sentence: str):
+            async with tts_slots:
+                print(f"[VoiceStream] Synthesizing: {sentence[:20]}...")
+                return await VoiceService.synthesize_audio_bytes(sentence, voice=voice)
+
+        def ready_audio():
+            # Only the head of the queue may be emitted, to keep playback order
+            while pending_audio and pending_audio[0].done():
+                audio = pending_audio.pop(0).result()
+                if audio:
+                    yield {'audio': audio}
+
         try:
-             # Yield User Query for UI
-            yield f"data: {json.dumps({'query': text})}\n\n"
+            # Yield User Query for UI (and how to play the audio frames that follow)
+            yield {'query': text, 'audio_mime': audio_mime()}
             
+            packed = await ContextPacker(settings.VOICE_CONTEXT_TOKEN_BUDGET).pack(text, context_chunks, site="voice.stream")
             system_prompt = Prompts.VOICE_STREAM_SYSTEM_TEMPLATE.format(
-                context=" ".join(context_chunks),
-                text=text
+                context=packed.as_text(" ")
             )
+            messages = [
+                {'role': 'system', 'content': system_prompt},
+                {'role': 'user', 'content': Prompts.VOICE_QUESTION_TEMPLATE.format(text=text)}
+            ]
             
-            # 3. Stream LLM (Text Only)
-            sentence_buffer = ""
+            # 3. Stream LLM, handing finished sentences to TTS as they appear
             full_answer = ""
+            sentences = SentenceStream()
             
             print(f"[VoiceStream] Streaming answer for: {text}")
-            
-            # Use NeuroVaultLLM for streaming
-            import re
 
-            # Async stream iteration - TEXT ONLY
-            async for chunk in await NeuroVaultLLM.chat(model=settings.SUMMARY_MODEL, messages=[{'role': 'user', 'content': system_prompt}], stream=True):
+            async for chunk in await NeuroVaultLLM.chat(model=settings.SUMMARY_MODEL, messages=messages, stream=True, call_site="voice.stream"):
                 token = chunk['message']['content']
-                yield f"data: {json.dumps({'token': token})}\n\n"
+                yield {'token': token}
                 full_answer += token
-            
-            # 4. Verification (Gemma 3)
-            final_text_to_speak = full_answer
-            try:
-                from app.agents.auditor import AuditorAgent
-                auditor = AuditorAgent()
-                print(f"[VoiceStream] Verifying answer...")
-                verification = await auditor.verify(text, full_answer, context_chunks)
-                
-                is_valid = verification.get("is_valid")
-                correction = verification.get("correction")
-                
-                v_data = json.dumps({
-                    "verified": is_valid,
-                    "correction": correction,
-                    "reason": verification.get("reason"),
-                    "type": "verification"
-                })
-                yield f"data: {v_data}\n\n"
-
-                # If verification failed and we have a correction, speak the CORRECTION instead?
-                # Or just speak the original? Usually safer to speak the correction if it's a major error.
-                # For now, let's speak the original unless the user wants strictness. 
-                # Use the original full_answer to match what was typed on screen.
-                # If we want to speak the correction, we should update final_text_to_speak.
-                # final_text_to_speak = correction if correction else full_answer
-                
-            except Exception as e:
-                print(f"[VoiceStream] Verification failed: {e}")
+                for sentence in sentences.feed(token):
+                    pending_audio.append(asyncio.create_task(synthesize(sentence)))
+                for event in ready_audio():
+                    yield event
 
-            # 5. Audio Generation (Post-Verification)
-            # Now split the full text into sentences and stream audio
-            print(f"[VoiceStream] Generating audio for verified text...")
-            
-            # Split into sentences using regex
-            sentences = re.split(r'([.?!]+[\s]+)', final_text_to_speak)
-            
-            # The regex split keeps the delimiters. 
-            # ["Hello", ". ", "How are you", "? ", ""]
-            # We need to re-assemble or just iterate carefully.
+            rest = sentences.flush()
+            if rest:
+                pending_audio.append(asyncio.create_task(synthesize(rest)))
             
-            current_chunk = ""
-            for part in sentences:
-                current_chunk += part
-                # If the part is a delimiter (ends with space/punctuation), it's a sentence end.
-                if re.search(r'[.?!]+[\s]*$', part):
-                    if len(current_chunk.strip()) > 0:
-                        print(f"[VoiceStream] Synthesizing: {current_chunk[:20]}...")
-                        audio_b64 = await VoiceService.synthesize_audio(current_chunk)
-                        if audio_b64:
-                            yield f"data: {json.dumps({'audio': audio_b64})}\n\n"
-                        current_chunk = ""
-            
-            # Flush absolute last chunk
-            if current_chunk.strip():
-                 audio_b64 = await VoiceService.synthesize_audio(current_chunk)
-                 if audio_b64:
-                    yield f"data: {json.dumps({'audio': audio_b64})}\n\n"
+            # 4. Verification in parallel with the remaining speech.
+            # Audio speaks the original answer so it matches what was typed on screen.
+            from app.agents.auditor import AuditorAgent
+            print(f"[VoiceStream] Verifying answer...")
+            if llm_breaker.is_open:
+                # Skipped outright while the model server is failing, as in chat
+                audit_task = asyncio.create_task(asyncio.sleep(0, AuditorAgent.skipped("Verification skipped: model unavailable.")))
+            else:
+                audit_task = asyncio.create_task(AuditorAgent().verify(text, full_answer, context_chunks))
 
-            yield f"data: {json.dumps({'done': True})}\n\n"
+            # 5. Drain audio in order; emit verification whenever it lands
+            while pending_audio or audit_task:
+                waiting = [t for t in (pending_audio[:1] + [audit_task]) if t]
+                await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+                for event in ready_audio():
+                    yield event
+                if audit_task and audit_task.done():
+                    try:
+                        verification = audit_task.result()
+                    except Exception as e:
+                        print(f"[VoiceStream] Verification failed: {e}")
+                        verification = AuditorAgent.skipped("Verification failed.")
+                    yield AuditorAgent.event(verification) # same payload as the chat stream
+                    audit_task = None
+
+            yield {'done': True}
 
         except Exception as e:
             print(f"[VoiceStream] Error: {e}")
-            yield f"data: {json.dumps({'error': str(e)})}\n\n"
+            yield {'error': str(e)}
+        finally:
+            # Client went away or generation failed: don't keep synthesizing
+            for task in pending_audio + ([audit_task] if audit_task else []):
+                task.cancel()
+
+    @staticmethod
+    async def generate_pdf_response_stream(text: str, context_chunks: list[str], note_id: int, voice: str = None):
+        """
+        SSE adapter (compatibility mode): audio is base64-encoded into the JSON events.
+        Prefer the WebSocket endpoint, which sends audio as binary frames.
+        """
+        async for event in VoiceService.pdf_response_events(text, context_chunks, note_id, voice=voice):
+            if 'audio' in event:
+                event = {'audio': base64.b64encode(event['audio']).decode("utf-8")}
+            yield f"data: {json.dumps(event)}\n\n"
@@ -66,9 +66,45 @@ def init_db_sync(connection):
         );
     """))
 
+def migrate_event_end(connection):
+    # Databases created before notes.event_end existed: add it, backfill it, index it
+    columns = {row[1] for row in connection.execute(text("PRAGMA table_info(notes)"))}
+    if "event_end" not in columns:
+        connection.execute(text("ALTER TABLE notes ADD COLUMN event_end DATETIME"))
+        connection.execute(text("""
+            UPDATE notes
+            SET event_end = datetime(event_at, '+' || COALESCE(event_duration, 60) || ' minutes') || '.000000'
+            WHERE event_at IS NOT NULL
+        """))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_notes_active_event_window ON notes (is_active, event_end, event_at)"
+    ))
+
+def migrate_fingerprint(connection):
+    # Databases created before notes.fingerprint existed; older extracted items keep NULL (never deduplicated)
+    columns = {row[1] for row in connection.execute(text("PRAGMA table_info(notes)"))}
+    if "fingerprint" not in columns:
+        connection.execute(text("ALTER TABLE notes ADD COLUMN fingerprint VARCHAR"))
+    connection.execute(text("CREATE UNIQUE INDEX IF NOT EXISTS ux_notes_fingerprint ON notes (fingerprint)"))
+
+def migrate_summary_watermark(connection):
+    # Summaries written before summaries.watermark existed: derive it from the (then cumulative) linked ids
+    columns = {row[1] for row in connection.execute(text("PRAGMA table_info(summaries)"))}
+    if "watermark" not in columns:
+        connection.execute(text("ALTER TABLE summaries ADD COLUMN watermark INTEGER DEFAULT 0"))
+        connection.execute(text("""
+            UPDATE summaries
+            SET watermark = COALESCE((SELECT MAX(value) FROM json_each(summaries.linked_note_ids)), 0)
+        """))
+    if "pending_note_ids" not in columns:
+        connection.execute(text("ALTER TABLE summaries ADD COLUMN pending_note_ids JSON DEFAULT '[]'"))
+
 async def init_db():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(migrate_event_end)
+        await conn.run_sync(migrate_fingerprint)
+        await conn.run_sync(migrate_summary_watermark)
         
         # Run vector init synchronously
         await conn.run_sync(init_db_sync)
@@ -41,6 +41,7 @@ async def client(db_session):
     from app.services.voice_service import VoiceService
     VoiceService.transcribe = AsyncMock(return_value="Mocked Transcription")
     VoiceService.synthesize_audio = AsyncMock(return_value=None)
+    VoiceService.synthesize_audio_bytes = AsyncMock(return_value=None)
 
     async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as c:
         yield c
@@ -0,0 +1,47 @@
+import os
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+import db.database
+from app.core.voice_engine import voice_engine
+from app.models.base import Note
+from app.services.audio_archive_service import AudioArchiveService
+
+@pytest.mark.asyncio
+async def test_archive_transcodes_and_repoints_note(engine, tmp_path, monkeypatch):
+    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    monkeypatch.setattr(db.database, "async_session_maker", session_maker)
+
+    wav = tmp_path / "voice_1.wav"
+    wav.write_bytes(b"RIFF" + b"\x00" * 4000)
+    async with session_maker() as session:
+        session.add(Note(content="remind me", media_type="voice", file_path=str(wav)))
+        await session.commit()
+
+    sent = {}
+
+    async def fake_post(path, **kwargs):
+        sent.update(path=path, data=kwargs["data"])
+        return httpx.Response(200, content=b"OggS" + b"\x00" * 300)
+
+    monkeypatch.setattr(voice_engine, "post", fake_post)
+    await AudioArchiveService.sweep()
+
+    archived = str(tmp_path / "voice_1.ogg")
+    assert sent == {"path": "/transcode", "data": {"encoding": "ogg", "bitrate": "24"}}
+    assert os.path.exists(archived) and not wav.exists()
+    async with session_maker() as session:
+        note = (await session.execute(Note.__table__.select())).first()
+    assert note.file_path == archived
+
+@pytest.mark.asyncio
+async def test_failed_transcode_keeps_original(tmp_path, monkeypatch):
+    wav = tmp_path / "voice_2.wav"
+    wav.write_bytes(b"RIFF")
+
+    async def fake_post(path, **kwargs):
+        return httpx.Response(400, text="unsupported")
+
+    monkeypatch.setattr(voice_engine, "post", fake_post)
+    assert await AudioArchiveService.archive(str(wav)) is None
+    assert wav.exists()
@@ -0,0 +1,29 @@
+import pytest
+from app.core.chat_sessions import ChatSessionStore
+
+@pytest.mark.asyncio
+async def test_session_keeps_pinned_prefix_across_turns():
+    store = ChatSessionStore()
+
+    session_id, first, status = await store.resolve(None, 1, "q1", ["chunk A", "chunk B"], budget_tokens=100)
+    assert status == "new"
+
+    # Same chunks retrieved in a different order -> identical context
+    _, second, status = await store.resolve(session_id, 1, "q2", ["chunk B", "chunk A"], budget_tokens=100)
+    assert status == "hit"
+    assert second == first
+
+    # A new chunk is appended after the pinned ones, never inserted before them
+    _, third, status = await store.resolve(session_id, 1, "q3", ["chunk C", "chunk A"], budget_tokens=100)
+    assert status == "extended"
+    assert third[:len(first)] == first
+    assert third[-1] == "chunk C"
+
+@pytest.mark.asyncio
+async def test_session_is_repinned_for_another_document():
+    store = ChatSessionStore()
+    session_id, _, _ = await store.resolve("s1", 1, "q", ["doc one"], budget_tokens=100)
+
+    _, chunks, status = await store.resolve(session_id, 2, "q", ["doc two"], budget_tokens=100)
+    assert status == "new"
+    assert chunks == ["doc two"]
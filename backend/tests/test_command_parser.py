@@ -0,0 +1,83 @@
+import json
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock
+from app.core.command_parser import CommandParser
+from app.core.llm import NeuroVaultLLM
+from app.services.voice_service import VoiceService
+
+NOW = datetime(2026, 10, 19, 15, 0) # Monday afternoon
+
+def test_common_commands_are_parsed_without_llm():
+    remind = CommandParser.parse("Remind me to buy milk at 5pm", NOW)
+    assert remind["type"] == "TASK" and remind["summary"] == "Buy milk"
+    assert (remind["due_date"], remind["time"]) == ("2026-10-19", "17:00")
+
+    event = CommandParser.parse("Schedule dentist appointment on Friday at 10am for 30 minutes", NOW)
+    assert event["type"] == "EVENT" and event["summary"] == "Dentist appointment"
+    assert (event["due_date"], event["time"], event["duration_minutes"]) == ("2026-10-23", "10:00", 30)
+    assert event["category"] == "Health"
+
+    # A time that already passed today means tomorrow
+    early = CommandParser.parse("remind me to email the client by 9am", NOW)
+    assert (early["due_date"], early["time"]) == ("2026-10-20", "09:00")
+
+    search = CommandParser.parse("Find notes about the Q3 budget", NOW)
+    assert search["type"] == "SEARCH" and search["summary"] == "the Q3 budget"
+
+def test_ambiguous_input_is_left_to_llm():
+    assert CommandParser.parse("Schedule a review", NOW) is None # event without a time
+    assert CommandParser.parse("I think the meeting went well yesterday", NOW) is None
+    assert CommandParser.parse("remind me " + "and then " * 20 + "stuff", NOW) is None
+
+def test_unresolved_date_words_are_left_to_llm():
+    for command in [
+        "Book a flight to Paris next month at 9am",
+        "schedule dentist on 12/3 at 2pm",
+        "schedule a party this weekend at 8pm",
+        "schedule standup every monday at 9am",
+    ]:
+        assert CommandParser.parse(command, NOW) is None, command
+
+def test_grammar_misfires_are_left_to_llm():
+    assert CommandParser.parse("Book club on Friday at 7pm", NOW) is None # "book" as a noun
+    assert CommandParser.parse("find out why the build failed at 3pm", NOW) is None
+    assert CommandParser.parse("Search for", NOW) is None
+
+    rent = CommandParser.parse("remind me to pay rent on the 1st", NOW)
+    assert (rent["summary"], rent["due_date"], rent["time"]) == ("Pay rent", "2026-11-01", None)
+
+def test_clock_time_without_am_pm_uses_waking_hours():
+    eat = CommandParser.parse("remind me to eat at 12", NOW)
+    assert (eat["due_date"], eat["time"]) == ("2026-10-20", "12:00") # noon already passed today
+    meeting = CommandParser.parse("schedule meeting tomorrow at 12", NOW)
+    assert (meeting["due_date"], meeting["time"]) == ("2026-10-20", "12:00")
+    late = CommandParser.parse("remind me to sleep at 23:30", NOW)
+    assert (late["due_date"], late["time"]) == ("2026-10-19", "23:30")
+
+    leave = CommandParser.parse("remind me to leave at 5:30", NOW)
+    assert (leave["due_date"], leave["time"]) == ("2026-10-19", "17:30")
+    call = CommandParser.parse("remind me to call the bank at 10:15", NOW)
+    assert (call["due_date"], call["time"]) == ("2026-10-20", "10:15")
+
+@pytest.mark.asyncio
+async def test_interpret_uses_one_merged_llm_call(monkeypatch):
+    llm = AsyncMock(return_value={"message": {"content": json.dumps({
+        "intent": "SAVE", "tags": ["recipe"], "mentioned_entities": ["Grandma"]
+    })}})
+    monkeypatch.setattr(NeuroVaultLLM, "chat", llm)
+    monkeypatch.setattr(VoiceService, "route_by_embedding", AsyncMock(return_value=None)) # kNN unsure
+
+    fast = await VoiceService.interpret("Remind me to call mom tomorrow")
+    assert fast["source"] == "rules" and fast["action"]["summary"] == "Call mom"
+    assert llm.await_count == 0
+
+    slow = await VoiceService.interpret("Grandma's soup uses two carrots and a lot of dill")
+    assert slow == {"intent": "SAVE", "action": None, "note": {"tags": ["recipe"], "mentioned_entities": ["Grandma"]}, "source": "llm"}
+    assert llm.await_count == 1
+    assert llm.call_args.kwargs["call_site"] == "voice.command"
+
+@pytest.mark.asyncio
+async def test_background_tagging_failure_is_logged_not_raised(monkeypatch):
+    monkeypatch.setattr(VoiceService, "llm_interpret", AsyncMock(side_effect=ConnectionError("ollama down")))
+    await VoiceService.tag_note(1, "Grandma's soup uses two carrots") # fire-and-forget task must not raise
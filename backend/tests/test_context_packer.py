@@ -0,0 +1,44 @@
+import pytest
+from unittest.mock import AsyncMock
+from app.core.context_packer import ContextPacker
+from app.core.text_utils import estimate_tokens
+from app.services.vector_service import VectorService
+
+@pytest.mark.asyncio
+async def test_small_context_passes_through_without_embedding(monkeypatch):
+    embed = AsyncMock()
+    monkeypatch.setattr(VectorService, "embed_texts", embed)
+
+    packed = await ContextPacker(budget_tokens=1000).pack("q", ["short chunk", "another"], scores=[0.1, 0.9])
+
+    assert packed.chunks == ["another", "short chunk"]  # best score first
+    assert packed.tokens_saved == 0
+    embed.assert_not_called()
+
+@pytest.mark.asyncio
+async def test_over_budget_keeps_sentences_closest_to_query(monkeypatch):
+    relevant = "The invoice total is 420 dollars."
+    filler = "Weather was mild that week " * 10 + "."
+    chunk = f"{filler} {relevant} {filler}"
+
+    async def fake_embed(texts):
+        # query and the relevant sentence point the same way, filler is orthogonal
+        return [[1.0, 0.0] if (i == 0 or "invoice" in t) else [0.0, 1.0] for i, t in enumerate(texts)]
+
+    monkeypatch.setattr(VectorService, "embed_texts", fake_embed)
+
+    budget = estimate_tokens(relevant) + 5
+    packed = await ContextPacker(budget_tokens=budget).pack("what is the invoice total?", [chunk])
+
+    assert packed.chunks == [relevant]
+    assert packed.tokens_used <= budget
+    assert packed.tokens_saved > 0
+
+@pytest.mark.asyncio
+async def test_embedding_failure_falls_back_to_lexical_overlap(monkeypatch):
+    monkeypatch.setattr(VectorService, "embed_texts", AsyncMock(side_effect=RuntimeError("offline")))
+
+    chunk = "Cats sleep a lot during the day. The meeting moved to Friday afternoon. Dogs bark."
+    packed = await ContextPacker(budget_tokens=12).pack("when is the meeting", [chunk])
+
+    assert packed.chunks == ["The meeting moved to Friday afternoon."]
@@ -0,0 +1,87 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from app.config import settings
+from app.core.llm import NeuroVaultLLM
+from app.models.base import Note
+from app.services.summary_service import SummaryService
+
+@pytest.mark.asyncio
+async def test_chunks_are_summarized_in_parallel_and_cached(db_session, monkeypatch):
+    calls, in_flight, peak = [], [0], [0]
+
+    async def chat(model, messages, call_site, **kwargs):
+        calls.append(call_site)
+        in_flight[0] += 1
+        peak[0] = max(peak[0], in_flight[0])
+        await asyncio.sleep(0.01)
+        in_flight[0] -= 1
+        return {"message": {"content": f"{call_site} result number {len(calls)}"}}
+
+    monkeypatch.setattr(NeuroVaultLLM, "chat", AsyncMock(side_effect=chat))
+    monkeypatch.setattr(settings, "SUMMARY_MAP_CONCURRENCY", 2)
+    monkeypatch.setattr(settings, "SUMMARY_BATCH_CHARS", 100) # forces a two-level reduce
+
+    chunks = [Note(content=f"Page {i} " * 50, is_hidden=True, parent_id=1) for i in range(6)]
+    chunks[2].summary = "Already summarized section."
+    db_session.add_all(chunks)
+    await db_session.commit()
+
+    summary = await SummaryService.summarize_document(db_session, chunks)
+    assert calls.count("summary.chunk") == 5 and peak[0] == 2
+    assert calls[-1] == "summary.reduce" and calls.count("summary.reduce") > 1
+    assert summary.startswith("summary.reduce")
+    assert all(n.summary for n in chunks)
+
+    calls.clear() # retry: every chunk summary is cached
+    await SummaryService.summarize_document(db_session, chunks)
+    assert "summary.chunk" not in calls
+
+@pytest.mark.asyncio
+async def test_failed_reduce_falls_back_to_chunk_summaries(db_session, monkeypatch):
+    async def chat(model, messages, call_site, **kwargs):
+        if call_site == "summary.reduce":
+            raise ConnectionError("ollama down")
+        return {"message": {"content": "Section summary."}}
+
+    monkeypatch.setattr(NeuroVaultLLM, "chat", AsyncMock(side_effect=chat))
+    chunks = [Note(content=f"Page {i}", is_hidden=True, parent_id=1) for i in range(3)]
+    db_session.add_all(chunks)
+    await db_session.commit()
+
+    summary = await SummaryService.summarize_document(db_session, chunks)
+    assert summary == "Section summary. Section summary. Section summary."
+
+@pytest.mark.asyncio
+async def test_pdf_parent_is_ready_before_its_summary(db_session, monkeypatch):
+    from contextlib import asynccontextmanager
+    from app.api import upload
+    from app.services.vector_service import VectorService
+
+    @asynccontextmanager
+    async def session():
+        yield db_session
+
+    indexed, seen = [], {}
+
+    async def embed_text(text, call_site="embed"):
+        indexed.append(text)
+        return [0.0] * 768
+
+    async def summarize_document(db, chunk_notes):
+        seen["processing"] = parent.is_processing
+        seen["indexed"] = len(indexed)
+        return "A report about budgets."
+
+    monkeypatch.setattr(upload, "async_session_maker", session)
+    monkeypatch.setattr(upload, "extract_pdf_text_sync", lambda path: "Budget report. " * 20)
+    monkeypatch.setattr(VectorService, "embed_text", embed_text)
+    monkeypatch.setattr(SummaryService, "summarize_document", summarize_document)
+    parent = Note(content="PDF: report.pdf", is_processing=True)
+    db_session.add(parent)
+    await db_session.commit()
+
+    await upload.process_pdf_task("report.pdf", parent.id)
+    assert seen["processing"] is False # searchable and chat-ready while the map-reduce runs
+    assert "Budget report." in indexed[seen["indexed"] - 1] # parent indexed from its first chunk
+    assert parent.summary == "A report about budgets." and "A report about budgets." in indexed[-1]
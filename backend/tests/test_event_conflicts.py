@@ -0,0 +1,65 @@
+import random
+import pytest
+from datetime import datetime, timedelta
+from sqlalchemy import create_engine, text
+from app.core.interval_tree import IntervalTree, Interval
+from app.models.base import Note
+from app.services.summary_service import SummaryService
+from app.services.voice_service import VoiceService
+from db.database import migrate_event_end
+
+LUNCH = datetime(2025, 12, 27, 12, 0)
+
+async def add_event(db, content, start, minutes=60, **kwargs):
+    note = Note(content=content, event_at=start, event_duration=minutes, is_task=True, **kwargs)
+    db.add(note)
+    await db.commit()
+    return note
+
+@pytest.mark.asyncio
+async def test_check_conflict_uses_stored_event_end(db_session):
+    lunch = await add_event(db_session, "Lunch", LUNCH)
+    await add_event(db_session, "Old standup", LUNCH - timedelta(days=400))
+    await add_event(db_session, "Cancelled call", LUNCH, is_active=False)
+    assert lunch.event_end == LUNCH + timedelta(minutes=60)
+
+    assert await VoiceService.check_conflict(db_session, LUNCH + timedelta(minutes=30), 60) == "Lunch"
+    assert await VoiceService.check_conflict(db_session, LUNCH + timedelta(minutes=60), 30) is None # back-to-back
+    assert await VoiceService.check_conflict(db_session, LUNCH - timedelta(minutes=30), 30) is None
+
+    lunch.event_duration = 120 # moving/extending keeps event_end in sync
+    await db_session.commit()
+    assert await VoiceService.check_conflict(db_session, LUNCH + timedelta(minutes=90), 15) == "Lunch"
+
+@pytest.mark.asyncio
+async def test_batch_conflicts_against_calendar_and_each_other(db_session):
+    await add_event(db_session, "Lunch", LUNCH)
+    conflicts = await SummaryService.find_batch_conflicts(db_session, [
+        ("Call", LUNCH + timedelta(minutes=30), 60), # clashes with Lunch and Review
+        ("Review", LUNCH + timedelta(minutes=75), 30),
+        ("Gym", LUNCH + timedelta(hours=5), 60),
+    ])
+    assert sorted(conflicts[0]) == ["Lunch", "Review"]
+    assert conflicts[1] == ["Call"]
+    assert 2 not in conflicts
+
+def test_interval_tree_matches_brute_force():
+    rng = random.Random(7)
+    intervals = [Interval(s, s + rng.randint(0, 20), i) for i, s in enumerate(rng.randint(0, 100) for _ in range(200))]
+    tree = IntervalTree(intervals)
+    for _ in range(200):
+        start = rng.randint(-10, 110)
+        end = start + rng.randint(1, 30)
+        expected = sorted(i.data for i in intervals if i.start < end and i.end > start and i.end > i.start)
+        assert sorted(i.data for i in tree.overlapping(start, end)) == expected
+
+def test_migration_backfills_event_end():
+    engine = create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE notes (id INTEGER PRIMARY KEY, is_active BOOLEAN, event_at DATETIME, event_duration INTEGER)"))
+        conn.execute(text("INSERT INTO notes VALUES (1, 1, '2025-12-27 12:00:00.000000', 90), (2, 1, NULL, 60)"))
+        migrate_event_end(conn)
+        rows = conn.execute(text("SELECT event_end FROM notes ORDER BY id")).fetchall()
+        indexes = [row[1] for row in conn.execute(text("PRAGMA index_list(notes)"))]
+    assert [r[0] for r in rows] == ["2025-12-27 13:30:00.000000", None]
+    assert "ix_notes_active_event_window" in indexes
@@ -0,0 +1,61 @@
+import pytest
+from datetime import datetime
+from unittest.mock import AsyncMock
+from sqlalchemy import select, func
+from app.core.fingerprint import item_fingerprint
+from app.models.base import Note
+from app.services.summary_service import SummaryService
+from app.services.vector_service import VectorService
+
+EXTRACTION = {
+    "summary": "Busy week.",
+    "tasks": [
+        {"task": "Send the budget draft", "priority": "High", "timeline": "This Week", "source_note": 1},
+        {"task": "send the budget draft!", "priority": "High", "timeline": "This Week", "source_note": 1}, # same item, reworded
+    ],
+    "events": [{"title": "Design review", "date_time": "Friday at 3pm", "duration_minutes": 30, "source_note": 1}],
+}
+
+def test_fingerprint_ignores_case_punctuation_and_time_of_day():
+    a = item_fingerprint("task", "Send the budget draft", 1, datetime(2026, 10, 19, 9))
+    assert a == item_fingerprint("task", "  send the BUDGET draft!", 1, datetime(2026, 10, 19, 17))
+    assert a != item_fingerprint("task", "Send the budget draft", 2, datetime(2026, 10, 19, 9))
+    assert a != item_fingerprint("task", "Send the budget draft", 1, datetime(2026, 10, 20, 9))
+
+@pytest.mark.asyncio
+async def test_re_extraction_is_idempotent_and_embeds_only_new_items(db_session, monkeypatch):
+    embed = AsyncMock(side_effect=lambda texts, call_site: [[0.0] * 4 for _ in texts])
+    monkeypatch.setattr(VectorService, "embed_texts", embed)
+    source = Note(content="Budget draft goes out this week; design review Friday 3pm")
+    db_session.add(source)
+    await db_session.commit()
+
+    created = await SummaryService.save_extracted(db_session, [([source], EXTRACTION)])
+    assert sorted(n.content for n in created) == ["Design review", "Send the budget draft"]
+    assert embed.await_count == 1 and len(embed.call_args.args[0]) == 2 # one batched call
+
+    again = await SummaryService.save_extracted(db_session, [([source], EXTRACTION)])
+    assert again == []
+    assert embed.await_count == 1 # nothing new, nothing embedded
+    total = (await db_session.execute(select(func.count()).select_from(Note).where(Note.origin_note_id == source.id))).scalar()
+    assert total == 2
+    event = (await db_session.execute(select(Note).where(Note.category == "Event"))).scalars().one()
+    assert "conflict" not in event.tags # its stored copy is not a clash
+
+@pytest.mark.asyncio
+async def test_deleted_extracted_item_is_not_resurrected_by_rebuild(db_session, monkeypatch):
+    import json
+    from app.core.llm import NeuroVaultLLM
+    from app.services.note_service import NoteService
+    monkeypatch.setattr(VectorService, "embed_texts", AsyncMock(side_effect=lambda texts, call_site: [[0.0] * 4 for _ in texts]))
+    monkeypatch.setattr(NeuroVaultLLM, "chat", AsyncMock(return_value={"message": {"content": json.dumps(EXTRACTION)}}))
+    db_session.add(Note(content="Budget draft goes out this week; design review Friday 3pm"))
+    await db_session.commit()
+
+    await SummaryService.generate_summary(db_session)
+    task = (await db_session.execute(select(Note).where(Note.is_task == True, Note.category == "High"))).scalars().one()
+    assert await NoteService.delete_note(db_session, task.id)
+
+    await SummaryService.generate_summary(db_session, rebuild=True)
+    contents = (await db_session.execute(select(Note.content).where(Note.origin_note_id.is_not(None)))).scalars().all()
+    assert contents == ["Design review"] # the deleted task stays deleted
@@ -0,0 +1,77 @@
+import json
+import re
+import zlib
+import pytest
+import numpy as np
+from unittest.mock import AsyncMock
+from app.agents.auditor import AuditorAgent
+from app.core.grounding import GroundingScorer
+from app.core.llm import NeuroVaultLLM
+from app.services.vector_service import VectorService
+
+CONTEXT = [
+    "The warranty covers parts and labour for two years. Batteries are covered for six months.",
+    "Claims must be filed online with the original receipt.",
+]
+
+async def bag_of_words(texts, call_site):
+    vectors = np.zeros((len(texts), 256), dtype=np.float32)
+    for row, text in enumerate(texts):
+        for word in re.findall(r"\w+", text.lower()):
+            vectors[row, zlib.crc32(word.encode()) % 256] += 1
+    return vectors.tolist()
+
+@pytest.fixture
+def embeddings(monkeypatch):
+    embed = AsyncMock(side_effect=bag_of_words)
+    monkeypatch.setattr(VectorService, "embed_texts", embed)
+    monkeypatch.setattr(GroundingScorer, "_cache", type(GroundingScorer._cache)())
+    return embed
+
+@pytest.mark.asyncio
+async def test_grounded_answer_skips_llm_auditor(embeddings, monkeypatch):
+    llm = AsyncMock()
+    monkeypatch.setattr(NeuroVaultLLM, "chat", llm)
+    answer = "Sure! The warranty covers parts and labour for two years. Claims must be filed online with the original receipt."
+
+    verdict = await AuditorAgent().verify("What does the warranty cover?", answer, CONTEXT)
+    assert verdict["is_valid"] is True and verdict["method"] == "similarity"
+    assert llm.await_count == 0
+
+    # Context sentences are memoized: a second check only embeds the answer
+    report = await GroundingScorer().score("Batteries are covered for six whole months.", CONTEXT)
+    assert report.grounded and embeddings.await_count == 2
+    assert embeddings.call_args.args[0] == ["Batteries are covered for six whole months."]
+
+@pytest.mark.asyncio
+async def test_only_unsupported_sentences_go_to_llm(embeddings, monkeypatch):
+    llm = AsyncMock(return_value={"message": {"content": json.dumps({"is_valid": False, "reason": "Not in context", "correction": None})}})
+    monkeypatch.setattr(NeuroVaultLLM, "chat", llm)
+    answer = "The warranty covers parts and labour for two years. You also get a free replacement phone every Christmas."
+
+    verdict = await AuditorAgent().verify("What does the warranty cover?", answer, CONTEXT)
+    assert verdict["is_valid"] is False and verdict["method"] == "llm"
+    assert verdict["checked_sentences"] == ["You also get a free replacement phone every Christmas."]
+    prompt = llm.call_args.kwargs["messages"][-1]["content"]
+    assert "- You also get a free replacement phone every Christmas." in prompt
+
+@pytest.mark.asyncio
+async def test_number_and_negation_mismatches_are_not_grounded(embeddings):
+    scorer = GroundingScorer(min_similarity=0.75)
+    for answer in [
+        "The warranty covers parts and labour for five years.",
+        "Batteries are not covered for six months.",
+        "Five years, sadly.", # short, but carries a claim
+    ]:
+        report = await scorer.score(answer, CONTEXT)
+        assert not report.grounded and report.unsupported == [answer], answer
+
+    assert (await scorer.score("The warranty covers parts and labour for 2 years.", CONTEXT)).grounded
+
+@pytest.mark.asyncio
+async def test_answer_without_checkable_sentences_goes_to_llm(embeddings, monkeypatch):
+    llm = AsyncMock(return_value={"message": {"content": json.dumps({"is_valid": False, "reason": "Wrong", "correction": None})}})
+    monkeypatch.setattr(NeuroVaultLLM, "chat", llm)
+
+    verdict = await AuditorAgent().verify("How long is the warranty?", "Sure, gladly!", CONTEXT)
+    assert verdict["method"] == "llm" and llm.await_count == 1
@@ -0,0 +1,61 @@
+import pytest
+from unittest.mock import AsyncMock
+from app.core.intent_router import IntentRouter
+from app.core.llm import NeuroVaultLLM
+from app.services.vector_service import VectorService
+from app.services import voice_service
+from app.services.voice_service import VoiceService
+
+# 3-d "embeddings": one axis per intent
+EXAMPLES = {"SEARCH": ["s1", "s2", "s3"], "ACTION": ["a1", "a2", "a3"], "SAVE": ["n1", "n2", "n3"]}
+AXES = {"s": [1, 0, 0], "a": [0, 1, 0], "n": [0, 0, 1]}
+
+async def fake_embed_batch(model, inputs, call_site="embed"):
+    return {"embeddings": [[v + 0.01 * int(t[1]) for v in AXES[t[0]]] for t in inputs]}
+
+@pytest.fixture
+def router(monkeypatch):
+    monkeypatch.setattr(NeuroVaultLLM, "embed_batch", AsyncMock(side_effect=fake_embed_batch))
+    return IntentRouter(EXAMPLES, k=3, min_confidence=0.8, min_similarity=0.5)
+
+@pytest.mark.asyncio
+async def test_knn_classifies_and_escalates_when_unsure(router):
+    assert await router.warm()
+    assert await router.warm() # examples embedded once
+    assert NeuroVaultLLM.embed_batch.await_count == 1
+
+    assert router.classify([0.9, 0.1, 0.0]) == ("SEARCH", pytest.approx(1.0))
+    label, confidence = router.classify([0.6, 0.6, 0.1]) # between SEARCH and ACTION
+    assert label is None and confidence < 0.8
+    assert router.classify([-1, -1, -1])[0] is None # nothing similar
+
+@pytest.mark.asyncio
+async def test_search_route_reuses_utterance_embedding(router, monkeypatch):
+    await router.warm()
+    monkeypatch.setattr(voice_service, "intent_router", router)
+    monkeypatch.setattr(VectorService, "embed_text", AsyncMock(return_value=[0.0, 0.1, 0.95]))
+    assert (await VoiceService.route_by_embedding("parking is on level three"))["note"] is None # SAVE, tag later
+
+    VectorService.embed_text.return_value = [0.95, 0.05, 0.0]
+    routed = await VoiceService.route_by_embedding("where did I put the wifi password")
+    assert routed["action"]["type"] == "SEARCH"
+    assert routed["query_vector"] == [0.95, 0.05, 0.0] # handed to search_notes, no second embed
+
+@pytest.mark.asyncio
+async def test_cold_router_falls_through_without_waiting(router, monkeypatch):
+    from app.core.resilience import retry_until
+    monkeypatch.setattr(voice_service, "intent_router", router)
+    monkeypatch.setattr(VectorService, "embed_text", AsyncMock(return_value=[0.95, 0.05, 0.0]))
+    assert await VoiceService.route_by_embedding("where did I put the wifi password") is None
+    assert NeuroVaultLLM.embed_batch.await_count == 0 and VectorService.embed_text.await_count == 0
+
+    # Embedder still loading at startup: warming is retried in the background until it answers
+    calls = iter([ConnectionError("loading")])
+    async def loading_then_ready(model, inputs, call_site="embed"):
+        for error in calls:
+            raise error
+        return await fake_embed_batch(model, inputs, call_site)
+    NeuroVaultLLM.embed_batch.side_effect = loading_then_ready
+    await retry_until(router.warm, "Intent router", first_delay=0)
+    assert router.ready and NeuroVaultLLM.embed_batch.await_count == 2
+    assert (await VoiceService.route_by_embedding("where did I put the wifi password"))["source"] == "knn"
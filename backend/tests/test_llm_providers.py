@@ -0,0 +1,66 @@
+import pytest
+import json
+import httpx
+from app.core.providers import OpenAICompatibleProvider
+
+def make_provider(handler):
+    return OpenAICompatibleProvider("http://llm.test/v1", api_key="secret", transport=httpx.MockTransport(handler))
+
+@pytest.mark.asyncio
+async def test_openai_chat_structured_output_maps_to_response_format():
+    """Schema formats become response_format=json_schema; response keeps the Ollama shape."""
+    seen = {}
+
+    def handler(request: httpx.Request):
+        seen["path"] = request.url.path
+        seen["auth"] = request.headers.get("authorization")
+        seen["body"] = json.loads(request.content)
+        return httpx.Response(200, json={
+            "choices": [{"message": {"role": "assistant", "content": '{"is_valid": true}'}}],
+            "usage": {"prompt_tokens": 12, "completion_tokens": 4}
+        })
+
+    schema = {"title": "AuditorResponse", "type": "object", "properties": {"is_valid": {"type": "boolean"}}}
+    provider = make_provider(handler)
+    response = await provider.chat("gemma3:4b", [{"role": "user", "content": "hi"}], format=schema, options={"num_predict": 32})
+
+    assert seen["path"] == "/v1/chat/completions"
+    assert seen["auth"] == "Bearer secret"
+    assert seen["body"]["response_format"]["type"] == "json_schema"
+    assert seen["body"]["response_format"]["json_schema"]["schema"] == schema
+    assert seen["body"]["max_tokens"] == 32
+    assert response["message"]["content"] == '{"is_valid": true}'
+    assert response["prompt_eval_count"] == 12
+    assert response["eval_count"] == 4
+
+@pytest.mark.asyncio
+async def test_openai_chat_stream_yields_ollama_chunks():
+    def handler(request: httpx.Request):
+        lines = [
+            {"choices": [{"delta": {"role": "assistant"}}]},
+            {"choices": [{"delta": {"content": "Hello"}}]},
+            {"choices": [{"delta": {"content": " world"}}]},
+            {"choices": [], "usage": {"prompt_tokens": 5, "completion_tokens": 2}},
+        ]
+        body = "".join(f"data: {json.dumps(l)}\n\n" for l in lines) + "data: [DONE]\n\n"
+        return httpx.Response(200, text=body, headers={"content-type": "text/event-stream"})
+
+    provider = make_provider(handler)
+    chunks = [c async for c in await provider.chat("m", [{"role": "user", "content": "hi"}], stream=True)]
+
+    assert "".join(c["message"]["content"] for c in chunks) == "Hello world"
+    assert chunks[-1]["done"] is True
+    assert chunks[-1]["eval_count"] == 2
+
+@pytest.mark.asyncio
+async def test_openai_embed_batch_preserves_input_order():
+    def handler(request: httpx.Request):
+        assert json.loads(request.content)["input"] == ["a", "b"]
+        return httpx.Response(200, json={"data": [
+            {"index": 1, "embedding": [0.0, 1.0]},
+            {"index": 0, "embedding": [1.0, 0.0]},
+        ]})
+
+    provider = make_provider(handler)
+    response = await provider.embed_batch("embeddinggemma", ["a", "b"])
+    assert response["embeddings"] == [[1.0, 0.0], [0.0, 1.0]]
@@ -0,0 +1,58 @@
+import pytest
+from app.core.llm import NeuroVaultLLM
+from app.core.resilience import LLMUnavailableError
+from app.core.telemetry import telemetry
+
+@pytest.fixture(autouse=True)
+def fresh_telemetry():
+    telemetry.reset()
+    yield
+    telemetry.reset()
+
+@pytest.mark.asyncio
+async def test_non_streaming_call_records_ollama_counters():
+    async def invoke():
+        return {"message": {"content": "ok"}, "done": True, "prompt_eval_count": 120, "eval_count": 30,
+                "prompt_eval_duration": 400_000_000, "eval_duration": 1_500_000_000}
+
+    await NeuroVaultLLM._instrumented("chat", "gemma3:4b", "voice.router", invoke)
+    text = telemetry.render_prometheus()
+
+    labels = 'op="chat",model="gemma3:4b",call_site="voice.router"'
+    assert f'neurovault_llm_calls_total{{{labels},status="ok"}} 1' in text
+    assert f'neurovault_llm_prompt_eval_tokens_total{{{labels}}} 120' in text
+    assert f'neurovault_llm_eval_tokens_total{{{labels}}} 30' in text
+    assert f'neurovault_llm_latency_seconds_count{{{labels}}} 1' in text
+    # 30 tokens / 1.5s decode = 20 tok/s -> falls in the le="20" bucket
+    assert f'neurovault_llm_tokens_per_second_bucket{{{labels},le="20"}} 1' in text
+
+@pytest.mark.asyncio
+async def test_streaming_call_records_ttft_after_stream_is_consumed():
+    async def chunks():
+        yield {"message": {"content": "Hel"}, "done": False}
+        yield {"message": {"content": "lo"}, "done": False}
+        yield {"message": {"content": ""}, "done": True, "eval_count": 2}
+
+    async def invoke():
+        return chunks()
+
+    stream = await NeuroVaultLLM._instrumented("chat", "m", "messenger", invoke, stream=True)
+    assert "neurovault_llm_ttft_seconds_count" not in telemetry.render_prometheus()
+
+    tokens = [c["message"]["content"] async for c in stream]
+    text = telemetry.render_prometheus()
+
+    assert "".join(tokens) == "Hello"
+    assert 'neurovault_llm_ttft_seconds_count{op="chat",model="m",call_site="messenger"} 1' in text
+    assert 'neurovault_llm_eval_tokens_total{op="chat",model="m",call_site="messenger"} 2' in text
+
+@pytest.mark.asyncio
+async def test_failed_call_is_counted_as_error():
+    async def invoke():
+        raise ConnectionError("ollama down")
+
+    with pytest.raises(LLMUnavailableError) as error:
+        await NeuroVaultLLM._instrumented("embed", "embeddinggemma", "embed.rag", invoke)
+    assert isinstance(error.value.__cause__, ConnectionError)
+
+    assert 'status="error"} 1' in telemetry.render_prometheus()
@@ -0,0 +1,34 @@
+import json
+import pytest
+import httpx
+from app.core.voice_engine import VoiceEngineClient
+from app.services import voice_service
+from app.services.voice_service import VoiceService
+from app.api.upload import format_transcript
+
+@pytest.mark.asyncio
+async def test_long_form_segments_stream_in_completion_order(monkeypatch, tmp_path):
+    events = [
+        {"type": "start", "duration": 65.0, "chunks": 2, "tier": "accurate"},
+        {"type": "segment", "chunk": 1, "start": 31.5, "end": 40.0, "text": "Second chunk finished first."},
+        {"type": "segment", "chunk": 0, "start": 0.4, "end": 6.0, "text": "Welcome to the meeting."},
+        {"type": "done", "text": "Welcome to the meeting. Second chunk finished first.", "duration": 65.0, "elapsed": 13.0, "rtf": 0.2},
+    ]
+    seen = []
+
+    def handler(request: httpx.Request):
+        seen.append(request.url.path)
+        return httpx.Response(200, content="\n".join(json.dumps(e) for e in events) + "\n")
+
+    engine = VoiceEngineClient(base_url="http://voice.test", socket_path="", transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(voice_service, "voice_engine", engine)
+    recording = tmp_path / "meeting.wav"
+    recording.write_bytes(b"RIFF")
+
+    received = [event async for event in VoiceService.transcribe_long(str(recording))]
+    assert seen == ["/stt/long"]
+    assert [e["type"] for e in received] == ["start", "segment", "segment", "done"]
+
+    transcript = format_transcript([e for e in received if e["type"] == "segment"])
+    assert transcript == "[Voice Note]:\n[00:00] Welcome to the meeting.\n[00:31] Second chunk finished first."
+    await engine.close()
@@ -0,0 +1,122 @@
+import json
+import pytest
+from unittest.mock import AsyncMock
+from app.config import settings
+from app.core.llm import NeuroVaultLLM
+from app.models.base import Note
+from app.services.summary_service import SummaryService
+
+def fake_llm(calls):
+    async def chat(model, messages, call_site, **kwargs):
+        prompt = messages[-1]["content"]
+        calls.append((call_site, prompt))
+        if call_site == "summary.merge":
+            return {"message": {"content": "merged summary"}}
+        return {"message": {"content": json.dumps({"summary": f"summary #{len(calls)}", "tasks": [], "events": []})}}
+    return AsyncMock(side_effect=chat)
+
+async def add_notes(db, *contents):
+    notes = [Note(content=c) for c in contents]
+    db.add_all(notes)
+    await db.commit()
+    return notes
+
+@pytest.mark.asyncio
+async def test_refresh_only_folds_in_new_notes(db_session, monkeypatch):
+    calls = []
+    monkeypatch.setattr(NeuroVaultLLM, "chat", fake_llm(calls))
+    await add_notes(db_session, "Kickoff with the design team", "Budget draft is due Friday")
+    db_session.add(Note(content="Extracted task", origin_note_id=1)) # AI-extracted items are never re-summarized
+    await db_session.commit()
+
+    first = await SummaryService.generate_summary(db_session)
+    assert len(calls) == 1 and "Budget draft" in calls[0][1] and "Extracted task" not in calls[0][1]
+    assert (first.linked_note_ids, first.watermark) == ([1, 2], 2)
+
+    assert await SummaryService.generate_summary(db_session) is first # nothing new: no LLM call
+    assert len(calls) == 1
+
+    await add_notes(db_session, "Client approved the mockups")
+    second = await SummaryService.generate_summary(db_session)
+    assert len(calls) == 2
+    prompt = calls[1][1]
+    assert "summary #1" in prompt and "Client approved" in prompt and "Kickoff" not in prompt
+    assert (second.linked_note_ids, second.watermark) == ([4], 4) # only this run's notes, not the history
+
+@pytest.mark.asyncio
+async def test_large_backlog_is_map_reduced(db_session, monkeypatch):
+    calls = []
+    monkeypatch.setattr(NeuroVaultLLM, "chat", fake_llm(calls))
+    monkeypatch.setattr(settings, "SUMMARY_BATCH_CHARS", 120)
+    await add_notes(db_session, *[f"Meeting notes part {i}: " + "details " * 8 for i in range(4)])
+
+    summary = await SummaryService.generate_summary(db_session)
+    sites = [site for site, _ in calls]
+    assert sites.count("summary.rolling") == 4 and sites[-1] == "summary.merge"
+    assert "summary #1" in calls[-1][1]
+    assert summary.summary_text == "merged summary"
+
+@pytest.mark.asyncio
+async def test_backlog_batches_are_bounded_by_map_concurrency(db_session, monkeypatch):
+    import asyncio
+    in_flight, peak = [0], [0]
+
+    async def chat(model, messages, call_site, **kwargs):
+        in_flight[0] += 1
+        peak[0] = max(peak[0], in_flight[0])
+        await asyncio.sleep(0.01)
+        in_flight[0] -= 1
+        return {"message": {"content": json.dumps({"summary": "part", "tasks": [], "events": []})}}
+
+    monkeypatch.setattr(NeuroVaultLLM, "chat", AsyncMock(side_effect=chat))
+    monkeypatch.setattr(settings, "SUMMARY_BATCH_CHARS", 120)
+    monkeypatch.setattr(settings, "SUMMARY_MAP_CONCURRENCY", 2)
+    await add_notes(db_session, *[f"Meeting notes part {i}: " + "details " * 8 for i in range(6)])
+
+    await SummaryService.generate_summary(db_session)
+    assert peak[0] == 2 # LLM slots stay free for voice commands
+
+@pytest.mark.asyncio
+async def test_old_summary_versions_are_pruned(db_session, monkeypatch):
+    from sqlalchemy import select, func
+    from app.models.base import Summary
+    monkeypatch.setattr(NeuroVaultLLM, "chat", fake_llm([]))
+    monkeypatch.setattr(settings, "SUMMARY_HISTORY", 2)
+    for i in range(4):
+        await add_notes(db_session, f"Note {i}")
+        latest = await SummaryService.generate_summary(db_session)
+
+    assert await db_session.scalar(select(func.count()).select_from(Summary)) == 2
+    assert await SummaryService.get_latest_summary(db_session) is latest and latest.watermark == 4
+
+@pytest.mark.asyncio
+async def test_processing_note_is_skipped_then_folded_when_final(db_session, monkeypatch):
+    calls = []
+    monkeypatch.setattr(NeuroVaultLLM, "chat", fake_llm(calls))
+    pdf = Note(content="PDF: annual report", is_processing=True)
+    db_session.add(pdf)
+    await db_session.commit()
+    await add_notes(db_session, "Lunch with Sam on Thursday")
+
+    first = await SummaryService.generate_summary(db_session)
+    assert (first.linked_note_ids, first.watermark, first.pending_note_ids) == ([2], 2, [1]) # later notes not held back
+    assert not await SummaryService.has_unsummarized(db_session, first)
+
+    pdf.is_processing = False
+    await db_session.commit()
+    assert await SummaryService.has_unsummarized(db_session, first)
+    second = await SummaryService.generate_summary(db_session)
+    assert (second.linked_note_ids, second.watermark, second.pending_note_ids) == ([1], 2, [])
+    assert "annual report" in calls[-1][1] and "Lunch" not in calls[-1][1]
+
+@pytest.mark.asyncio
+async def test_rebuild_folds_every_page_before_publishing(db_session, monkeypatch):
+    calls = []
+    monkeypatch.setattr(NeuroVaultLLM, "chat", fake_llm(calls))
+    monkeypatch.setattr(settings, "SUMMARY_MAX_NEW_NOTES", 2)
+    await add_notes(db_session, *[f"Note {i}" for i in range(5)])
+
+    rebuilt = await SummaryService.generate_summary(db_session, rebuild=True)
+    assert rebuilt.linked_note_ids == [1, 2, 3, 4, 5] and rebuilt.watermark == 5
+    assert len(calls) == 3 # one fold per page, one published version
+    assert not await SummaryService.has_unsummarized(db_session, rebuilt)
@@ -0,0 +1,10 @@
+import subprocess
+import sys
+from pathlib import Path
+
+def test_api_process_does_not_load_local_ml_stacks():
+    # Transcription is served by the Voice Engine; torch/transformers load only on first image generation
+    code = "import sys, app.main; print(sorted(m for m in ('torch', 'transformers', 'diffusers') if m in sys.modules))"
+    result = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).resolve().parents[1], capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == "[]"
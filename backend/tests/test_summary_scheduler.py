@@ -0,0 +1,82 @@
+import asyncio
+import pytest
+from unittest.mock import AsyncMock
+from app.core.llm import NeuroVaultLLM
+from app.core.summary_scheduler import SummaryScheduler, summary_scheduler
+from app.models.base import Note, Summary
+from app.services.summary_service import SummaryService
+
+@pytest.mark.asyncio
+async def test_bursts_of_changes_coalesce_into_one_run(monkeypatch):
+    scheduler = SummaryScheduler(delay=0.05, max_delay=1.0)
+    runs = []
+
+    async def refresh(db, rebuild=False):
+        runs.append(rebuild)
+        return None
+    monkeypatch.setattr(scheduler, "refresh", refresh)
+    monkeypatch.setattr(SummaryService, "has_unsummarized", AsyncMock(return_value=False)) # nothing to summarize
+
+    scheduler.mark_dirty() # before start(): recorded, not run
+    assert scheduler.stale and not runs
+    scheduler.start()
+    for _ in range(3):
+        scheduler.mark_dirty()
+        await asyncio.sleep(0.01)
+    scheduler.mark_dirty(rebuild=True)
+    await asyncio.sleep(0.2)
+    assert runs == [True] and not scheduler.stale
+
+    scheduler.mark_dirty()
+    await asyncio.sleep(0.2)
+    assert runs == [True, False]
+    await scheduler.stop()
+
+@pytest.mark.asyncio
+async def test_failed_rebuild_is_retried_as_a_rebuild(monkeypatch):
+    scheduler = SummaryScheduler(delay=0.02, max_delay=1.0)
+    runs = []
+
+    async def refresh(db, rebuild=False):
+        runs.append(rebuild)
+        if len(runs) == 1:
+            raise ConnectionError("ollama down")
+        return Summary(id=1, summary_text="ok")
+    monkeypatch.setattr(scheduler, "refresh", refresh)
+    monkeypatch.setattr(SummaryService, "has_unsummarized", AsyncMock(return_value=False))
+
+    scheduler.start()
+    scheduler.mark_dirty(rebuild=True)
+    await asyncio.sleep(0.2)
+    assert runs == [True, True] and not scheduler.stale
+    await scheduler.stop()
+
+@pytest.mark.asyncio
+async def test_get_serves_last_summary_while_stale(client, db_session, monkeypatch):
+    monkeypatch.setattr(summary_scheduler, "pending", False)
+    NeuroVaultLLM.chat.reset_mock()
+    note = Note(content="Quarterly planning notes")
+    db_session.add(note)
+    await db_session.commit()
+    db_session.add(Summary(summary_text="Planning is underway.", date_bucket=note.created_at, linked_note_ids=[note.id], watermark=note.id))
+    await db_session.commit()
+
+    fresh = (await client.get("/api/summary")).json()
+    assert fresh["is_stale"] is False and fresh["summary_text"] == "Planning is underway."
+
+    # Deleting a summarized note no longer drops the summary or blocks the next GET on the LLM
+    assert (await client.delete(f"/api/notes/{note.id}")).status_code == 200
+    stale = (await client.get("/api/summary")).json()
+    assert stale["is_stale"] is True and stale["version"] == fresh["version"]
+    assert stale["summary_text"] == "Planning is underway."
+    assert NeuroVaultLLM.chat.await_count == 0
+
+@pytest.mark.asyncio
+async def test_first_summary_404_asks_client_to_retry(client, db_session, monkeypatch):
+    monkeypatch.setattr(summary_scheduler, "pending", False)
+    assert "retry-after" not in (await client.get("/api/summary")).headers # no notes: nothing coming
+
+    db_session.add(Note(content="First note ever"))
+    await db_session.commit()
+    response = await client.get("/api/summary")
+    assert response.status_code == 404 and response.headers["retry-after"] == "5"
@@ -0,0 +1,100 @@
+import asyncio
+import pytest
+from app.core.tts_cache import TTSCache
+
+@pytest.mark.asyncio
+async def test_repeated_text_is_synthesized_once_and_survives_restart(tmp_path):
+    calls = []
+
+    async def synthesize():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return b"RIFF-note-saved"
+
+    cache = TTSCache(directory=str(tmp_path), max_items=8)
+    results = await asyncio.gather(*[
+        cache.get_or_synthesize("Note saved.", "af_sarah", 1.0, "wav", synthesize) for _ in range(3)
+    ])
+    assert results == [b"RIFF-note-saved"] * 3
+    assert len(calls) == 1 # concurrent misses share one synthesis
+
+    # Fresh process: served from disk
+    restarted = TTSCache(directory=str(tmp_path), max_items=8)
+    assert await restarted.get_or_synthesize("Note  saved. ", "af_sarah", 1.0, "wav", synthesize) == b"RIFF-note-saved"
+    assert len(calls) == 1
+
+@pytest.mark.asyncio
+async def test_key_includes_voice_speed_and_format_and_lru_evicts(tmp_path):
+    keys = {TTSCache.key("Hi.", v, s, f) for v, s, f in [("af_sarah", 1.0, "wav"), ("af_bella", 1.0, "wav"),
+                                                         ("af_sarah", 1.2, "wav"), ("af_sarah", 1.0, "pcm")]}
+    assert len(keys) == 4
+
+    cache = TTSCache(directory=str(tmp_path), max_items=2)
+    for i in range(3):
+        await cache.put(f"k{i}", b"x")
+    assert list(cache._memory) == ["k1", "k2"]
+
+    async def fail():
+        return None
+    # Failed synthesis is not cached
+    assert await cache.get_or_synthesize("Oops.", "af_sarah", 1.0, "wav", fail) is None
+    assert cache.misses == 1
+
+@pytest.mark.asyncio
+async def test_cancelled_owner_hands_synthesis_to_a_waiter(tmp_path):
+    cache = TTSCache(directory=str(tmp_path), max_items=8)
+    started = asyncio.Event()
+
+    async def hang():
+        started.set()
+        await asyncio.sleep(10)
+
+    async def synthesize():
+        return b"RIFF-ok"
+
+    owner = asyncio.create_task(cache.get_or_synthesize("Done.", "af_sarah", 1.0, "wav", hang))
+    await started.wait()
+    waiter = asyncio.create_task(cache.get_or_synthesize("Done.", "af_sarah", 1.0, "wav", synthesize))
+    await asyncio.sleep(0.01)
+    owner.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await owner
+    assert await waiter == b"RIFF-ok" # not the owner's CancelledError
+    assert not cache._inflight
+
+@pytest.mark.asyncio
+async def test_disk_tier_evicts_least_recently_used_over_budget(tmp_path):
+    cache = TTSCache(directory=str(tmp_path), max_items=1, max_disk_bytes=25)
+    for i in range(3):
+        await cache.put(f"k{i}", b"x" * 10)
+
+    assert not (tmp_path / "k0" / "k0.bin").exists()
+    assert (tmp_path / "k2" / "k2.bin").exists()
+    assert cache._disk_bytes == 20
+
+    # A fresh process rebuilds the index from disk and keeps enforcing the budget
+    restarted = TTSCache(directory=str(tmp_path), max_items=1, max_disk_bytes=25)
+    assert await restarted.get("k1") == b"x" * 10
+    await restarted.put("k3", b"y" * 10)
+    assert (tmp_path / "k1" / "k1.bin").exists() # recently read, kept
+    assert not (tmp_path / "k2" / "k2.bin").exists()
+
+@pytest.mark.asyncio
+async def test_prewarm_retries_until_the_engine_answers(monkeypatch):
+    from unittest.mock import AsyncMock
+    from app.core.resilience import retry_until
+    from app.services.voice_service import CANNED_RESPONSES, VoiceService
+
+    engine_up = [False]
+
+    async def synthesize(text, *args, **kwargs):
+        return b"RIFF" if engine_up[0] else None
+
+    async def sleep(delay):
+        engine_up[0] = True # the engine finishes loading its models during the backoff
+
+    monkeypatch.setattr(VoiceService, "synthesize_audio_bytes", AsyncMock(side_effect=synthesize))
+    monkeypatch.setattr(asyncio, "sleep", sleep)
+    await retry_until(VoiceService.prewarm_tts, "TTS prewarm")
+    assert VoiceService.synthesize_audio_bytes.await_count == 2 * len(CANNED_RESPONSES)
@@ -0,0 +1,50 @@
+import asyncio
+import pytest
+import httpx
+from app.core.voice_engine import VoiceEngineClient
+
+@pytest.mark.asyncio
+async def test_client_is_reused_across_calls():
+    seen = []
+
+    def handler(request: httpx.Request):
+        seen.append(request.url.path)
+        return httpx.Response(200, json={"text": "hi"})
+
+    engine = VoiceEngineClient(base_url="http://voice.test", socket_path="", transport=httpx.MockTransport(handler))
+    first = engine.client
+    await engine.post("/stt", files={"file": ("a.wav", b"RIFF", "audio/wav")})
+    await engine.post("/tts", json={"text": "Hello."})
+
+    assert engine.client is first
+    assert seen == ["/stt", "/tts"]
+    await engine.close()
+
+@pytest.mark.asyncio
+async def test_unix_socket_transport(tmp_path):
+    socket_path = str(tmp_path / "voice.sock")
+    connections = []
+
+    async def handle(reader, writer):
+        connections.append(1)
+        while True:
+            try:
+                head = await reader.readuntil(b"\r\n\r\n")
+            except asyncio.IncompleteReadError:
+                return # client closed the connection
+            length = int(next((l.split(b":")[1] for l in head.split(b"\r\n") if l.lower().startswith(b"content-length")), 0))
+            await reader.readexactly(length)
+            body = b'{"audio": "UklGRg=="}'
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n%s" % (len(body), body))
+            await writer.drain()
+
+    server = await asyncio.start_unix_server(handle, path=socket_path)
+    engine = VoiceEngineClient(socket_path=socket_path)
+    try:
+        for _ in range(3):
+            resp = await engine.post("/tts", json={"text": "One sentence."})
+            assert resp.json()["audio"] == "UklGRg=="
+        assert len(connections) == 1 # keep-alive: one connection for all sentences
+    finally:
+        await engine.close()
+        server.close()
@@ -0,0 +1,178 @@
+import base64
+import json
+import pytest
+from starlette.testclient import TestClient
+from app.main import app
+from app.api import voice as voice_api
+from app.services.voice_service import VoiceService
+
+WAV = b"RIFF\x00\x00\x00\x00WAVEfmt "
+
+async def fake_events(text, context_chunks, note_id, voice=None):
+    yield {"query": text}
+    yield {"token": "Hello."}
+    yield {"audio": WAV}
+    yield {"done": True}
+
+@pytest.fixture
+def fake_turn(monkeypatch):
+    sessions = []
+
+    async def prepare(note_id, audio_bytes, session_id=None):
+        sessions.append(session_id)
+        return "what is this?", ["chunk"], session_id or f"session-{len(sessions)}"
+    monkeypatch.setattr(voice_api, "prepare_pdf_turn", prepare)
+    monkeypatch.setattr(VoiceService, "pdf_response_events", staticmethod(fake_events))
+    return sessions
+
+def test_websocket_sends_audio_as_binary_frames(fake_turn):
+    with TestClient(app).websocket_connect("/api/voice/pdf/1/ws") as ws:
+        ws.send_bytes(b"recorded-wav")
+        assert ws.receive_json() == {"query": "what is this?"}
+        assert ws.receive_json() == {"token": "Hello."}
+        assert ws.receive_bytes() == WAV
+        assert ws.receive_json() == {"done": True}
+
+def test_each_connection_pins_its_own_context(fake_turn):
+    client = TestClient(app)
+    for _ in range(2):
+        with client.websocket_connect("/api/voice/pdf/1/ws") as ws:
+            for _ in range(2):
+                ws.send_bytes(b"recorded-wav")
+                ws.receive_json(), ws.receive_json(), ws.receive_bytes()
+                assert ws.receive_json() == {"done": True}
+    # Later turns reuse the connection's session; a new connection (another client) starts fresh
+    assert fake_turn == [None, "session-1", None, "session-3"]
+
+@pytest.mark.asyncio
+async def test_sse_adapter_keeps_base64_compatibility(fake_turn):
+    events = [e async for e in VoiceService.generate_pdf_response_stream("q", [], 1)]
+    audio_events = [json.loads(e[len("data: "):]) for e in events if '"audio"' in e]
+
+    assert base64.b64decode(audio_events[0]["audio"]) == WAV
+
+@pytest.mark.asyncio
+async def test_audio_streams_in_order_before_audit_finishes(monkeypatch):
+    import asyncio
+    from app.core.llm import NeuroVaultLLM
+    from app.agents.auditor import AuditorAgent
+    from app.core.resilience import llm_breaker
+
+    async def tokens():
+        for t in ["First sentence is long. ", "Short. ", "Third one", " ends here."]:
+            yield {"message": {"content": t}}
+            await asyncio.sleep(0.01)
+
+    async def chat(**kwargs):
+        return tokens()
+
+    async def tts(sentence, voice=None):
+        # Earlier sentences take longer: order must still hold
+        await asyncio.sleep(0.05 if sentence.startswith("First") else 0.01)
+        return sentence.encode()
+
+    async def slow_verify(self, question, answer, context_chunks):
+        await asyncio.sleep(0.3)
+        return {"is_valid": True, "reason": "ok", "correction": None}
+
+    monkeypatch.setattr(NeuroVaultLLM, "chat", chat)
+    monkeypatch.setattr(VoiceService, "synthesize_audio_bytes", staticmethod(tts))
+    monkeypatch.setattr(AuditorAgent, "verify", slow_verify)
+    llm_breaker.record_success() # earlier tests may have tripped it; an open breaker skips the audit
+
+    events = [e async for e in VoiceService.pdf_response_events("q", ["short context"], 1)]
+    kinds = [next(iter(e)) if "type" not in e else e["type"] for e in events]
+    audio = [e["audio"] for e in events if "audio" in e]
+
+    assert audio == [b"First sentence is long.", b"Short.", b"Third one ends here."]
+    assert kinds.index("audio") < kinds.index("verification") # speech is not gated on the audit
+    assert kinds[-1] == "done"
+    verification = next(e for e in events if e.get("type") == "verification")
+    assert verification == {"verified": True, "correction": None, "reason": "ok", "skipped": False, "method": None, "type": "verification"} # as in chat
+
+class FakeEngineStream:
+    """Stands in for the Voice Engine /stt/stream socket."""
+
+    def __init__(self, events):
+        self.events = events
+        self.sent = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    async def send(self, data):
+        self.sent.append(data)
+
+    async def close(self):
+        pass
+
+    async def __aiter__(self):
+        for event in self.events:
+            yield json.dumps(event)
+
+def test_streaming_command_reuses_speculative_interpretation(monkeypatch):
+    from app.core.voice_engine import voice_engine
+
+    engine = FakeEngineStream([
+        {"type": "partial", "segment": 0, "text": "Remind me"},
+        {"type": "final", "segment": 0, "text": "Remind me to buy milk."},
+        {"type": "done", "text": "Remind me to buy milk."},
+    ])
+    routed, processed = [], {}
+
+    interpretation = {"intent": "ACTION", "action": {"type": "TASK", "summary": "Buy milk"}, "note": {}, "source": "rules"}
+
+    async def interpret(text):
+        routed.append(text)
+        return interpretation
+
+    async def process_command(db, text, generate_audio=True, interpretation=None, **kwargs):
+        processed.update(text=text, interpretation=interpretation)
+        return {"response": "Added 'Buy milk' to General list.", "intent": "ACTION"}
+
+    monkeypatch.setattr(voice_engine, "connect_stream", lambda path: engine)
+    monkeypatch.setattr(VoiceService, "interpret", staticmethod(interpret))
+    monkeypatch.setattr(VoiceService, "process_command", staticmethod(process_command))
+
+    with TestClient(app).websocket_connect("/api/voice/command/ws?speak=false") as ws:
+        assert ws.receive_json()["type"] == "partial"
+        assert ws.receive_json()["text"] == "Remind me to buy milk."
+        result = ws.receive_json()
+
+    assert result["done"] and result["query"] == "Remind me to buy milk."
+    assert routed == ["Remind me to buy milk."] # routed once, before the user finished
+    assert processed == {"text": "Remind me to buy milk.", "interpretation": interpretation}
+
+@pytest.mark.asyncio
+async def test_recording_is_written_while_transcribing(monkeypatch, tmp_path):
+    import asyncio
+    import os
+    monkeypatch.chdir(tmp_path)
+    events = []
+
+    async def transcribe(audio_bytes, mode=None):
+        events.append("stt_start")
+        await asyncio.sleep(0.05)
+        events.append("stt_done")
+        return "note to self"
+
+    async def process_command(db, text, audio_path=None, **kwargs):
+        events.append("command")
+        assert audio_path and open(audio_path, "rb").read() == WAV # linked only once written
+        return {"response": "Saved."}
+
+    real_to_thread = asyncio.to_thread
+    async def to_thread(fn, *args):
+        events.append("write")
+        return await real_to_thread(fn, *args)
+
+    monkeypatch.setattr(VoiceService, "transcribe", staticmethod(transcribe))
+    monkeypatch.setattr(VoiceService, "process_command", staticmethod(process_command))
+    monkeypatch.setattr(asyncio, "to_thread", to_thread)
+
+    assert await VoiceService.process_audio(None, WAV) == {"response": "Saved."}
+    assert events.index("write") < events.index("stt_done") < events.index("command")
+    assert len(os.listdir("dumps/audio")) == 1
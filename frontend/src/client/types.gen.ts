@@ -186,6 +186,14 @@ export type SummaryResponse = {
      * Tasks
      */
     tasks?: Array<TaskItem>;
+    /**
+     * Version
+     */
+    version?: number;
+    /**
+     * Is Stale
+     */
+    is_stale?: boolean;
 };
 
 /**
@@ -28,6 +28,8 @@ export const AgentChatModal: React.FC<AgentChatModalProps> = ({ isOpen, onClose,
     const mediaRecorderRef = useRef<MediaRecorder | null>(null);
     const audioChunksRef = useRef<Blob[]>([]);
     const audioContextRef = useRef<AudioContext | null>(null);
+    // Server-issued chat session: keeps the document context pinned across turns
+    const chatSessionRef = useRef<string | null>(null);
 
     // Audio Helpers
     const audioBufferToWav = (buffer: AudioBuffer): Blob => {
@@ -98,6 +100,7 @@ export const AgentChatModal: React.FC<AgentChatModalProps> = ({ isOpen, onClose,
 
     // Audio Queue System
     const audioQueueRef = useRef<string[]>([]);
+    const audioMimeRef = useRef('audio/wav');
     const isPlayingQueueRef = useRef(false);
 
     const playNextInQueue = async () => {
@@ -116,6 +119,7 @@ export const AgentChatModal: React.FC<AgentChatModalProps> = ({ isOpen, onClose,
 
         const audio = new Audio(audioSrc);
         audio.onended = () => {
+            if (audioSrc.startsWith('blob:')) URL.revokeObjectURL(audioSrc);
             console.log("[DEBUG] Audio Ended. Next...");
             playNextInQueue();
         };
@@ -134,6 +138,46 @@ export const AgentChatModal: React.FC<AgentChatModalProps> = ({ isOpen, onClose,
         }
     };
 
+    const handleStreamEvent = (data: any) => {
+        if (data.audio_mime) {
+            audioMimeRef.current = data.audio_mime;
+        }
+
+        if (data.query) {
+            setMessages(prev => [...prev, { role: 'user', content: data.query }]);
+            // Create placeholder for agent
+            setMessages(prev => [...prev, { role: 'agent', content: '', verified: false }]);
+        }
+
+        if (data.token) {
+            setMessages(prev => {
+                const newMsgs = [...prev];
+                const lastIndex = newMsgs.length - 1;
+                // CRITICAL: Copy the object to avoid mutation in StrictMode (which causes double text)
+                const lastMsg = { ...newMsgs[lastIndex] };
+
+                if (lastMsg.role === 'agent') {
+                    lastMsg.content += data.token;
+                    newMsgs[lastIndex] = lastMsg;
+                }
+                return newMsgs;
+            });
+        }
+
+        // Handle Verification Event
+        if (data.type === 'verification' || data.verified !== undefined) {
+            setMessages(prev => {
+                const newMsgs = [...prev];
+                const lastMsg = newMsgs[newMsgs.length - 1];
+                if (lastMsg.role === 'agent') {
+                    lastMsg.verified = data.verified;
+                    lastMsg.correction = data.correction;
+                }
+                return newMsgs;
+            });
+        }
+    };
+
     const processAudio = async (blob: Blob) => {
         if (!isOpen) return;
 
@@ -154,87 +198,40 @@ export const AgentChatModal: React.FC<AgentChatModalProps> = ({ isOpen, onClose,
             const renderedBuffer = await offlineCtx.startRendering();
             const wavBlob = audioBufferToWav(renderedBuffer);
 
-            const formData = new FormData();
-            formData.append("file", wavBlob, "recording.wav");
-
-            // Use Streaming Endpoint
-            const url = `http://localhost:8000/api/voice/pdf/${noteId}/stream`;
-
-            const res = await fetch(url, { method: 'POST', body: formData });
-            if (!res.body) throw new Error("No response body");
-
-            const reader = res.body.getReader();
-            const decoder = new TextDecoder();
-
             // Clear any old queue
             audioQueueRef.current = [];
 
-            while (true) {
-                const { done, value } = await reader.read();
-                if (done) break;
-
-                const chunk = decoder.decode(value);
-                const lines = chunk.split('\n\n');
-
-                for (const line of lines) {
-                    if (line.startsWith('data: ')) {
-                        try {
-                            const data = JSON.parse(line.slice(6));
-
-                            if (data.query) {
-                                setMessages(prev => [...prev, { role: 'user', content: data.query }]);
-                                // Create placeholder for agent
-                                setMessages(prev => [...prev, { role: 'agent', content: '', verified: false }]);
-                            }
-
-                            if (data.token) {
-                                setMessages(prev => {
-                                    const newMsgs = [...prev];
-                                    const lastIndex = newMsgs.length - 1;
-                                    // CRITICAL: Copy the object to avoid mutation in StrictMode (which causes double text)
-                                    const lastMsg = { ...newMsgs[lastIndex] };
-
-                                    if (lastMsg.role === 'agent') {
-                                        lastMsg.content += data.token;
-                                        newMsgs[lastIndex] = lastMsg;
-                                    }
-                                    return newMsgs;
-                                });
-                            }
-
-                            if (data.audio) {
-                                console.log("[DEBUG] Received Audio Chunk length:", data.audio.length);
-                                const audioSrc = `data:audio/wav;base64,${data.audio}`;
-                                audioQueueRef.current.push(audioSrc);
-
-                                // Aggressively start if not flagged as playing
-                                if (!isPlayingQueueRef.current) {
-                                    console.log("[DEBUG] Starting Queue from idle state.");
-                                    playNextInQueue();
-                                } else {
-                                    console.log("[DEBUG] Audio added to queue (Already playing).");
-                                }
-                            }
-
-                            // Handle Verification Event
-                            if (data.type === 'verification' || data.verified !== undefined) {
-                                setMessages(prev => {
-                                    const newMsgs = [...prev];
-                                    const lastMsg = newMsgs[newMsgs.length - 1];
-                                    if (lastMsg.role === 'agent') {
-                                        lastMsg.verified = data.verified;
-                                        lastMsg.correction = data.correction;
-                                    }
-                                    return newMsgs;
-                                });
-                            }
-
-                        } catch (e) {
-                            // ignore parse errors
+            // Binary WebSocket: JSON text frames for events, binary frames for WAV audio (no base64)
+            const ws = new WebSocket(`ws://localhost:8000/api/voice/pdf/${noteId}/ws`);
+            ws.binaryType = 'blob';
+
+            await new Promise<void>((resolve) => {
+                ws.onopen = () => ws.send(wavBlob);
+                ws.onmessage = (event) => {
+                    if (event.data instanceof Blob) {
+                        const audioSrc = URL.createObjectURL(new Blob([event.data], { type: audioMimeRef.current }));
+                        audioQueueRef.current.push(audioSrc);
+                        // Aggressively start if not flagged as playing
+                        if (!isPlayingQueueRef.current) {
+                            playNextInQueue();
                         }
+                        return;
                     }
-                }
-            }
+                    try {
+                        const data = JSON.parse(event.data);
+                        handleStreamEvent(data);
+                        if (data.done || data.error) {
+                            ws.close();
+                        }
+                    } catch (e) {
+                        // ignore parse errors
+                    }
+                };
+                ws.onerror = (e) => {
+                    console.error("[DEBUG] Voice socket error:", e);
+                };
+                ws.onclose = () => resolve();
+            });
 
             setIsTranscribing(false);
 
@@ -276,7 +273,7 @@ export const AgentChatModal: React.FC<AgentChatModalProps> = ({ isOpen, onClose,
             const response = await fetch(`http://localhost:8000/api/chat/pdf/${noteId}/stream`, {
                 method: 'POST',
                 headers: { 'Content-Type': 'application/json' },
-                body: JSON.stringify({ query: userMsg })
+                body: JSON.stringify({ query: userMsg, session_id: chatSessionRef.current })
             });
 
             if (!response.body) return;
@@ -300,6 +297,10 @@ export const AgentChatModal: React.FC<AgentChatModalProps> = ({ isOpen, onClose,
                         try {
                             const data = JSON.parse(jsonStr);
 
+                            if (data.session_id) {
+                                chatSessionRef.current = data.session_id;
+                            }
+
                             if (data.token) {
                                 accumulatedText += data.token;
                                 setMessages(prev => {
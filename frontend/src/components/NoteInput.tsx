@@ -191,7 +191,7 @@ export const NoteCard = ({ note }: NoteCardProps) => {
             {note.file_path && (
                 <div className="mt-3">
                     {/* Audio Player */}
-                    {(note.media_type === 'voice' || note.file_path?.endsWith('.wav')) && (
+                    {(note.media_type === 'voice' || /\.(wav|ogg|mp3)$/.test(note.file_path || '')) && (
                         <div className="w-full bg-black/20 rounded-xl p-3 border border-white/5">
                             <audio
                                 controls
@@ -262,7 +262,7 @@ export const NoteCard = ({ note }: NoteCardProps) => {
                     )}
 
                     {/* Generic File Handling (if not image, pdf, or audio) */}
-                    {!isImage && !isPdf && note.media_type !== 'voice' && !note.file_path?.endsWith('.wav') && (
+                    {!isImage && !isPdf && note.media_type !== 'voice' && !/\.(wav|ogg|mp3)$/.test(note.file_path || '') && (
                         <a href={fileUrl} target="_blank" rel="noreferrer" className="inline-flex items-center gap-2 px-3 py-1.5 bg-white/5 rounded text-xs text-ash-gray hover:text-banana transition-colors mt-2">
                             <DocumentTextIcon className="h-3 w-3" />
                             Open Attachment
@@ -4,13 +4,21 @@ import { useSettingsStore } from '../stores/settingsStore';
 import { ArrowPathIcon, SparklesIcon } from '@heroicons/react/24/outline';
 
 export const RollingSummary = () => {
-    const { summary, isLoading, fetchSummary, refreshSummary } = useNoteStore();
+    const { summary, summaryPending, isLoading, fetchSummary, refreshSummary } = useNoteStore();
     const { timezone } = useSettingsStore();
 
     useEffect(() => {
         fetchSummary();
     }, [fetchSummary]);
 
+    // The server regenerates stale summaries in the background; poll until a new version
+    // (or the first summary) lands
+    useEffect(() => {
+        if (!summary?.is_stale && !(summary === null && summaryPending)) return;
+        const timer = setTimeout(fetchSummary, 5000);
+        return () => clearTimeout(timer);
+    }, [summary, summaryPending, fetchSummary]);
+
     if (!summary && !isLoading) {
         return (
             <div className="bg-gradient-to-br from-neural-purple/10 to-transparent p-8 rounded-3xl border border-neural-purple/20 text-center relative overflow-hidden group">
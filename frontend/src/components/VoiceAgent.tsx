@@ -174,7 +174,7 @@ const VoiceAgent = () => {
                 }
 
                 if (data.audio) {
-                    playAudio(data.audio);
+                    playAudio(data.audio, data.audio_mime);
                 } else {
                     // Fallback to browser TTS if no audio returned (unlikely with our logic but safe)
                     speak(data.response);
@@ -191,9 +191,9 @@ const VoiceAgent = () => {
         }
     };
 
-    const playAudio = (base64String: string) => {
+    const playAudio = (base64String: string, mime: string = 'audio/wav') => {
         try {
-            const audio = new Audio(`data:audio/wav;base64,${base64String}`);
+            const audio = new Audio(`data:${mime || 'audio/wav'};base64,${base64String}`);
             audio.play();
         } catch (e) {
             console.error("Audio Playback Error", e);
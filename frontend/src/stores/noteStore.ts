@@ -20,6 +20,7 @@ interface NoteState {
     searchQuery: string;
     isVoiceSearch: boolean;
     summary: SummaryResponse | null;
+    summaryPending: boolean; // no summary yet, but the server is generating the first one
     isLoading: boolean;
     error: string | null;
 
@@ -46,6 +47,7 @@ export const useNoteStore = create<NoteState>((set, get) => ({
     searchQuery: '',
     isVoiceSearch: false,
     summary: null,
+    summaryPending: false,
     isLoading: false,
     error: null,
 
@@ -143,14 +145,14 @@ export const useNoteStore = create<NoteState>((set, get) => ({
     fetchSummary: async () => {
         set({ isLoading: true, error: null });
         try {
-            const { data, error } = await getSummaryApiSummaryGet();
+            const { data, error, response } = await getSummaryApiSummaryGet();
             if (error) {
-                set({ summary: null });
+                set({ summary: null, summaryPending: response.status === 404 && response.headers.has('Retry-After') });
             } else if (data) {
-                set({ summary: data as SummaryResponse });
+                set({ summary: data as SummaryResponse, summaryPending: false });
             }
         } catch (err) {
-            set({ summary: null });
+            set({ summary: null, summaryPending: false });
         } finally {
             set({ isLoading: false });
         }
@@ -1,34 +1,49 @@
+"""
+One-time conversion of voices.json into a memory-mapped voice pack.
+
+    python convert_voices.py
+
+Writes:
+- voices.npy: every voice stacked into one float32 array (np.load(..., mmap_mode="r") loads in milliseconds,
+  and worker processes share the same page-cache pages)
+- voices.index.json: voice name -> row in voices.npy
+- voice_default.npy: a single voice, only used to satisfy the Kokoro constructor
+"""
 import json
-import numpy as np
 import os
+import numpy as np
+
+VOICES_JSON = "voices.json"
+VOICE_PACK = "voices.npy"
+VOICE_INDEX = "voices.index.json"
+DEFAULT_VOICE_FILE = "voice_default.npy"
+DEFAULT_VOICE = "af_sarah"
+
+def convert(source: str = VOICES_JSON):
+    print(f"Loading {source}...")
+    with open(source, "r") as f:
+        data = json.load(f)
+
+    if isinstance(data, list):
+        # Older releases ship a single voice as a bare array
+        data = {"default": data}
+    if not isinstance(data, dict) or not data:
+        raise ValueError(f"Unknown voices format: {type(data)}")
+
+    names = sorted(data)
+    arrays = [np.asarray(data[name], dtype=np.float32) for name in names]
+    shapes = {a.shape for a in arrays}
+    if len(shapes) != 1:
+        raise ValueError(f"Voices have different shapes, cannot stack: {shapes}")
+
+    pack = np.stack(arrays)
+    np.save(VOICE_PACK, pack)
+    with open(VOICE_INDEX, "w") as f:
+        json.dump({name: i for i, name in enumerate(names)}, f)
+
+    default = DEFAULT_VOICE if DEFAULT_VOICE in data else names[0]
+    np.save(DEFAULT_VOICE_FILE, arrays[names.index(default)])
+    print(f"Saved {len(names)} voices {pack.shape} to {VOICE_PACK} ({os.path.getsize(VOICE_PACK) // 1024} KB)")
 
-print("Loading voices.json...")
-with open("voices.json", "r") as f:
-    data = json.load(f)
-
-print("Converting to numpy...")
-# It seems data is a dict or list?
-# voices.json from release is normally a JSON object mapping name -> embedding
-# BUT headers showed [[...]]?
-# Let's check type.
-
-if isinstance(data, dict):
-    print("Detected Dictionary format.")
-    # If library expects np.load() to return a dictionary-like object (allow_pickle=True needed usually) or struct array?
-    # Wait, np.load on a file usually returns an array or NpzFile.
-    # If the library expects `self.voices` to be an array, this is confusing.
-    pass
-elif isinstance(data, list):
-    print("Detected List format.")
-    arr = np.array(data, dtype=np.float32)
-    np.save("voices.npy", arr)
-    print("Saved voices.npy")
-else:
-    print(f"Unknown type: {type(data)}")
-
-# However, if kokoro-onnx source code does `np.load(path)`, it expects a .npy file.
-# If I provide a .npy file, `np.load` works.
-# But what DOES it expect inside?
-# If it expects a dictionary of voices?
-# Newer kokoro-onnx might use a simplified voices.bin or .npy which is just a big array?
-# Let's try to save what we have as .npy and see if passing "voices.npy" works.
+if __name__ == "__main__":
+    convert()
@@ -0,0 +1,35 @@
+import os
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+# Speech is grouped into chunks of at most LONGFORM_CHUNK_SECONDS (Whisper's window is 30 s)
+CHUNK_SECONDS = float(os.environ.get("LONGFORM_CHUNK_SECONDS", "30"))
+# Chunks sent to the STT pool at once; defaults to the pool size so live commands still get slots
+MAX_IN_FLIGHT = int(os.environ.get("LONGFORM_MAX_IN_FLIGHT", "0"))
+
+def speech_spans(audio: np.ndarray) -> list[tuple[int, int]]:
+    """(start, end) sample offsets of speech, from faster-whisper's Silero VAD."""
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+    options = VadOptions(min_silence_duration_ms=500, speech_pad_ms=200)
+    return [(span["start"], span["end"]) for span in get_speech_timestamps(audio, options)]
+
+def plan_chunks(spans: list[tuple[int, int]], max_samples: int) -> list[tuple[int, int]]:
+    """
+    Merge consecutive speech spans into chunks no longer than `max_samples`,
+    cutting at silences; a single span longer than that is split evenly.
+    """
+    chunks = []
+    for start, end in spans:
+        while end - start > max_samples:
+            chunks.append((start, start + max_samples))
+            start += max_samples
+        if chunks and end - chunks[-1][0] <= max_samples and start >= chunks[-1][1]:
+            chunks[-1] = (chunks[-1][0], end)
+        else:
+            chunks.append((start, end))
+    return chunks
+
+def split_for_transcription(audio: np.ndarray) -> list[tuple[int, int]]:
+    spans = speech_spans(audio)
+    return plan_chunks(spans, int(CHUNK_SECONDS * SAMPLE_RATE))
@@ -1,5 +1,5 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse, Response
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from pydantic import BaseModel
 import uvicorn
 import base64
@@ -7,124 +7,316 @@ import soundfile as sf
 import io
 import numpy as np
 import os
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from streaming_stt import PCM16Stream, SpeechSegmenter
 
 # Import Libraries (Validation that imports work)
 try:
-    from kokoro_onnx import Kokoro
-    from faster_whisper import WhisperModel
+    import kokoro_onnx
+    import faster_whisper
 except ImportError as e:
     print(f"Missing dependency: {e}")
     exit(1)
 
-app = FastAPI(title="Voice Engine (Py3.12)")
+import stt_tiers
+import longform
+from convert_voices import DEFAULT_VOICE
+from workers import ModelPool, QueueFull, tts_job, stt_job, stt_tier_job, stt_chunk_job
 
-# --- Initialize Models ---
-print("Loading Kokoro TTS...")
-try:
-    # Hack: voices.json is a dict, but kokoro-onnx expects an npy file (single voice or pickle?).
-    # We will extract 'af_sarah' and save as .npy to feed it.
-    import json
-    if os.path.exists("voices.json"):
-        with open("voices.json", "r") as f:
-            voices_data = json.load(f)
-        
-        # Check available voices
-        # print(f"Available voices: {list(voices_data.keys())}")
-        
-        target_voice = "af_sarah"
-        if target_voice not in voices_data and "af" in voices_data:
-             target_voice = "af"
-        
-        if target_voice in voices_data:
-            print(f"Extracting voice: {target_voice}")
-            voice_arr = np.array(voices_data[target_voice], dtype=np.float32)
-            np.save("voice.npy", voice_arr)
-            
-            kokoro = Kokoro("kokoro-v0_19.onnx", "voice.npy")
-            # Monkey-patch: Ensure kokoro.voices is a dict so name lookup works
-            kokoro.voices = {target_voice: voice_arr}
-            print(f"Kokoro Loaded with single voice: {target_voice}")
-        else:
-            print("Target voice not found in voices.json")
-            kokoro = None
-    else:
-        print("voices.json not found.")
-        kokoro = None
+# --- Worker Pools ---
+# Inference never runs on the event loop. Each model gets its own pool so STT and TTS overlap.
+#   TTS_POOL / STT_POOL: "thread" (one shared model) or "process" (one model copy per worker)
+#   TTS_WORKERS / STT_WORKERS: pool size; VOICE_QUEUE_SIZE: queued+running jobs before 503
+tts_pool = ModelPool("tts", os.environ.get("TTS_POOL", "thread"), int(os.environ.get("TTS_WORKERS", "1")),
+                     int(os.environ.get("VOICE_QUEUE_SIZE", "16")))
+stt_pool = ModelPool("stt", os.environ.get("STT_POOL", "thread"), int(os.environ.get("STT_WORKERS", "1")),
+                     int(os.environ.get("VOICE_QUEUE_SIZE", "16")))
 
-except Exception as e:
-    print(f"Failed to load Kokoro: {e}")
-    kokoro = None
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await tts_pool.start()
+    await stt_pool.start()
+    yield
+    tts_pool.shutdown()
+    stt_pool.shutdown()
 
-print("Loading Faster Whisper...")
-try:
-    # "tiny" or "base" or "small" for speed on CPU/Mac
-    # default to "base" which is good balance
-    whisper = WhisperModel("base", device="cpu", compute_type="int8") 
-    print("Faster Whisper Loaded.")
-except Exception as e:
-    print(f"Failed to load Whisper: {e}")
-    whisper = None
+app = FastAPI(title="Voice Engine (Py3.12)", lifespan=lifespan)
 
+def busy(e: QueueFull) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
 
 class TTSRequest(BaseModel):
     text: str
-    voice: str = "af_sarah" # Default voice
+    voice: str = DEFAULT_VOICE
+    speed: float = 1.0
+    # "wav" / "pcm" / "ogg" (Opus) / "mp3" return raw bytes; "base64" is the legacy JSON mode (WAV)
+    encoding: str = "base64"
+    bitrate: int | None = None # kbps, compressed formats only
+
+# encoding -> (soundfile format, subtype, media type)
+AUDIO_FORMATS = {
+    "wav": ("WAV", None, "audio/wav"),
+    "ogg": ("OGG", "OPUS", "audio/ogg"),
+    "opus": ("OGG", "OPUS", "audio/ogg"),
+    "mp3": ("MP3", "MPEG_LAYER_III", "audio/mpeg"),
+}
+MEDIA_TYPES = {**{k: v[2] for k, v in AUDIO_FORMATS.items()}, "pcm": "audio/L16"}
+DEFAULT_BITRATES = {"ogg": 32, "opus": 32, "mp3": 64}
+
+def compression_level(encoding: str, sample_rate: int, bitrate: int) -> float:
+    """libsndfile takes a 0..1 compression level (0 = highest bitrate); map kbps onto the encoder's range."""
+    if encoding == "mp3":
+        low, high = (32, 320) if sample_rate >= 32000 else (8, 160) # MPEG-1 vs MPEG-2 rates
+    else:
+        low, high = (6, 256) # Opus
+    return min(max(1 - (bitrate - low) / (high - low), 0.0), 1.0)
+
+def encode_audio(samples: np.ndarray, sample_rate: int, encoding: str, bitrate: int | None = None) -> bytes:
+    if encoding == "pcm":
+        # 16-bit little-endian mono, sample rate in X-Sample-Rate
+        return (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+    container, subtype, _ = AUDIO_FORMATS["wav" if encoding == "base64" else encoding]
+    buffer = io.BytesIO()
+    if container == "WAV":
+        sf.write(buffer, samples, sample_rate, format=container)
+    else:
+        level = compression_level(encoding, sample_rate, bitrate or DEFAULT_BITRATES[encoding])
+        sf.write(buffer, samples, sample_rate, format=container, subtype=subtype, compression_level=level)
+    return buffer.getvalue()
+
+def check_encoding(encoding: str):
+    if encoding != "base64" and encoding not in MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unsupported encoding: {encoding}")
 
 @app.post("/tts")
 async def tts(request: TTSRequest):
-    if not kokoro:
+    if not tts_pool.ready:
         raise HTTPException(status_code=500, detail="Kokoro model not loaded")
+    check_encoding(request.encoding)
+    voices = tts_pool.info.get("voices") or []
+    voice = request.voice
+    if voices and voice not in voices:
+        if voice != DEFAULT_VOICE:
+            raise HTTPException(status_code=400, detail=f"Unknown voice '{voice}'. Available: {', '.join(voices)}")
+        voice = voices[0] # This voices.json has no af_sarah: the default means "any installed voice"
         
     try:
-        # Generate Audio
+        # Generate Audio (worker pool; one job per sentence so the queue depth counts sentences)
         # kokoro.create returns (samples, sample_rate)
-        samples, sample_rate = kokoro.create(
-            request.text, 
-            voice=request.voice, 
-            speed=1.0, 
-            lang="en-us"
-        )
-        
-        # Convert float32 numpy array to WAV bytes
-        # soundfile.write expects file path or file-like object
-        buffer = io.BytesIO()
-        sf.write(buffer, samples, sample_rate, format='WAV')
-        buffer.seek(0)
-        wav_bytes = buffer.read()
+        samples, sample_rate = await tts_pool.run(tts_job, request.text, voice, request.speed)
         
-        # Return Base64
-        b64_audio = base64.b64encode(wav_bytes).decode('utf-8')
-        return {"audio": b64_audio}
+        # Opus/MP3 encoding is CPU work too: keep it off the loop
+        audio_bytes = await asyncio.to_thread(encode_audio, samples, sample_rate, request.encoding, request.bitrate)
+        if request.encoding == "base64":
+            return {"audio": base64.b64encode(audio_bytes).decode('utf-8')}
+
+        return Response(content=audio_bytes, media_type=MEDIA_TYPES[request.encoding], headers={"X-Sample-Rate": str(sample_rate)})
         
+    except QueueFull as e:
+        raise busy(e)
     except Exception as e:
         print(f"TTS Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+def stt_load() -> float:
+    return stt_pool.pending / stt_pool.max_queue
+
 @app.post("/stt")
-async def stt(file: UploadFile = File(...)):
-    if not whisper:
+async def stt(file: UploadFile = File(...), mode: str | None = Form(None)):
+    """
+    `mode` is an optional hint ("command", "note", "dictation" or a tier name);
+    without it the tier follows the audio length. See stt_tiers.py.
+    """
+    if not stt_pool.ready:
         raise HTTPException(status_code=500, detail="Whisper model not loaded")
+    if mode and mode not in stt_tiers.HINTS and mode not in stt_tiers.TIERS:
+        raise HTTPException(status_code=400, detail=f"Unknown mode '{mode}'")
         
     try:
-        # Save temp file because faster-whisper often prefers path or binary stream
-        # It accepts binary stream too!
         audio_bytes = await file.read()
-        audio_stream = io.BytesIO(audio_bytes)
-        
-        segments, info = whisper.transcribe(audio_stream, beam_size=5)
-        
-        text = " ".join([segment.text for segment in segments]).strip()
-        return {"text": text}
+        result = await stt_pool.run(stt_tier_job, audio_bytes, mode, stt_load())
+        return result
         
+    except QueueFull as e:
+        raise busy(e)
     except Exception as e:
         print(f"STT Error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.post("/stt/long")
+async def stt_long(file: UploadFile = File(...), mode: str | None = Form(None)):
+    """
+    Long-form transcription (meetings, uploaded recordings).
+    VAD splits the audio into <=30 s speech chunks that run in parallel on the STT pool.
+    Streams NDJSON: {"type": "start", "duration", "chunks", "tier"}, then
+    {"type": "segment", "chunk", "start", "end", "text"} as each chunk finishes (completion order),
+    then {"type": "done", "text", "duration", "elapsed", "rtf"} (rtf = processing time / audio time).
+    """
+    if not stt_pool.ready:
+        raise HTTPException(status_code=500, detail="Whisper model not loaded")
+    if stt_pool.saturated:
+        raise busy(QueueFull(f"stt queue full ({stt_pool.pending}/{stt_pool.max_queue})"))
+    data = await file.read()
+    started = time.perf_counter()
+
+    def prepare():
+        from faster_whisper.audio import decode_audio
+        samples = decode_audio(io.BytesIO(data), sampling_rate=longform.SAMPLE_RATE)
+        return samples, longform.split_for_transcription(samples)
+
+    try:
+        samples, chunks = await asyncio.to_thread(prepare)
+    except Exception as e:
+        print(f"Long-form decode error: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    duration = len(samples) / longform.SAMPLE_RATE
+    # Long audio defaults to the accurate tier; downgrades under load like /stt
+    tier, _ = stt_tiers.choose_tier(duration, mode, stt_load())
+    # Leave pool capacity for interactive requests
+    slots = asyncio.Semaphore(longform.MAX_IN_FLIGHT or stt_pool.workers)
+
+    async def run_chunk(index: int, start: int, end: int):
+        async with slots:
+            while True:
+                try:
+                    return index, await stt_pool.run(stt_chunk_job, samples[start:end], start / longform.SAMPLE_RATE, tier)
+                except QueueFull:
+                    await asyncio.sleep(0.2) # Interactive traffic spike: wait for a slot rather than fail the upload
+
+    async def events():
+        yield json.dumps({"type": "start", "duration": round(duration, 2), "chunks": len(chunks), "tier": tier}) + "\n"
+        tasks = [asyncio.create_task(run_chunk(i, s, e)) for i, (s, e) in enumerate(chunks)]
+        texts = [""] * len(chunks)
+        try:
+            for finished in asyncio.as_completed(tasks):
+                index, result = await finished
+                texts[index] = result["text"]
+                for segment in result["segments"]:
+                    yield json.dumps({"type": "segment", "chunk": index, **segment}) + "\n"
+        except Exception as e:
+            print(f"Long-form STT Error: {e}")
+            yield json.dumps({"type": "error", "detail": str(e)}) + "\n"
+            return
+        finally:
+            for task in tasks:
+                task.cancel()
+        elapsed = time.perf_counter() - started
+        rtf = elapsed / duration if duration else 0.0
+        print(f"[STT] Long-form {duration:.1f}s audio in {elapsed:.1f}s ({len(chunks)} chunks, tier {tier}, RTF {rtf:.3f})")
+        yield json.dumps({
+            "type": "done",
+            "text": " ".join(t for t in texts if t),
+            "duration": round(duration, 2),
+            "elapsed": round(elapsed, 2),
+            "rtf": round(rtf, 4),
+        }) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@app.post("/transcode")
+async def transcode(file: UploadFile = File(...), encoding: str = Form("ogg"), bitrate: int | None = Form(None)):
+    """Re-encode an uploaded WAV/FLAC/OGG recording (e.g. stored voice dumps) into a compact format."""
+    check_encoding(encoding)
+    if encoding in ("base64", "pcm"):
+        raise HTTPException(status_code=400, detail="Transcode needs a container format")
+    data = await file.read()
+
+    def run() -> bytes:
+        samples, sample_rate = sf.read(io.BytesIO(data), dtype="float32")
+        return encode_audio(samples, sample_rate, encoding, bitrate)
+
+    try:
+        encoded = await asyncio.to_thread(run)
+    except Exception as e:
+        print(f"Transcode Error: {e}")
+        raise HTTPException(status_code=400, detail=str(e))
+    return Response(content=encoded, media_type=MEDIA_TYPES[encoding])
+
+def segment_tier(final: bool, duration: float) -> str:
+    # Partials are throwaway previews: always greedy
+    if not final:
+        return "fast"
+    return stt_tiers.choose_tier(duration, None, stt_load())[0]
+
+def segment_options(tier: str, prompt: str | None = None) -> dict:
+    # Segments are already cut by our VAD, so Whisper's own VAD would only add work
+    return {
+        **stt_tiers.tier_options(tier, vad=False),
+        "language": "en",
+        "condition_on_previous_text": False,
+        "without_timestamps": True,
+        "initial_prompt": prompt,
+    }
+
+@app.websocket("/stt/stream")
+async def stt_stream(websocket: WebSocket):
+    """
+    Streaming STT.
+    Client sends binary frames of 16 kHz mono PCM16, then the text message "end".
+    Server sends {"type": "partial"|"final", "segment": n, "text": ...} as speech is segmented by VAD,
+    and {"type": "done", "text": <all finals>} after "end".
+    """
+    await websocket.accept()
+    if not stt_pool.ready:
+        await websocket.close(code=1011, reason="Whisper model not loaded")
+        return
+
+    segmenter, pcm = SpeechSegmenter(), PCM16Stream()
+    finals = []
+
+    async def emit(kind: str, audio: np.ndarray):
+        # Previous finals as prompt keep casing/terms consistent across segments
+        prompt = " ".join(finals)[-200:] or None
+        index = len(finals)
+        if kind == "partial" and stt_pool.pending:
+            return # Workers are busy: drop the preview, the final will follow
+        tier = segment_tier(kind == "final", len(audio) / 16000)
+        text = (await stt_pool.run(stt_job, audio, segment_options(tier, prompt if kind == "final" else None)))["text"]
+        if kind == "final" and text:
+            finals.append(text)
+        await websocket.send_json({"type": kind, "segment": index, "text": text, "tier": tier})
+
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+            if message.get("bytes"):
+                for kind, audio in segmenter.feed(pcm.decode(message["bytes"])):
+                    await emit(kind, audio)
+            elif message.get("text") in ("end", json.dumps({"type": "end"})):
+                closed = segmenter.flush()
+                if closed:
+                    await emit(*closed)
+                await websocket.send_json({"type": "done", "text": " ".join(finals)})
+                segmenter, pcm = SpeechSegmenter(), PCM16Stream()
+                finals = []
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        print(f"STT Stream Error: {e}")
+        await websocket.close(code=1011)
+
 @app.get("/voices")
 def get_voices():
-    if kokoro and hasattr(kokoro, 'voices') and isinstance(kokoro.voices, dict):
-        return {"voices": list(kokoro.voices.keys())}
-    return {"voices": ["default"]}
+    return {"voices": tts_pool.info.get("voices") or ["default"]}
+
+@app.get("/health")
+def health():
+    """Pool state; `pending` near `max_queue` means requests are queueing."""
+    return {"tts": {**tts_pool.stats(), "loaded": tts_pool.ready}, "stt": {**stt_pool.stats(), "loaded": stt_pool.ready}}
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8001)
+    # Same-host deployments can skip TCP: VOICE_ENGINE_SOCKET=/tmp/neurovault-voice.sock python server.py
+    # (set the same VOICE_ENGINE_SOCKET for the backend)
+    socket_path = os.environ.get("VOICE_ENGINE_SOCKET")
+    if socket_path:
+        if os.path.exists(socket_path):
+            os.remove(socket_path) # Stale socket from a previous run
+        print(f"Voice Engine listening on unix:{socket_path}")
+        uvicorn.run(app, uds=socket_path)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8001)
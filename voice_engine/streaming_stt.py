@@ -0,0 +1,101 @@
+from collections import deque
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+class SpeechSegmenter:
+    """
+    Energy-based VAD for streamed 16 kHz mono audio.
+    feed() returns ("partial", audio) while someone is speaking (every `partial_every_ms`)
+    and ("final", audio) once `silence_ms` of silence closes the utterance segment.
+    """
+
+    FRAME_MS = 30
+
+    def __init__(self, threshold: float = 0.01, silence_ms: int = 600, min_speech_ms: int = 240,
+                 partial_every_ms: int = 1000, max_segment_ms: int = 20000, preroll_ms: int = 180):
+        self.frame = SAMPLE_RATE * self.FRAME_MS // 1000
+        self.threshold = threshold
+        self.silence_frames = silence_ms // self.FRAME_MS
+        self.min_speech_frames = min_speech_ms // self.FRAME_MS
+        self.partial_frames = partial_every_ms // self.FRAME_MS
+        self.max_frames = max_segment_ms // self.FRAME_MS
+        self.preroll = deque(maxlen=preroll_ms // self.FRAME_MS) # Keeps word onsets from being clipped
+        self.pending = np.zeros(0, dtype=np.float32)
+        self._reset_segment()
+
+    def _reset_segment(self):
+        self.segment = []
+        self.speech_frames = 0
+        self.silent_run = 0
+        self.since_partial = 0
+
+    @property
+    def in_speech(self) -> bool:
+        return bool(self.segment)
+
+    def _close(self):
+        audio = np.concatenate(self.segment)
+        speech = self.speech_frames
+        self._reset_segment()
+        # Clicks and coughs are not utterances
+        return ("final", audio) if speech >= self.min_speech_frames else None
+
+    def feed(self, samples: np.ndarray) -> list[tuple[str, np.ndarray]]:
+        events = []
+        self.pending = np.concatenate([self.pending, samples.astype(np.float32)])
+        while len(self.pending) >= self.frame:
+            frame, self.pending = self.pending[:self.frame], self.pending[self.frame:]
+            voiced = float(np.sqrt(np.mean(frame ** 2))) >= self.threshold
+
+            if not self.in_speech:
+                if voiced:
+                    self.segment = list(self.preroll) + [frame]
+                    self.speech_frames = 1
+                    self.preroll.clear()
+                else:
+                    self.preroll.append(frame)
+                continue
+
+            self.segment.append(frame)
+            self.since_partial += 1
+            if voiced:
+                self.speech_frames += 1
+                self.silent_run = 0
+            else:
+                self.silent_run += 1
+
+            if self.silent_run >= self.silence_frames or len(self.segment) >= self.max_frames:
+                closed = self._close()
+                if closed:
+                    events.append(closed)
+            elif self.since_partial >= self.partial_frames and self.speech_frames >= self.min_speech_frames:
+                self.since_partial = 0
+                events.append(("partial", np.concatenate(self.segment)))
+        return events
+
+    def flush(self) -> tuple[str, np.ndarray] | None:
+        """Close whatever is still open (client signalled end of audio)."""
+        if self.in_speech:
+            self.segment.append(self.pending)
+            self.pending = np.zeros(0, dtype=np.float32)
+            return self._close()
+        return None
+
+def pcm16_to_float(data: bytes) -> np.ndarray:
+    return np.frombuffer(data, dtype="<i2").astype(np.float32) / 32768.0
+
+class PCM16Stream:
+    """
+    Decodes a stream of little-endian int16 frames. A frame may end mid-sample (odd length):
+    the trailing byte is carried over to the next frame instead of failing the decode.
+    """
+
+    def __init__(self):
+        self.carry = b""
+
+    def decode(self, data: bytes) -> np.ndarray:
+        data = self.carry + data
+        usable = len(data) - len(data) % 2
+        self.carry = data[usable:]
+        return pcm16_to_float(data[:usable])
@@ -0,0 +1,69 @@
+import os
+
+# Decoding tiers, cheapest first.
+#   fast:     greedy, no timestamps. Short commands where latency matters most.
+#   balanced: beam search. Mid-length notes (the previous default for every request).
+#   accurate: beam search with context carried across windows, optionally on a larger
+#             model (STT_LONG_MODEL, e.g. "small"). Long dictation and recordings.
+TIER_ORDER = ["fast", "balanced", "accurate"]
+
+TIERS = {
+    "fast": {
+        "beam_size": 1,
+        "best_of": 1,
+        "temperature": 0.0,
+        "condition_on_previous_text": False,
+        "without_timestamps": True,
+    },
+    "balanced": {
+        "beam_size": 5,
+        "condition_on_previous_text": False,
+    },
+    "accurate": {
+        "beam_size": 5,
+        "condition_on_previous_text": True,
+    },
+}
+
+# Model per tier; None means the default WHISPER_MODEL
+TIER_MODELS = {"accurate": os.environ.get("STT_LONG_MODEL") or None}
+
+# Audio shorter than FAST_MAX_SECONDS decodes greedily, longer than LONG_MIN_SECONDS gets "accurate"
+FAST_MAX_SECONDS = float(os.environ.get("STT_FAST_MAX_SECONDS", "8"))
+LONG_MIN_SECONDS = float(os.environ.get("STT_LONG_MIN_SECONDS", "60"))
+# Step down one tier when the STT queue is at least this full (0 disables)
+DOWNGRADE_AT = float(os.environ.get("STT_DOWNGRADE_AT", "0.5"))
+# Silero VAD inside faster-whisper skips silence before decoding
+VAD_FILTER = os.environ.get("STT_VAD_FILTER", "1") == "1"
+
+# Client hints override the length-based choice
+HINTS = {"command": "fast", "note": "balanced", "dictation": "accurate"}
+
+def choose_tier(duration: float | None, hint: str | None = None, load: float = 0.0) -> tuple[str, bool]:
+    """
+    Pick a tier from the client hint (or the audio length) and the current queue load.
+    Returns (tier, downgraded).
+    """
+    if hint in TIERS:
+        tier = hint
+    elif hint in HINTS:
+        tier = HINTS[hint]
+    elif duration is None:
+        tier = "balanced"
+    elif duration <= FAST_MAX_SECONDS:
+        tier = "fast"
+    elif duration >= LONG_MIN_SECONDS:
+        tier = "accurate"
+    else:
+        tier = "balanced"
+
+    if DOWNGRADE_AT and load >= DOWNGRADE_AT and tier != "fast":
+        return TIER_ORDER[TIER_ORDER.index(tier) - 1], True
+    return tier, False
+
+def tier_options(tier: str, vad: bool = VAD_FILTER) -> dict:
+    options = dict(TIERS[tier])
+    if vad:
+        options["vad_filter"] = True
+        options["vad_parameters"] = {"min_silence_duration_ms": 500}
+    return options
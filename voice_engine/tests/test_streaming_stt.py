@@ -0,0 +1,14 @@
+import numpy as np
+from streaming_stt import PCM16Stream, SpeechSegmenter, pcm16_to_float
+
+def test_odd_length_frames_carry_the_split_sample_over():
+    samples = (np.sin(np.arange(1000) / 10) * 20000).astype("<i2")
+    data = samples.tobytes()
+    pcm = PCM16Stream()
+    decoded = [pcm.decode(data[i:i + 333]) for i in range(0, len(data), 333)] # every frame but the last is odd
+    assert np.array_equal(np.concatenate(decoded), pcm16_to_float(data))
+    assert pcm.decode(b"\x01").size == 0 and pcm.carry == b"\x01"
+
+def test_segmenter_accepts_decoded_odd_frames():
+    pcm, segmenter = PCM16Stream(), SpeechSegmenter()
+    assert segmenter.feed(pcm.decode(b"\x00" * 961)) == [] # silence, half a sample left over
@@ -0,0 +1,223 @@
+import asyncio
+import io
+import json
+import multiprocessing
+import os
+import threading
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import numpy as np
+
+# Per-process model handles. Thread pools share the ones loaded in the server process;
+# process pools load their own copy in each worker (see init_worker).
+kokoro = None
+whisper = None
+whisper_extra = {} # Larger tier models (stt_tiers.TIER_MODELS), loaded on first use
+_whisper_extra_lock = threading.Lock()
+
+WHISPER_MODEL = os.environ.get("WHISPER_MODEL", "base")
+
+# --- Model Loading ---
+
+class VoicePack(Mapping):
+    """Read-only name -> voice array view over the memory-mapped voices.npy."""
+
+    def __init__(self, pack: np.ndarray, index: dict[str, int]):
+        self.pack = pack
+        self.index = index
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.pack[self.index[name]]
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+def voice_pack_outdated() -> bool:
+    """True if any generated file is missing or older than voices.json (e.g. after a voices update)."""
+    import convert_voices
+    outputs = (convert_voices.VOICE_PACK, convert_voices.VOICE_INDEX, convert_voices.DEFAULT_VOICE_FILE)
+    if not all(os.path.exists(path) for path in outputs):
+        return True
+    if not os.path.exists(convert_voices.VOICES_JSON):
+        return False # Pack shipped without its source
+    source_mtime = os.path.getmtime(convert_voices.VOICES_JSON)
+    return any(os.path.getmtime(path) < source_mtime for path in outputs)
+
+def load_voice_pack() -> VoicePack:
+    import convert_voices
+    if voice_pack_outdated():
+        # One-time cost per voices.json; later starts only mmap the pack
+        print("Voice pack missing or outdated, converting voices.json...")
+        convert_voices.convert()
+    with open(convert_voices.VOICE_INDEX, "r") as f:
+        index = json.load(f)
+    return VoicePack(np.load(convert_voices.VOICE_PACK, mmap_mode="r"), index)
+
+def load_kokoro():
+    global kokoro
+    from kokoro_onnx import Kokoro
+    import convert_voices
+    print("Loading Kokoro TTS...")
+    try:
+        voices = load_voice_pack()
+        # The constructor needs a voices file; give it the small single-voice one,
+        # then serve every voice from the shared memory-mapped pack
+        kokoro = Kokoro("kokoro-v0_19.onnx", convert_voices.DEFAULT_VOICE_FILE)
+        kokoro.voices = voices
+        print(f"Kokoro Loaded with {len(voices)} voices (memory-mapped)")
+    except Exception as e:
+        print(f"Failed to load Kokoro: {e}")
+        kokoro = None
+
+def load_whisper(num_workers: int = 1):
+    global whisper
+    from faster_whisper import WhisperModel
+    print("Loading Faster Whisper...")
+    try:
+        # "tiny" or "base" or "small" for speed on CPU/Mac
+        # num_workers > 1 lets several threads decode in parallel on one model
+        whisper = WhisperModel(WHISPER_MODEL, device="cpu", compute_type="int8", num_workers=num_workers)
+        print("Faster Whisper Loaded.")
+    except Exception as e:
+        print(f"Failed to load Whisper: {e}")
+        whisper = None
+
+def get_whisper(name: str | None):
+    """The default model, or a tier's larger model (falls back to the default if it can't load)."""
+    if not name or name == WHISPER_MODEL:
+        return whisper
+    with _whisper_extra_lock:
+        if name not in whisper_extra:
+            from faster_whisper import WhisperModel
+            print(f"Loading Faster Whisper '{name}' for long-form audio...")
+            try:
+                whisper_extra[name] = WhisperModel(name, device="cpu", compute_type="int8")
+            except Exception as e:
+                print(f"Failed to load Whisper '{name}': {e}")
+                whisper_extra[name] = None
+        return whisper_extra[name] or whisper
+
+def init_worker(model: str, threads: int = 1):
+    if model == "tts":
+        load_kokoro()
+    else:
+        load_whisper(threads)
+
+# --- Jobs (module-level so process pools can pickle them) ---
+
+def describe(model: str) -> dict:
+    if model == "tts":
+        voices = sorted(kokoro.voices) if kokoro is not None and isinstance(getattr(kokoro, "voices", None), Mapping) else []
+        return {"loaded": kokoro is not None, "voices": voices}
+    return {"loaded": whisper is not None}
+
+def tts_job(text: str, voice: str, speed: float):
+    """
+    Synthesize one sentence; returns (samples, sample_rate).
+    kokoro-onnx has no batched inference, so each sentence is its own job: it is returned as soon as
+    it is ready, and concurrent sentences spread across the pool's workers.
+    """
+    return kokoro.create(text, voice=voice, speed=speed, lang="en-us")
+
+def stt_job(audio, options: dict) -> dict:
+    """Transcribe bytes (any container ffmpeg reads) or a 16 kHz float32 array."""
+    if isinstance(audio, (bytes, bytearray)):
+        audio = io.BytesIO(audio)
+    segments, info = whisper.transcribe(audio, **options)
+    # Segments are lazy: consume them inside the worker
+    text = " ".join(segment.text for segment in segments).strip()
+    return {"text": text, "duration": info.duration}
+
+def stt_tier_job(audio: bytes, hint: str | None, load: float) -> dict:
+    """
+    Decode once, pick a decoding tier from the audio length, hint and queue load
+    (see stt_tiers), then transcribe with that tier's model and options.
+    """
+    import stt_tiers
+    from faster_whisper.audio import decode_audio
+    samples = decode_audio(io.BytesIO(audio), sampling_rate=16000)
+    duration = len(samples) / 16000
+    tier, downgraded = stt_tiers.choose_tier(duration, hint, load)
+    model = get_whisper(stt_tiers.TIER_MODELS.get(tier))
+    segments, _ = model.transcribe(samples, **stt_tiers.tier_options(tier))
+    text = " ".join(segment.text for segment in segments).strip()
+    return {"text": text, "duration": duration, "tier": tier, "downgraded": downgraded}
+
+def stt_chunk_job(audio, offset: float, tier: str) -> dict:
+    """Transcribe one long-form chunk (16 kHz float32); segment timestamps are absolute seconds."""
+    import stt_tiers
+    model = get_whisper(stt_tiers.TIER_MODELS.get(tier))
+    # Chunks are already cut at silences, so skip Whisper's own VAD; timestamps are wanted here
+    options = {**stt_tiers.tier_options(tier, vad=False), "without_timestamps": False}
+    segments, _ = model.transcribe(audio, **options)
+    result = [
+        {"start": round(offset + segment.start, 2), "end": round(offset + segment.end, 2), "text": segment.text.strip()}
+        for segment in segments
+    ]
+    return {"segments": result, "text": " ".join(s["text"] for s in result).strip()}
+
+# --- Pools ---
+
+class QueueFull(Exception):
+    pass
+
+class ModelPool:
+    """
+    Runs blocking inference for one model off the event loop.
+    mode "thread": one model in this process shared by N threads (ONNX Runtime / CTranslate2 release the GIL).
+    mode "process": N processes, each with its own model copy.
+    At most `max_queue` jobs may be queued or running; beyond that callers get QueueFull (HTTP 503).
+    """
+
+    def __init__(self, model: str, mode: str, workers: int, max_queue: int):
+        if mode not in ("thread", "process"):
+            raise ValueError(f"Unknown pool mode for {model}: {mode}")
+        self.model = model
+        self.mode = mode
+        self.workers = max(1, workers)
+        self.max_queue = max(self.workers, max_queue)
+        self.pending = 0
+        self.info = {"loaded": False}
+        self._executor = None
+
+    async def start(self):
+        if self.mode == "thread":
+            init_worker(self.model, self.workers)
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"{self.model}-worker")
+        else:
+            # spawn: forking a process that already holds ONNX/CTranslate2 thread pools is unsafe
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=init_worker,
+                initargs=(self.model, 1),
+            )
+        self.info = await self.run(describe, self.model)
+        print(f"[{self.model.upper()}] {self.workers} {self.mode} worker(s), queue {self.max_queue}, loaded={self.info['loaded']}")
+
+    @property
+    def ready(self) -> bool:
+        return bool(self.info.get("loaded"))
+
+    @property
+    def saturated(self) -> bool:
+        return self.pending >= self.max_queue
+
+    async def run(self, fn, *args):
+        if self.saturated:
+            raise QueueFull(f"{self.model} queue full ({self.pending}/{self.max_queue})")
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    def stats(self) -> dict:
+        return {"mode": self.mode, "workers": self.workers, "pending": self.pending, "max_queue": self.max_queue}
+
+    def shutdown(self):
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)